@@ -129,6 +129,42 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Directory where uploaded CSV files wait for the background import worker
+IMPORT_UPLOAD_DIR = BASE_DIR / "data" / "uploads"
+
+# Seconds between heartbeats of a running import job, and seconds without one
+# after which the job's worker is considered dead and the job failed
+IMPORT_JOB_HEARTBEAT_SECONDS = 30
+IMPORT_JOB_STALE_SECONDS = 300
+
+# Memory-mapped snapshot of the statistics cube shared by the processes of a
+# host; set to None to always build the cube from the database
+CUBE_SNAPSHOT_PATH = BASE_DIR / "data" / "cube.snapshot"
+
+# Seconds a reverse proxy may serve cached API responses without revalidating
+# them (sent as X-Accel-Expires); browsers always revalidate with the ETag
+API_PROXY_CACHE_SECONDS = 30
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Shared tier of the API response cache, see RESPONSE_CACHE_SHARED_ALIAS
+    "responses": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "data" / "response_cache",
+        "TIMEOUT": 3600,
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
+# Cache of list responses keyed by request and dataset version: an LRU tier in
+# each process, limited in entries and bytes, and an optional shared tier in
+# the named cache, e.g. "responses" (None to disable it)
+RESPONSE_CACHE_MAX_ENTRIES = 512
+RESPONSE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+RESPONSE_CACHE_SHARED_ALIAS = None
+
 # REST Framework settings
 REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": [
@@ -6,7 +6,14 @@ including customizations for the Django admin interface.
 """
 
 from django.contrib import admin
-from .models import AgeGroup, Sex, HDIndex, DemographicStatistic
+from .models import (
+    AgeGroup,
+    Sex,
+    HDIndex,
+    DemographicStatistic,
+    ImportJob,
+    ImportSource,
+)
 
 
 @admin.register(AgeGroup)
@@ -59,3 +66,31 @@ class DemographicStatisticAdmin(admin.ModelAdmin):
         return f"{total} (computed total for both sexes)"
 
     computed_total.short_description = "Computed Total"
+
+
+@admin.register(ImportSource)
+class ImportSourceAdmin(admin.ModelAdmin):
+    """Admin interface for ImportSource model."""
+
+    list_display = ["url", "etag", "last_modified", "checked_at"]
+    search_fields = ["url"]
+    readonly_fields = ["checked_at"]
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    """Admin interface for ImportJob model."""
+
+    list_display = [
+        "id",
+        "name",
+        "source_type",
+        "status",
+        "phase",
+        "rows_processed",
+        "created_at",
+        "finished_at",
+    ]
+    list_filter = ["status", "source_type"]
+    search_fields = ["name", "source"]
+    readonly_fields = ["created_at", "started_at", "finished_at"]
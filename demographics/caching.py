@@ -0,0 +1,332 @@
+"""
+Caching of responses derived from the statistics.
+
+Responses that only depend on the statistics are validated against the
+dataset version: their ETag and Last-Modified headers come from the
+DatasetVersion row, which imports, model writes and database cleaning bump.
+A conditional request for an unchanged dataset is answered with 304 Not
+Modified after a single query, without running the view.
+
+List responses are also cached on the server by ``response_cache``, keyed by
+the request and the dataset version, so that the dashboards' recurring filter
+combinations are not queried and serialized again.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from demographics.models import DatasetVersion
+
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def get_dataset_state(request: Any) -> Optional[Dict[str, Any]]:
+    """
+    Get the dataset state for a request, looking it up once per request.
+
+    The state includes the active import job if the view shows it, see
+    ``dataset_cache``.
+
+    Args:
+        request: The current request.
+
+    Returns:
+        The ``DatasetVersion.state`` of the request.
+    """
+    if not hasattr(request, "_dataset_state"):
+        request._dataset_state = DatasetVersion.state(
+            with_active_job=getattr(request, "_dataset_state_with_active_job", False)
+        )
+    return request._dataset_state
+
+
+def dataset_etag(request: Any, *args: Any, **kwargs: Any) -> Optional[str]:
+    """
+    Build a strong ETag for a response derived from the statistics.
+
+    The tag changes with the dataset version, the active import job (for
+    views that show it), the CSRF cookie (for views that render the CSRF
+    token in forms, so pages are not reused with a rotated token) and the
+    Accept header, which selects the renderer of API responses.
+
+    Args:
+        request: The current request.
+
+    Returns:
+        The quoted ETag, or None if the response must not be validated.
+    """
+    if get_messages(request):
+        # Flash messages are shown once, so the page must be rendered
+        return None
+    state = get_dataset_state(request)
+    if state is None:
+        return None
+
+    csrf_token = (
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, "")
+        if getattr(request, "_dataset_etag_with_csrf_token", False)
+        else ""
+    )
+    digest = hashlib.md5(
+        f"{state.get('active_job')}:{csrf_token}:"
+        f"{request.headers.get('Accept', '')}".encode(),
+        usedforsecurity=False,
+    ).hexdigest()[:12]
+    return f'"{state["version"]}-{digest}"'
+
+
+def dataset_last_modified(request: Any, *args: Any, **kwargs: Any) -> Any:
+    """
+    Get the time the statistics last changed, for the Last-Modified header.
+
+    Args:
+        request: The current request.
+
+    Returns:
+        The datetime of the last change, or None.
+    """
+    if get_messages(request):
+        return None
+    state = get_dataset_state(request)
+    return state["updated_at"] if state else None
+
+
+def dataset_cache(
+    with_active_job: bool = False,
+    with_csrf_token: bool = False,
+    proxy_cache: bool = False,
+    **cache_control: Any,
+) -> Callable:
+    """
+    Decorate a view whose responses only change with the dataset version.
+
+    GET and HEAD responses get ETag and Last-Modified headers, conditional
+    requests for an unchanged dataset get 304 Not Modified, and successful
+    responses get the given Cache-Control directives.
+
+    Args:
+        with_active_job: Whether the response also depends on the active
+            import job, which is then looked up in the same query.
+        with_csrf_token: Whether the response renders the CSRF token, which
+            is then part of the ETag.
+        proxy_cache: Whether a reverse proxy may cache successful responses
+            for ``API_PROXY_CACHE_SECONDS``, through the X-Accel-Expires
+            header that nginx reads and does not pass on.
+        **cache_control: Cache-Control directives, as for
+            ``patch_cache_control``.
+
+    Returns:
+        The view decorator.
+    """
+
+    def decorator(view: Callable) -> Callable:
+        conditional_view = condition(
+            etag_func=dataset_etag, last_modified_func=dataset_last_modified
+        )(view)
+
+        @wraps(view)
+        def wrapper(request: Any, *args: Any, **kwargs: Any) -> Any:
+            request._dataset_state_with_active_job = with_active_job
+            request._dataset_etag_with_csrf_token = with_csrf_token
+            response = conditional_view(request, *args, **kwargs)
+            if request.method in ("GET", "HEAD") and response.status_code in (
+                200,
+                304,
+            ):
+                patch_cache_control(response, **cache_control)
+                seconds = getattr(settings, "API_PROXY_CACHE_SECONDS", None)
+                if proxy_cache and seconds:
+                    response.headers.setdefault("X-Accel-Expires", str(seconds))
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+class ResponseCache:
+    """
+    Two-tier cache of API response data, keyed by request and dataset version.
+
+    The first tier is a size-limited LRU mapping in each process, bounded by
+    ``RESPONSE_CACHE_MAX_ENTRIES`` and ``RESPONSE_CACHE_MAX_BYTES``. The
+    optional second tier is the Django cache named by
+    ``RESPONSE_CACHE_SHARED_ALIAS`` (e.g. a file or database cache), which is
+    shared by the processes using it. Entries are stored as JSON.
+
+    Keys include the dataset version, so every import or other change of the
+    statistics invalidates all entries. The local tier is emptied as soon as
+    a request sees a new version; shared entries expire with their timeout.
+    """
+
+    KEY_PREFIX = "demographics:response"
+
+    def __init__(self) -> None:
+        """Initialize an empty cache."""
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._bytes = 0
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def get(self, request: Any) -> Tuple[Optional[Any], Optional[str]]:
+        """
+        Get the cached response data of a request.
+
+        Args:
+            request: The Django request, after its dataset state was looked up.
+
+        Returns:
+            The data and the tier it came from ("local" or "shared"), or
+            (None, None) on a miss.
+        """
+        key, version = self._key(request)
+        with self._lock:
+            if version != self._version:
+                self._clear_local()
+                self._version = version
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.local_hits += 1
+                return json.loads(payload), "local"
+
+        shared = self._shared()
+        if shared is not None:
+            try:
+                payload = shared.get(key)
+            except Exception as e:
+                logger.warning(f"Could not read the shared response cache: {e}")
+                payload = None
+            if payload is not None:
+                with self._lock:
+                    self.shared_hits += 1
+                    self._store_local(key, payload)
+                return json.loads(payload), "shared"
+
+        with self._lock:
+            self.misses += 1
+        return None, None
+
+    def set(self, request: Any, data: Any) -> None:
+        """
+        Cache the response data of a request in both tiers.
+
+        Args:
+            request: The Django request the data was computed for.
+            data: JSON-serializable response data.
+        """
+        key, version = self._key(request)
+        payload = json.dumps(data, separators=(",", ":")).encode()
+        with self._lock:
+            if version == self._version:
+                self._store_local(key, payload)
+
+        shared = self._shared()
+        if shared is not None:
+            try:
+                shared.set(key, payload)
+            except Exception as e:
+                logger.warning(f"Could not write the shared response cache: {e}")
+
+    def clear(self) -> None:
+        """Empty the local tier and reset the statistics."""
+        with self._lock:
+            self._clear_local()
+            self._version = None
+            self.local_hits = self.shared_hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the hit and miss counts and ratios of this process.
+
+        Returns:
+            A dictionary with the counts, ratios and size of the local tier.
+        """
+        with self._lock:
+            hits = self.local_hits + self.shared_hits
+            lookups = hits + self.misses
+            return {
+                "local_hits": self.local_hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_ratio": hits / lookups if lookups else 0.0,
+                "miss_ratio": self.misses / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "version": self._version,
+                "shared_cache": getattr(settings, "RESPONSE_CACHE_SHARED_ALIAS", None),
+            }
+
+    def _key(self, request: Any) -> Tuple[str, int]:
+        """
+        Build the cache key of a request.
+
+        The key covers the host and path, which appear in pagination links,
+        and the query parameters sorted by name with empty values dropped.
+
+        Args:
+            request: The Django request.
+
+        Returns:
+            The key and the dataset version it includes.
+        """
+        state = get_dataset_state(request)
+        version = state["version"] if state else 0
+        params = sorted(
+            (name, value)
+            for name, values in request.GET.lists()
+            for value in values
+            if value != ""
+        )
+        digest = hashlib.sha1(
+            json.dumps([request.get_host(), request.path, params]).encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+        return f"{self.KEY_PREFIX}:{version}:{digest}", version
+
+    def _store_local(self, key: str, payload: bytes) -> None:
+        """Add an entry to the local tier and evict the least recently used."""
+        max_entries = getattr(settings, "RESPONSE_CACHE_MAX_ENTRIES", 0)
+        max_bytes = getattr(settings, "RESPONSE_CACHE_MAX_BYTES", 0)
+        if not max_entries or len(payload) > max_bytes:
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        self._entries[key] = payload
+        self._bytes += len(payload)
+        while len(self._entries) > max_entries or self._bytes > max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def _clear_local(self) -> None:
+        """Remove every entry of the local tier."""
+        self._entries.clear()
+        self._bytes = 0
+
+    @staticmethod
+    def _shared() -> Any:
+        """Return the shared tier's Django cache, or None if it is disabled."""
+        alias = getattr(settings, "RESPONSE_CACHE_SHARED_ALIAS", None)
+        return caches[alias] if alias else None
+
+
+# Response cache of the demographics list endpoint in this process
+response_cache = ResponseCache()
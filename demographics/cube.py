@@ -0,0 +1,828 @@
+"""
+In-memory cube of demographic statistics.
+
+The statistics form a dense 4-D cube of year x age group x sex x HDI rating
+with small cardinalities. This module loads them into a NumPy int64 array with
+an index map per dimension and answers filter, slice, marginal-sum and
+breakdown queries with vectorized reductions instead of relational joins.
+
+The cube is cached per process by ``get_cube`` and rebuilt when the
+DatasetVersion changes. Rebuilt cubes are written to a versioned snapshot file
+at ``CUBE_SNAPSHOT_PATH``: a JSON header with the dimension index maps followed
+by the fixed-width arrays. The header records the version and the time it was
+set, so a snapshot of a database that was since reset or restored, whose
+version counter starts over, is not mistaken for the current one. Other processes memory-map the snapshot read-only
+instead of querying the statistics, so a host keeps a single copy of the data
+in its page cache.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from demographics.dimensions import CATEGORY_MODELS
+from demographics.models import DatasetVersion, DemographicStatistic
+
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Cube axes, in order
+DIMENSIONS = ("year", "age_group", "sex", "hd_index")
+
+# First bytes of a snapshot file, followed by the header length
+SNAPSHOT_MAGIC = b"DSCUBE01"
+
+# Alignment of the arrays in a snapshot file, in bytes
+SNAPSHOT_ALIGNMENT = 64
+
+
+class Dimension:
+    """
+    Index map of one cube axis.
+
+    Maps the keys of the axis (years or category ids) and their labels
+    (category names) to positions along the axis.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        keys: Iterable[int],
+        labels: Optional[Iterable[str]] = None,
+        is_aggregate: Optional[Iterable[bool]] = None,
+    ) -> None:
+        """
+        Initialize the dimension.
+
+        Args:
+            name: The name of the axis, one of DIMENSIONS.
+            keys: The sorted years or category ids along the axis.
+            labels: The category names, the keys as strings by default.
+            is_aggregate: Whether each category is an aggregate, False by default.
+        """
+        self.name = name
+        self.keys = np.asarray(list(keys), dtype=np.int64)
+        self.labels = (
+            list(labels) if labels is not None else [str(key) for key in self.keys]
+        )
+        self.is_aggregate = np.asarray(
+            list(is_aggregate) if is_aggregate is not None else [False] * len(self),
+            dtype=bool,
+        )
+        self.positions = {key: i for i, key in enumerate(self.keys.tolist())}
+        self.label_positions = {label: i for i, label in enumerate(self.labels)}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def index(self, value: Any) -> Optional[int]:
+        """
+        Find the position of a value along the axis.
+
+        Args:
+            value: A year, a category, a category id or a category name.
+
+        Returns:
+            The position, or None if the value is not on the axis.
+        """
+        value = getattr(value, "pk", value)
+        if isinstance(value, str):
+            return self.label_positions.get(value)
+        return self.positions.get(int(value))
+
+
+class StatisticsCube:
+    """
+    Dense array of every statistic, indexed by year, age group, sex and HDI rating.
+
+    Cells without a statistic hold 0 and are marked as absent in ``present``.
+    Totals follow the semantics of the ``DemographicStatistic`` aggregation
+    methods: categories flagged as aggregates are excluded from the dimension
+    being summed over, so totals are not double counted.
+    """
+
+    def __init__(
+        self,
+        version: int,
+        dimensions: Sequence[Dimension],
+        values: np.ndarray,
+        present: np.ndarray,
+        updated_at: Optional[str] = None,
+    ) -> None:
+        """
+        Initialize the cube.
+
+        Args:
+            version: The DatasetVersion the cube was built from.
+            dimensions: The axes of the cube, in DIMENSIONS order.
+            values: An int64 array with one axis per dimension.
+            present: A boolean array marking the cells that hold a statistic.
+            updated_at: When the version was set, in ISO 8601 format.
+        """
+        self.version = version
+        self.updated_at = updated_at
+        self.dimensions = {dimension.name: dimension for dimension in dimensions}
+        self.values = values
+        self.present = present
+
+    @classmethod
+    def load(
+        cls, version: Optional[int] = None, updated_at: Optional[datetime] = None
+    ) -> StatisticsCube:
+        """
+        Build the cube from the database.
+
+        Args:
+            version: The DatasetVersion to record, read from the database by
+                default. It is read before the statistics so a concurrent
+                change makes the cube stale rather than mislabelled.
+            updated_at: When the version was set, read with the version by
+                default.
+
+        Returns:
+            The loaded cube.
+        """
+        start_time = time.perf_counter()
+        if version is None:
+            version, updated_at = _current_version()
+
+        rows = np.array(
+            list(
+                DemographicStatistic.objects.values_list(
+                    "year", "age_group_id", "sex_id", "hd_index_id", "value"
+                )
+            ),
+            dtype=np.int64,
+        ).reshape(-1, 5)
+
+        dimensions = [Dimension("year", np.unique(rows[:, 0]))]
+        for name, model in CATEGORY_MODELS.items():
+            categories = list(
+                model.objects.order_by("pk").values_list("pk", "name", "is_aggregate")
+            )
+            dimensions.append(
+                Dimension(
+                    name,
+                    [category[0] for category in categories],
+                    [category[1] for category in categories],
+                    [category[2] for category in categories],
+                )
+            )
+
+        shape = tuple(len(dimension) for dimension in dimensions)
+        values = np.zeros(shape, dtype=np.int64)
+        present = np.zeros(shape, dtype=bool)
+        if len(rows):
+            cells = tuple(
+                np.searchsorted(dimension.keys, rows[:, axis])
+                for axis, dimension in enumerate(dimensions)
+            )
+            values[cells] = rows[:, 4]
+            present[cells] = True
+
+        logger.info(
+            f"Loaded statistics cube version {version} with shape {shape} "
+            f"in {time.perf_counter() - start_time:.3f} seconds"
+        )
+        return cls(version, dimensions, values, present, _isoformat(updated_at))
+
+    @classmethod
+    def from_snapshot(cls, path: Path) -> StatisticsCube:
+        """
+        Memory-map a cube snapshot read-only.
+
+        Args:
+            path: The path of the snapshot file.
+
+        Returns:
+            The cube, backed by the file's pages.
+
+        Raises:
+            ValueError: If the file is not a cube snapshot.
+        """
+        with open(path, "rb") as f:
+            if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                raise ValueError(f"Not a statistics cube snapshot: {path}")
+            header_length = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_length))
+        values_offset = _snapshot_data_offset(header_length)
+
+        shape = tuple(header["shape"])
+        dimensions = [Dimension(**dimension) for dimension in header["dimensions"]]
+        if not all(shape):
+            # Empty files cannot be memory-mapped
+            return cls(
+                header["version"],
+                dimensions,
+                np.zeros(shape, dtype=np.int64),
+                np.zeros(shape, dtype=bool),
+                header.get("updated_at"),
+            )
+
+        values = np.memmap(
+            path, dtype=np.int64, mode="r", offset=values_offset, shape=shape
+        )
+        present = np.memmap(
+            path,
+            dtype=bool,
+            mode="r",
+            offset=values_offset + int(np.prod(shape)) * 8,
+            shape=shape,
+        )
+        return cls(
+            header["version"], dimensions, values, present, header.get("updated_at")
+        )
+
+    def write_snapshot(self, path: Path) -> None:
+        """
+        Write the cube to a snapshot file.
+
+        The file is written next to its destination and renamed over it, so
+        processes never map a partially written snapshot. Processes that
+        mapped the previous file keep reading it until they remap.
+
+        Args:
+            path: The path of the snapshot file.
+        """
+        path = Path(path)
+        header = {
+            "version": self.version,
+            "updated_at": self.updated_at,
+            "shape": list(self.shape),
+            "dimensions": [
+                {
+                    "name": dimension.name,
+                    "keys": dimension.keys.tolist(),
+                    "labels": dimension.labels,
+                    "is_aggregate": dimension.is_aggregate.tolist(),
+                }
+                for dimension in (self.dimensions[name] for name in DIMENSIONS)
+            ],
+        }
+
+        encoded = json.dumps(header).encode()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temporary_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(SNAPSHOT_MAGIC)
+                f.write(len(encoded).to_bytes(8, "little"))
+                f.write(encoded)
+                f.write(b"\0" * (_snapshot_data_offset(len(encoded)) - f.tell()))
+                f.write(np.ascontiguousarray(self.values, dtype=np.int64).tobytes())
+                f.write(np.ascontiguousarray(self.present, dtype=bool).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(temporary_path, 0o644)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+        logger.info(f"Wrote statistics cube snapshot version {self.version} to {path}")
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """The number of positions along each axis."""
+        return self.values.shape
+
+    def dimension(self, name: str) -> Dimension:
+        """
+        Get the index map of an axis.
+
+        Args:
+            name: The name of the axis, one of DIMENSIONS.
+
+        Returns:
+            The dimension.
+
+        Raises:
+            ValueError: If the name is not a dimension.
+        """
+        if name not in self.dimensions:
+            raise ValueError(
+                f"Unknown dimension: {name}. Choose one of: {', '.join(DIMENSIONS)}"
+            )
+        return self.dimensions[name]
+
+    def slice(self, **fixed: Any) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fix some dimensions and return the remaining sub-cube.
+
+        Args:
+            **fixed: Values of the dimensions to fix, keyed by dimension name.
+                None leaves a dimension free.
+
+        Returns:
+            The values and presence mask of the sub-cube, with one axis per
+            free dimension. If a fixed value is unknown, no cell is present.
+        """
+        for name in fixed:
+            self.dimension(name)
+
+        selector = []
+        free_shape = []
+        for axis, name in enumerate(DIMENSIONS):
+            value = fixed.get(name)
+            if value is None:
+                selector.append(slice(None))
+                free_shape.append(self.shape[axis])
+                continue
+            selector.append(self.dimension(name).index(value))
+
+        if None in selector:
+            empty = np.zeros(free_shape, dtype=np.int64)
+            return empty, empty.astype(bool)
+        selector = tuple(selector)
+        return self.values[selector], self.present[selector]
+
+    def filter(
+        self,
+        year: Optional[Any] = None,
+        age_group: Optional[Any] = None,
+        sex: Optional[Any] = None,
+        hd_index: Optional[Any] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        List the statistics matching the given values.
+
+        Mirrors ``DemographicStatistic.filter_statistics``; any parameter that
+        is None is not used for filtering.
+
+        Args:
+            year: The year to filter by.
+            age_group: The age group to filter by, as a category, id or name.
+            sex: The sex category to filter by, as a category, id or name.
+            hd_index: The HDI category to filter by, as a category, id or name.
+
+        Returns:
+            A list of dictionaries with the year, category names and value of
+            each matching statistic, ordered by year and category id.
+        """
+        fixed = {"year": year, "age_group": age_group, "sex": sex, "hd_index": hd_index}
+        mask = self.present.copy()
+        for axis, name in enumerate(DIMENSIONS):
+            if fixed[name] is None:
+                continue
+            position = self.dimension(name).index(fixed[name])
+            axis_mask = np.zeros(self.shape[axis], dtype=bool)
+            if position is not None:
+                axis_mask[position] = True
+            shape = [1] * len(DIMENSIONS)
+            shape[axis] = -1
+            mask &= axis_mask.reshape(shape)
+
+        cells = np.nonzero(mask)
+        dimensions = [self.dimensions[name] for name in DIMENSIONS]
+        years = dimensions[0].keys[cells[0]].tolist()
+        labels = [
+            [dimension.labels[i] for i in positions.tolist()]
+            for dimension, positions in zip(dimensions[1:], cells[1:])
+        ]
+        return [
+            {
+                "year": year,
+                "age_group": age_group_label,
+                "sex": sex_label,
+                "hd_index": hd_index_label,
+                "value": value,
+            }
+            for year, age_group_label, sex_label, hd_index_label, value in zip(
+                years, *labels, self.values[cells].tolist()
+            )
+        ]
+
+    def marginal(self, over: str) -> np.ndarray:
+        """
+        Sum the cube over one dimension.
+
+        Args:
+            over: The dimension to sum over, other than year.
+
+        Returns:
+            An array with the summed axis removed, holding the total of every
+            combination of the other dimensions.
+        """
+        axis = DIMENSIONS.index(self.dimension(over).name)
+        included = np.flatnonzero(~self.dimensions[over].is_aggregate)
+        return self.values.take(included, axis=axis).sum(axis=axis)
+
+    def total(self, over: str, year: Any, **fixed: Any) -> int:
+        """
+        Sum the statistics of one year over one dimension.
+
+        Args:
+            over: The dimension to sum over, other than year.
+            year: The year of the statistics.
+            **fixed: Values of the two other dimensions.
+
+        Returns:
+            The total, 0 if no statistics match.
+        """
+        selector = self._line_selector(over, year, fixed)
+        if selector is None:
+            return 0
+        return int(self.values[selector][~self.dimensions[over].is_aggregate].sum())
+
+    def breakdown(self, by: str, year: Any, **fixed: Any) -> Dict[str, int]:
+        """
+        Break the statistics of one year down by one dimension.
+
+        Args:
+            by: The dimension to break down by, other than year.
+            year: The year of the statistics.
+            **fixed: Values of the two other dimensions.
+
+        Returns:
+            A dictionary mapping the names of the non-aggregate categories
+            with a statistic to their values.
+        """
+        selector = self._line_selector(by, year, fixed)
+        if selector is None:
+            return {}
+        dimension = self.dimensions[by]
+        values = self.values[selector]
+        included = self.present[selector] & ~dimension.is_aggregate
+        return {dimension.labels[i]: int(values[i]) for i in np.flatnonzero(included)}
+
+    def group(self, by: Sequence[str], **fixed: Any) -> List[Dict[str, Any]]:
+        """
+        Sum the statistics matching the fixed values, grouped by some dimensions.
+
+        Aggregate categories are left out of every dimension that is not
+        fixed, so each person is counted once whatever the grouping. A fixed
+        aggregate category, such as "Both sexes", is used as given.
+
+        Args:
+            by: The dimensions to group by, in the order of the result keys.
+            **fixed: Values of the dimensions to filter by, keyed by dimension
+                name. None leaves a dimension unfiltered.
+
+        Returns:
+            A dictionary per group with at least one statistic, with the
+            group's year and category names, the "total" of its values and
+            the "count" of its statistics, ordered by year and category id.
+
+        Raises:
+            ValueError: If a dimension name is unknown or repeated.
+        """
+        reduced = self._reduce(by, fixed)
+        if reduced is None:
+            return []
+        positions, totals, counts = reduced
+
+        groups = []
+        # argwhere also handles the scalar left when grouping by nothing
+        for index in map(tuple, np.argwhere(counts)):
+            group = {
+                name: self._key(name, positions[name][i]) for name, i in zip(by, index)
+            }
+            group["total"] = int(totals[index])
+            group["count"] = int(counts[index])
+            groups.append(group)
+        return groups
+
+    def timeseries(
+        self, by: Sequence[str], **fixed: Any
+    ) -> Tuple[List[int], List[Dict[str, Any]], np.ndarray, np.ndarray]:
+        """
+        Sum the statistics matching the fixed values into series over the years.
+
+        Aggregate categories are handled as in ``group``.
+
+        Args:
+            by: The category dimensions identifying a series, in the order of
+                the series keys.
+            **fixed: Values of the dimensions to filter by, keyed by dimension
+                name. None leaves a dimension unfiltered.
+
+        Returns:
+            The years with at least one statistic, the category names of each
+            series with at least one statistic, and the series x year arrays
+            of totals and of whether each total has statistics.
+
+        Raises:
+            ValueError: If a dimension name is unknown or repeated, or "year"
+                is one of the series dimensions.
+        """
+        if "year" in by:
+            raise ValueError("Series are indexed by year; do not group by it")
+        reduced = self._reduce((*by, "year"), fixed)
+        if reduced is None:
+            return [], [], np.zeros((0, 0), np.int64), np.zeros((0, 0), bool)
+        positions, totals, counts = reduced
+
+        totals = totals.reshape(-1, totals.shape[-1])
+        present = counts.reshape(-1, counts.shape[-1]) > 0
+        series = np.flatnonzero(present.any(axis=1))
+        years = np.flatnonzero(present.any(axis=0))
+        keys = [
+            {name: self._key(name, positions[name][i]) for name, i in zip(by, index)}
+            for index in np.ndindex(*counts.shape[:-1])
+        ]
+        return (
+            [self._key("year", positions["year"][i]) for i in years],
+            [keys[i] for i in series],
+            totals[np.ix_(series, years)],
+            present[np.ix_(series, years)],
+        )
+
+    def _reduce(
+        self, by: Sequence[str], fixed: Dict[str, Any]
+    ) -> Optional[Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray]]:
+        """
+        Sum the selected cells of the cube over the dimensions not grouped by.
+
+        Args:
+            by: The dimensions to keep, in the order of the result axes.
+            fixed: Values of the dimensions to filter by.
+
+        Returns:
+            The cube positions included along each dimension, and the totals
+            and statistic counts with one axis per grouped dimension, or None
+            if nothing is selected.
+
+        Raises:
+            ValueError: If a dimension name is unknown or repeated.
+        """
+        for name in (*by, *fixed):
+            self.dimension(name)
+        if len(set(by)) != len(by):
+            raise ValueError("A dimension can only be grouped by once")
+
+        positions = {}
+        for name in DIMENSIONS:
+            dimension = self.dimensions[name]
+            if fixed.get(name) is not None:
+                position = dimension.index(fixed[name])
+                included = np.array([] if position is None else [position], int)
+            else:
+                included = np.flatnonzero(~dimension.is_aggregate)
+            if not len(included):
+                return None
+            positions[name] = included
+
+        cells = np.ix_(*positions.values())
+        other_axes = tuple(
+            axis for axis, name in enumerate(DIMENSIONS) if name not in by
+        )
+        totals = self.values[cells].sum(axis=other_axes)
+        counts = self.present[cells].sum(axis=other_axes)
+
+        # Reduced axes are in DIMENSIONS order; put them in the requested order
+        grouped = [name for name in DIMENSIONS if name in by]
+        order = [grouped.index(name) for name in by]
+        return positions, totals.transpose(order), counts.transpose(order)
+
+    def _key(self, name: str, position: int) -> Any:
+        """Return the year, or the category name, at a position of a dimension."""
+        dimension = self.dimensions[name]
+        if name == "year":
+            return int(dimension.keys[position])
+        return dimension.labels[position]
+
+    def _line_selector(
+        self, free: str, year: Any, fixed: Dict[str, Any]
+    ) -> Optional[Tuple[Any, ...]]:
+        """
+        Build the selector of the cells along one dimension.
+
+        Args:
+            free: The dimension left free, other than year.
+            year: The year of the cells.
+            fixed: Values of the two other dimensions.
+
+        Returns:
+            A selector for the values array, or None if a value is unknown.
+
+        Raises:
+            ValueError: If the free dimension is unknown or is year.
+        """
+        if free == "year":
+            raise ValueError("The year dimension cannot be summed or broken down")
+        self.dimension(free)
+
+        selector = []
+        for name in DIMENSIONS:
+            if name == free:
+                selector.append(slice(None))
+                continue
+            position = self.dimensions[name].index(
+                year if name == "year" else fixed[name]
+            )
+            if position is None:
+                return None
+            selector.append(position)
+        return tuple(selector)
+
+    def get_aggregated_by_both_sexes(
+        self, year: Any, age_group: Any, hd_index: Any
+    ) -> int:
+        """Cube version of ``DemographicStatistic.get_aggregated_by_both_sexes``."""
+        return self.total("sex", year, age_group=age_group, hd_index=hd_index)
+
+    def get_aggregated_by_all_ages(self, year: Any, sex: Any, hd_index: Any) -> int:
+        """Cube version of ``DemographicStatistic.get_aggregated_by_all_ages``."""
+        return self.total("age_group", year, sex=sex, hd_index=hd_index)
+
+    def get_aggregated_by_all_hdi(self, year: Any, age_group: Any, sex: Any) -> int:
+        """Cube version of ``DemographicStatistic.get_aggregated_by_all_hdi``."""
+        return self.total("hd_index", year, age_group=age_group, sex=sex)
+
+    def get_breakdown_by_sex(
+        self, year: Any, age_group: Any, hd_index: Any
+    ) -> Dict[str, int]:
+        """Cube version of ``DemographicStatistic.get_breakdown_by_sex``."""
+        return self.breakdown("sex", year, age_group=age_group, hd_index=hd_index)
+
+
+def growth_metrics(
+    years: Sequence[int], totals: np.ndarray, present: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Compute the growth of series of totals over the years, for every series at once.
+
+    Changes are measured from the previous year column. A change is NaN in
+    the first column, where either total is missing, and (as a percentage)
+    where the previous total is 0. The CAGR runs from the first to the last
+    year with a total; it is NaN for series with fewer than two such years
+    or a first total of 0.
+
+    Args:
+        years: The ascending years of the columns.
+        totals: The series x year array of totals.
+        present: Whether each total has statistics.
+
+    Returns:
+        The series x year arrays "change" and "percent_change", and the
+        per-series array "cagr", as a percentage per year.
+    """
+    values = np.where(present, totals, np.nan).astype(float)
+    change = np.full(values.shape, np.nan)
+    change[:, 1:] = np.diff(values, axis=1)
+    percent_change = np.full(values.shape, np.nan)
+    cagr = np.full(values.shape[0], np.nan)
+    if not values.size:
+        return {"change": change, "percent_change": percent_change, "cagr": cagr}
+
+    years = np.asarray(years, dtype=float)
+    first = np.argmax(present, axis=1)
+    last = values.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1)
+    rows = np.arange(values.shape[0])
+    start, end = values[rows, first], values[rows, last]
+    span = years[last] - years[first]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        previous = values[:, :-1]
+        percent_change[:, 1:] = np.where(
+            previous != 0, change[:, 1:] / previous * 100, np.nan
+        )
+        valid = (span > 0) & (start > 0)
+        cagr[valid] = (np.power(end[valid] / start[valid], 1 / span[valid]) - 1) * 100
+    return {"change": change, "percent_change": percent_change, "cagr": cagr}
+
+
+_cube: Optional[StatisticsCube] = None
+_cube_lock = threading.Lock()
+
+
+def get_cube(
+    version: Optional[int] = None, updated_at: Optional[datetime] = None
+) -> StatisticsCube:
+    """
+    Get the cube of the current dataset, rebuilding it if the data changed.
+
+    Checking the version costs one primary-key query per call, unless the
+    caller already knows the current version. A changed
+    cube is mapped from the snapshot file when the snapshot has the current
+    version and update time, and is otherwise built from the database and
+    written to the snapshot for the other processes.
+
+    Args:
+        version: The current DatasetVersion, looked up if not given.
+        updated_at: When the current version was set, looked up with the
+            version if not given.
+
+    Returns:
+        The cached cube.
+    """
+    global _cube
+    if version is None:
+        version, updated_at = _current_version()
+    cube = _cube
+    if cube is None or cube.version != version:
+        with _cube_lock:
+            if _cube is None or _cube.version != version:
+                _cube = _load_cube(version, updated_at)
+            cube = _cube
+    return cube
+
+
+def write_cube_snapshot() -> Optional[StatisticsCube]:
+    """
+    Build the cube from the database and write it to the snapshot file.
+
+    Returns:
+        The written cube, or None if snapshots are disabled.
+    """
+    path = getattr(settings, "CUBE_SNAPSHOT_PATH", None)
+    if path is None:
+        return None
+    cube = StatisticsCube.load()
+    cube.write_snapshot(path)
+    return cube
+
+
+def _snapshot_data_offset(header_length: int) -> int:
+    """
+    Compute the offset of the arrays in a snapshot file.
+
+    The values array starts at the first aligned offset after the header and
+    is followed directly by the presence mask.
+
+    Args:
+        header_length: The length of the encoded header in bytes.
+
+    Returns:
+        The offset of the values array in bytes.
+    """
+    end = len(SNAPSHOT_MAGIC) + 8 + header_length
+    return -(-end // SNAPSHOT_ALIGNMENT) * SNAPSHOT_ALIGNMENT
+
+
+def _current_version() -> Tuple[int, Optional[datetime]]:
+    """
+    Read the current DatasetVersion and the time it was set with one query.
+
+    Returns:
+        A (version, updated_at) tuple, (0, None) if the row is missing.
+    """
+    return DatasetVersion.objects.filter(pk=1).values_list(
+        "version", "updated_at"
+    ).first() or (0, None)
+
+
+def _isoformat(updated_at: Optional[datetime]) -> Optional[str]:
+    """Format a version's update time for a snapshot header."""
+    return updated_at.isoformat() if updated_at else None
+
+
+def _load_cube(version: int, updated_at: Optional[datetime] = None) -> StatisticsCube:
+    """
+    Load the cube of a dataset version, preferring the snapshot file.
+
+    The snapshot is only used if both its version and the time that version
+    was set match, since the version counter starts over when the database
+    is reset or restored.
+
+    Args:
+        version: The current DatasetVersion.
+        updated_at: When the current version was set, looked up if not given.
+
+    Returns:
+        The cube.
+    """
+    path = getattr(settings, "CUBE_SNAPSHOT_PATH", None)
+    if path is None:
+        return StatisticsCube.load(version, updated_at)
+
+    if updated_at is None:
+        updated_at = (
+            DatasetVersion.objects.filter(pk=1)
+            .values_list("updated_at", flat=True)
+            .first()
+        )
+    try:
+        cube = StatisticsCube.from_snapshot(path)
+        if cube.version == version and cube.updated_at == _isoformat(updated_at):
+            return cube
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable statistics cube snapshot {path}: {e}")
+
+    cube = StatisticsCube.load(version, updated_at)
+    try:
+        cube.write_snapshot(path)
+    except OSError as e:
+        logger.warning(f"Could not write statistics cube snapshot {path}: {e}")
+    return cube
+
+
+def clear_cube() -> None:
+    """Drop the cached cube, so the next ``get_cube`` call rebuilds it."""
+    global _cube
+    with _cube_lock:
+        _cube = None
@@ -0,0 +1,153 @@
+"""
+Process-wide registry of the statistics' category dimensions.
+
+The registry maps the names of the age groups, sexes and HDI ratings to their
+ids and back, so that request parameters can be validated and turned into
+foreign key filters without querying the category tables. It is loaded once
+per process and reloaded when the DatasetVersion changes, which imports and
+category changes bump.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from demographics.caching import get_dataset_state
+from demographics.models import AgeGroup, Sex, HDIndex, DatasetVersion
+
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Category models by statistic field
+CATEGORY_MODELS = {"age_group": AgeGroup, "sex": Sex, "hd_index": HDIndex}
+
+
+class DimensionRegistry:
+    """
+    Name and id maps of the category dimensions at one dataset version.
+    """
+
+    def __init__(
+        self, version: int, categories: Dict[str, List[Tuple[int, str, bool]]]
+    ) -> None:
+        """
+        Initialize the registry.
+
+        Args:
+            version: The dataset version the categories were loaded at.
+            categories: (id, name, is_aggregate) tuples ordered by id, by
+                dimension.
+        """
+        self.version = version
+        self._categories = categories
+        self._ids = {
+            dimension: {name: pk for pk, name, _ in rows}
+            for dimension, rows in categories.items()
+        }
+        self._names = {
+            dimension: {pk: name for pk, name, _ in rows}
+            for dimension, rows in categories.items()
+        }
+
+    @classmethod
+    def load(cls, version: Optional[int] = None) -> DimensionRegistry:
+        """
+        Load the categories of every dimension from the database.
+
+        Args:
+            version: The dataset version being loaded, looked up if not given.
+
+        Returns:
+            The loaded registry.
+        """
+        if version is None:
+            version = DatasetVersion.current()
+        categories = {
+            dimension: list(
+                model.objects.order_by("pk").values_list("pk", "name", "is_aggregate")
+            )
+            for dimension, model in CATEGORY_MODELS.items()
+        }
+        logger.info(f"Loaded dimension registry version {version}")
+        return cls(version, categories)
+
+    def id(self, dimension: str, name: str) -> Optional[int]:
+        """
+        Get the id of a category by name.
+
+        Args:
+            dimension: "age_group", "sex" or "hd_index".
+            name: The category name.
+
+        Returns:
+            The id, or None if there is no such category.
+        """
+        return self._ids[dimension].get(name)
+
+    def name(self, dimension: str, pk: int) -> Optional[str]:
+        """
+        Get the name of a category by id.
+
+        Args:
+            dimension: "age_group", "sex" or "hd_index".
+            pk: The category id.
+
+        Returns:
+            The name, or None if there is no such category.
+        """
+        return self._names[dimension].get(pk)
+
+    def categories(self, dimension: str) -> List[Tuple[int, str, bool]]:
+        """
+        Get the categories of a dimension.
+
+        Args:
+            dimension: "age_group", "sex" or "hd_index".
+
+        Returns:
+            (id, name, is_aggregate) tuples ordered by id.
+        """
+        return list(self._categories[dimension])
+
+
+_registry: Optional[DimensionRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_dimensions(request: Any = None) -> DimensionRegistry:
+    """
+    Get the registry of the current dataset, reloading it if the data changed.
+
+    Args:
+        request: The current request. Its dataset version is reused if the
+            view already looked it up (see ``demographics.caching``), so a
+            warm registry costs no query; otherwise the version is read with
+            one primary-key query.
+
+    Returns:
+        The cached registry.
+    """
+    global _registry
+    if request is not None:
+        state = get_dataset_state(request)
+        version = state["version"] if state else 0
+    else:
+        version = DatasetVersion.current()
+
+    registry = _registry
+    if registry is None or registry.version != version:
+        with _registry_lock:
+            if _registry is None or _registry.version != version:
+                _registry = DimensionRegistry.load(version)
+            registry = _registry
+    return registry
+
+
+def clear_dimensions() -> None:
+    """Drop the cached registry, so the next ``get_dimensions`` call reloads it."""
+    global _registry
+    with _registry_lock:
+        _registry = None
@@ -9,7 +9,8 @@ import django_filters
 from django_filters import rest_framework as filters
 from rest_framework.exceptions import ValidationError as DRFValidationError
 
-from demographics.models import DemographicStatistic, AgeGroup, Sex, HDIndex
+from demographics.dimensions import get_dimensions
+from demographics.models import DemographicStatistic
 
 
 class DemographicStatisticFilter(filters.FilterSet):
@@ -18,16 +19,18 @@ class DemographicStatisticFilter(filters.FilterSet):
 
     Allows filtering by year, age_group, sex, and hd_index.
     String-based filtering is used for related fields to make the API
-    more user-friendly.
+    more user-friendly. The names are validated and resolved to ids with the
+    in-memory dimension registry, so the statistics are filtered on their
+    foreign key columns without querying or joining the category tables.
     """
 
     year = django_filters.NumberFilter(field_name="year")
     age_group = django_filters.CharFilter(
-        field_name="age_group__name", method="filter_age_group"
+        field_name="age_group_id", method="filter_age_group"
     )
-    sex = django_filters.CharFilter(field_name="sex__name", method="filter_sex")
+    sex = django_filters.CharFilter(field_name="sex_id", method="filter_sex")
     hd_index = django_filters.CharFilter(
-        field_name="hd_index__name", method="filter_hd_index"
+        field_name="hd_index_id", method="filter_hd_index"
     )
 
     class Meta:
@@ -40,7 +43,7 @@ class DemographicStatisticFilter(filters.FilterSet):
 
         Args:
             queryset: The queryset to filter
-            name: The field name to filter on (age_group__name)
+            name: The field name to filter on (age_group_id)
             value: The value to filter by
 
         Returns:
@@ -49,13 +52,14 @@ class DemographicStatisticFilter(filters.FilterSet):
         Raises:
             ValidationError: If the age group doesn't exist
         """
-        if value and not AgeGroup.objects.filter(name=value).exists():
+        pk = get_dimensions(self.request).id("age_group", value)
+        if value and pk is None:
             raise DRFValidationError(
                 {
                     "error": f"Invalid age_group parameter: '{value}' does not exist. Please provide a valid age group."
                 }
             )
-        return queryset.filter(**{name: value})
+        return queryset.filter(**{name: pk})
 
     def filter_sex(self, queryset, name, value):
         """
@@ -63,7 +67,7 @@ class DemographicStatisticFilter(filters.FilterSet):
 
         Args:
             queryset: The queryset to filter
-            name: The field name to filter on (sex__name)
+            name: The field name to filter on (sex_id)
             value: The value to filter by
 
         Returns:
@@ -72,13 +76,14 @@ class DemographicStatisticFilter(filters.FilterSet):
         Raises:
             ValidationError: If the sex doesn't exist
         """
-        if value and not Sex.objects.filter(name=value).exists():
+        pk = get_dimensions(self.request).id("sex", value)
+        if value and pk is None:
             raise DRFValidationError(
                 {
                     "error": f"Invalid sex parameter: '{value}' does not exist. Please provide a valid sex (Male or Female)."
                 }
             )
-        return queryset.filter(**{name: value})
+        return queryset.filter(**{name: pk})
 
     def filter_hd_index(self, queryset, name, value):
         """
@@ -86,7 +91,7 @@ class DemographicStatisticFilter(filters.FilterSet):
 
         Args:
             queryset: The queryset to filter
-            name: The field name to filter on (hd_index__name)
+            name: The field name to filter on (hd_index_id)
             value: The value to filter by
 
         Returns:
@@ -95,10 +100,11 @@ class DemographicStatisticFilter(filters.FilterSet):
         Raises:
             ValidationError: If the HDI category doesn't exist
         """
-        if value and not HDIndex.objects.filter(name=value).exists():
+        pk = get_dimensions(self.request).id("hd_index", value)
+        if value and pk is None:
             raise DRFValidationError(
                 {
                     "error": f"Invalid hd_index parameter: '{value}' does not exist. Please provide a valid HDI category."
                 }
             )
-        return queryset.filter(**{name: value})
+        return queryset.filter(**{name: pk})
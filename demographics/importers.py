@@ -8,22 +8,181 @@ CSV processing and httpx for URL-based requests.
 
 from __future__ import annotations
 
+import codecs
 import csv
+import hashlib
+import io
 import logging
-import os
-import tempfile
-from typing import Dict, List, Optional, Any, Union
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, pairwise
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Any, Tuple, Union
 from pathlib import Path
 
 import httpx
-from django.db import transaction
+from django.core.exceptions import ValidationError
+from django.db import connection, connections, transaction
 
-from demographics.models import AgeGroup, Sex, HDIndex, DemographicStatistic
+from demographics.cube import write_cube_snapshot
+from demographics.models import (
+    AgeGroup,
+    Sex,
+    HDIndex,
+    DemographicStatistic,
+    DatasetVersion,
+    ImportSource,
+    StatisticRollup,
+)
+from demographics.shadow import ShadowTable
 
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Database connections inherited by a parse worker, kept so they are never closed
+_inherited_connections: List[Any] = []
+
+
+def iter_text_lines(chunks: Iterable[bytes], encoding: str = "utf-8") -> Iterator[str]:
+    """
+    Decode byte chunks incrementally and yield complete lines.
+
+    Multi-byte characters and line endings split across chunk boundaries are
+    handled, so the output can be fed straight to csv.reader.
+
+    Args:
+        chunks: An iterable of raw byte chunks.
+        encoding: The text encoding of the chunks.
+
+    Yields:
+        Lines of text, each including its trailing newline when present.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending = ""
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def detach_inherited_connections() -> None:
+    """
+    Drop the database connections a forked parse worker inherited.
+
+    Runs as the initializer of each worker of the parallel file import. The
+    connections share their sockets with the parent process, and closing them
+    would end the parent's database sessions, so they are set aside unused and
+    a worker that queries the database opens its own connection.
+    """
+    for inherited in connections.all(initialized_only=True):
+        if inherited.connection is not None:
+            _inherited_connections.append(inherited.connection)
+            inherited.connection = None
+
+
+def parse_file_range(
+    file_path: str, start: int, end: int, fieldnames: List[str]
+) -> Tuple[int, int, List[int], List[Tuple[int, Dict[str, Any]]]]:
+    """
+    Parse and validate the CSV rows stored in a byte range of a file.
+
+    This runs in a worker process of the parallel file import. The range must
+    start and end on line boundaries.
+
+    Args:
+        file_path: The path to the CSV file.
+        start: The offset of the first byte of the range.
+        end: The offset just past the last byte of the range.
+        fieldnames: The CSV header of the file.
+
+    Returns:
+        A tuple of the number of rows, the number of skipped rows, the row
+        numbers of invalid rows and (row number, processed row) tuples, with
+        row numbers relative to the start of the range.
+    """
+    importer = DemographicsCSVImporter()
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+
+    result = {"total_rows": 0, "skipped_rows": 0, "error_rows": []}
+    reader = csv.DictReader(io.StringIO(text, newline=""), fieldnames=fieldnames)
+    rows = list(importer._iter_processed_rows(reader, result))
+    return result["total_rows"], result["skipped_rows"], result["error_rows"], rows
+
+
+class DimensionCache:
+    """
+    In-memory name -> id map of the dimension tables used during an import.
+
+    All existing dimension rows are loaded with one query per table the first
+    time they are needed. Names that are not known yet are created in one batch
+    per table and added to the map, so every later row resolves from memory.
+    """
+
+    def __init__(self, dimensions: Iterable[Tuple[str, Any, str]]) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            dimensions: (field, model, aggregate category name) tuples.
+        """
+        self.dimensions = tuple(dimensions)
+        self.ids: Optional[Dict[str, Dict[str, int]]] = None
+        self.hits = 0
+        self.misses = 0
+
+    def load(self) -> None:
+        """Load every dimension row into memory."""
+        self.ids = {
+            field: dict(model.objects.values_list("name", "id"))
+            for field, model, _ in self.dimensions
+        }
+
+    def resolve(self, rows: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+        """
+        Make sure every dimension name used by the rows has an id.
+
+        Args:
+            rows: A list of processed rows.
+
+        Returns:
+            A dictionary mapping each dimension field to a name -> id mapping.
+        """
+        if self.ids is None:
+            self.load()
+
+        for field, model, aggregate_name in self.dimensions:
+            ids = self.ids[field]
+            missing = set()
+            for processed in rows:
+                name = processed[field]
+                if name in ids or name in missing:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                    missing.add(name)
+
+            if missing:
+                model.objects.bulk_create(
+                    [
+                        model(name=name, is_aggregate=name == aggregate_name)
+                        for name in missing
+                    ],
+                    ignore_conflicts=True,
+                )
+                ids.update(
+                    model.objects.filter(name__in=missing).values_list("name", "id")
+                )
+
+        return self.ids
+
 
 class DemographicsCSVImporter:
     """
@@ -32,8 +191,44 @@ class DemographicsCSVImporter:
     This class handles importing demographic data from CSV files, either from
     a local file or from a URL. It validates the data, skips aggregated rows,
     and saves the data to the database.
+
+    Two write engines are available:
+    - "bulk" (default): resolves dimensions once, validates rows in memory and
+      upserts statistics with batched ``bulk_create(update_conflicts=True)``.
+    - "copy": PostgreSQL only, loads rows with ``COPY`` into an unlogged staging
+      table and merges them with one ``INSERT ... ON CONFLICT`` statement. Other
+      databases fall back to the bulk engine.
+    - "orm": the original row-by-row ``get_or_create``/``update_or_create`` path.
+
+    Rows are consumed lazily and written in chunks of ``chunk_size`` valid rows,
+    each chunk in its own transaction, so memory stays flat regardless of the
+    input size.
+
+    With ``replace=True`` the import replaces the whole dataset: rows are loaded
+    into a shadow table while the live table keeps serving reads, and the
+    shadow table is swapped in atomically once it is indexed and its row count
+    is validated.
     """
 
+    # Available write engines
+    ENGINES = ("bulk", "copy", "orm")
+
+    # Target size of the byte ranges parsed by each worker of a parallel import
+    PARSE_CHUNK_BYTES = 1024 * 1024
+
+    # Unlogged table the copy engine loads rows into before merging them
+    STAGING_TABLE = "demographics_demographicstatistic_staging"
+
+    # Dimension fields, their models and the name of their aggregate category
+    DIMENSIONS = (
+        ("age_group", AgeGroup, "All ages"),
+        ("sex", Sex, "Both sexes"),
+        ("hd_index", HDIndex, "Human Development Index (HDI) - All ratings"),
+    )
+
+    # Natural key of a statistic, matching the unique_demographic_statistic constraint
+    UNIQUE_FIELDS = ["year", "age_group", "sex", "hd_index"]
+
     # The aggregated values that should be skipped
     AGGREGATED_VALUES = {
         "Age Group": ["All ages"],
@@ -56,6 +251,82 @@ class DemographicsCSVImporter:
         "50": "Very High Human Development Index (HDI)",
     }
 
+    def __init__(
+        self,
+        engine: str = "bulk",
+        batch_size: int = 1000,
+        chunk_size: int = 5000,
+        read_chunk_size: int = 64 * 1024,
+        timeout: float = 30.0,
+        workers: int = 1,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        replace: bool = False,
+        min_replace_ratio: float = 0.5,
+    ) -> None:
+        """
+        Initialize the importer.
+
+        Args:
+            engine: The write engine to use, one of ENGINES.
+            batch_size: Number of statistics written per bulk statement.
+            chunk_size: Number of rows written per transaction.
+            read_chunk_size: Number of bytes read per chunk when downloading.
+            timeout: Timeout in seconds for connecting to and reading from a URL.
+            workers: Number of processes parsing local files. With more than
+                one, files are split into line-aligned byte ranges that are
+                parsed in parallel while this process writes to the database.
+                Platforms without the "fork" start method, such as Windows,
+                parse sequentially.
+            progress_callback: Called with the partial import result after
+                each chunk is written.
+            replace: Replace the whole dataset through a shadow table instead
+                of updating the live table in place.
+            min_replace_ratio: The smallest fraction of the live row count the
+                new dataset may have before a replace is refused.
+
+        Raises:
+            ValueError: If the engine is unknown, a size is not positive or the
+                replace options are invalid.
+        """
+        if engine not in self.ENGINES:
+            raise ValueError(
+                f"Unknown import engine: {engine}. Choose one of: {', '.join(self.ENGINES)}"
+            )
+        if batch_size < 1:
+            raise ValueError("Batch size must be a positive integer")
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be a positive integer")
+        if read_chunk_size < 1:
+            raise ValueError("Read chunk size must be a positive integer")
+        if workers < 1:
+            raise ValueError("Workers must be a positive integer")
+        if replace and engine == "orm":
+            raise ValueError("The orm engine cannot replace the dataset")
+        if not 0 <= min_replace_ratio <= 1:
+            raise ValueError("Minimum replace ratio must be between 0 and 1")
+        self.engine = engine
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.read_chunk_size = read_chunk_size
+        self.timeout = timeout
+        self.workers = workers
+        self.progress_callback = progress_callback
+        self.replace = replace
+        self.min_replace_ratio = min_replace_ratio
+        self.dimension_cache = DimensionCache(self.DIMENSIONS)
+        self.shadow_table: Optional[ShadowTable] = None
+
+    @property
+    def effective_engine(self) -> str:
+        """
+        The engine actually used for writes on the current database.
+
+        The copy engine falls back to bulk upserts outside PostgreSQL.
+        """
+        if self.engine == "copy" and connection.vendor != "postgresql":
+            return "bulk"
+        return self.engine
+
     def skip_aggregated_row(self, row: Dict[str, str]) -> bool:
         """
         Check if a row contains aggregated values that should be skipped.
@@ -128,84 +399,557 @@ class DemographicsCSVImporter:
             logger.exception(f"Error processing row: {e}")
             return None
 
-    @transaction.atomic
-    def import_data(self, data: List[Dict[str, str]]) -> Dict[str, Any]:
+    def validate_row(self, processed: Dict[str, Any]) -> bool:
+        """
+        Validate a processed row in memory against the model field rules.
+
+        This performs the same field checks that ``full_clean()`` would run on
+        save, without touching the database.
+
+        Args:
+            processed: A dictionary returned by process_row.
+
+        Returns:
+            True if the row is valid, False otherwise.
+        """
+        try:
+            for field in ("year", "value"):
+                DemographicStatistic._meta.get_field(field).clean(
+                    processed[field], None
+                )
+            for field, model, _ in self.DIMENSIONS:
+                model._meta.get_field("name").clean(processed[field], None)
+        except ValidationError as e:
+            logger.warning(f"Invalid row {processed}: {e}")
+            return False
+        return True
+
+    def import_data(
+        self,
+        data: Iterable[Dict[str, str]],
+        unchanged: Optional[Callable[[], bool]] = None,
+    ) -> Dict[str, Any]:
         """
-        Import data from a list of CSV rows.
+        Import data from an iterable of CSV rows.
 
         This method processes each row, skips aggregated rows, and saves
-        the data to the database.
+        the data to the database using the configured engine. Rows are pulled
+        lazily and written in chunks, one transaction per chunk.
+
+        Args:
+            data: An iterable of dictionaries, each representing a row from the CSV.
+            unchanged: Called once all rows are read; returns True if the input
+                is identical to the previously imported one.
+
+        Returns:
+            A dictionary with import statistics.
+        """
+        return self._import_processed(
+            lambda result: self._iter_processed_rows(data, result), unchanged
+        )
+
+    def _import_processed(
+        self,
+        iter_rows: Callable[[Dict[str, Any]], Iterator[Tuple[int, Dict[str, Any]]]],
+        unchanged: Optional[Callable[[], bool]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Write processed rows in chunks and collect the import statistics.
+
+        If ``unchanged`` reports an input identical to the previous import and
+        no rows were written, the result is marked as unchanged and a replace
+        keeps the live table instead of swapping in the shadow table.
 
         Args:
-            data: A list of dictionaries, each representing a row from the CSV.
+            iter_rows: A callable that receives the result dictionary, updates
+                its row counters and yields (row number, processed row) tuples.
+            unchanged: Called once all rows are read; returns True if the input
+                is identical to the previously imported one.
 
         Returns:
             A dictionary with import statistics.
         """
-        total_rows = len(data)
-        skipped_rows = 0
-        imported_rows = 0
-        error_rows = []
+        start_time = time.perf_counter()
+        self.dimension_cache = DimensionCache(self.DIMENSIONS)
+        result = {
+            "success": True,
+            "engine": self.effective_engine,
+            "total_rows": 0,
+            "skipped_rows": 0,
+            "imported_rows": 0,
+            "inserted_rows": 0,
+            "updated_rows": 0,
+            "unchanged_rows": 0,
+            "error_rows": [],
+            "write_duration": 0.0,
+        }
+
+        if self.replace:
+            self.shadow_table = ShadowTable(DemographicStatistic)
+            self.shadow_table.create()
+
+        try:
+            rows = iter_rows(result)
+            while True:
+                chunk = list(islice(rows, self.chunk_size))
+                if not chunk:
+                    break
+                write_start = time.perf_counter()
+                written_rows = result["inserted_rows"] + result["updated_rows"]
+                with transaction.atomic():
+                    self._save_rows(chunk, result)
+                    if result["inserted_rows"] + result["updated_rows"] > written_rows:
+                        DatasetVersion.bump()
+                result["write_duration"] += time.perf_counter() - write_start
+                if self.progress_callback is not None:
+                    self.progress_callback(result)
+
+            written = result["inserted_rows"] or result["updated_rows"]
+            if not written and unchanged is not None and unchanged():
+                result["unchanged"] = True
+            elif self.shadow_table is not None:
+                write_start = time.perf_counter()
+                self._swap_shadow_table(result)
+                result["write_duration"] += time.perf_counter() - write_start
+        finally:
+            if self.shadow_table is not None:
+                self.shadow_table.drop()
+                self.shadow_table = None
+
+        if result["success"] and (result["inserted_rows"] or result["updated_rows"]):
+            self._write_cube_snapshot()
+
+        duration = time.perf_counter() - start_time
+        result["error_rows"].sort()
+        result["dimension_cache_hits"] = self.dimension_cache.hits
+        result["dimension_cache_misses"] = self.dimension_cache.misses
+        result["duration"] = duration
+        result["rows_per_second"] = (
+            result["total_rows"] / duration if duration > 0 else 0.0
+        )
+        return result
+
+    def _iter_processed_rows(
+        self, data: Iterable[Dict[str, str]], result: Dict[str, Any]
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Parse raw CSV rows lazily, updating the row counters in the result.
 
-        # Process each row
-        for i, row in enumerate(data):
-            row_num = i + 1  # 1-indexed for error reporting
+        Args:
+            data: An iterable of raw CSV rows.
+            result: The import result whose counters are updated.
+
+        Yields:
+            (row number, processed row) tuples for rows that should be saved.
+        """
+        for row_num, row in enumerate(data, start=1):  # 1-indexed for error reporting
+            result["total_rows"] += 1
 
             # Skip aggregated rows
             if self.skip_aggregated_row(row):
-                skipped_rows += 1
+                result["skipped_rows"] += 1
                 continue
 
             # Process the row
             processed = self.process_row(row)
             if processed is None:
-                error_rows.append(row_num)
+                result["error_rows"].append(row_num)
                 continue
 
-            try:
-                # Get or create age group
-                age_group, _ = AgeGroup.objects.get_or_create(
-                    name=processed["age_group"],
-                    defaults={"is_aggregate": processed["age_group"] == "All ages"},
-                )
+            yield row_num, processed
 
-                # Get or create sex
-                sex, _ = Sex.objects.get_or_create(
-                    name=processed["sex"],
-                    defaults={"is_aggregate": processed["sex"] == "Both sexes"},
-                )
+    @staticmethod
+    def parallel_parsing_supported() -> bool:
+        """
+        Check whether local files can be parsed in a process pool.
+
+        The workers are forked so they inherit the configured Django app
+        registry, which needs the "fork" start method.
+
+        Returns:
+            True if processes can be forked on this platform.
+        """
+        return "fork" in multiprocessing.get_all_start_methods()
+
+    def _iter_processed_rows_parallel(
+        self, file_path: Path, result: Dict[str, Any]
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Parse a local file in a process pool, updating the row counters in the result.
+
+        The file is split into byte ranges aligned to line boundaries. Ranges
+        are parsed by the workers and consumed in file order, with at most two
+        ranges per worker in flight, so row numbers match a sequential import
+        and memory stays bounded. Quoted fields must not contain line breaks.
+
+        Args:
+            file_path: The path to the CSV file.
+            result: The import result whose counters are updated.
+
+        Yields:
+            (row number, processed row) tuples for rows that should be saved.
+        """
+        with open(file_path, "rb") as f:
+            header = f.readline()
+            fieldnames = next(csv.reader([header.decode("utf-8-sig")]), [])
+            file_size = f.seek(0, io.SEEK_END)
+
+            boundaries = [len(header)]
+            while boundaries[-1] < file_size:
+                f.seek(boundaries[-1] + self.PARSE_CHUNK_BYTES)
+                f.readline()  # Move to the start of the next line
+                boundaries.append(min(f.tell(), file_size))
 
-                # Get or create HDI
-                hd_index, _ = HDIndex.objects.get_or_create(
-                    name=processed["hd_index"],
-                    defaults={
-                        "is_aggregate": processed["hd_index"]
-                        == "Human Development Index (HDI) - All ratings"
-                    },
+        ranges = pairwise(boundaries)
+        # Workers are forked so they inherit the configured Django app registry,
+        # and drop the parent's database connections they inherit with it
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=detach_inherited_connections,
+        ) as executor:
+            pending = deque(
+                executor.submit(
+                    parse_file_range, str(file_path), start, end, fieldnames
                 )
+                for start, end in islice(ranges, 2 * self.workers)
+            )
+            offset = 0
+            while pending:
+                total_rows, skipped_rows, error_rows, rows = pending.popleft().result()
+                next_range = next(ranges, None)
+                if next_range is not None:
+                    pending.append(
+                        executor.submit(
+                            parse_file_range, str(file_path), *next_range, fieldnames
+                        )
+                    )
+
+                result["total_rows"] += total_rows
+                result["skipped_rows"] += skipped_rows
+                result["error_rows"].extend(offset + row_num for row_num in error_rows)
+                for row_num, processed in rows:
+                    yield offset + row_num, processed
+                offset += total_rows
+
+    def _save_rows(
+        self, rows: List[Tuple[int, Dict[str, Any]]], result: Dict[str, Any]
+    ) -> None:
+        """
+        Save a chunk of processed rows with the configured engine.
+
+        The bulk and copy engines compare the rows against the stored data
+        first and only write inserted or changed statistics, then refresh the
+        rollups of those statistics. The orm engine saves through the model,
+        which refreshes them row by row.
+
+        Args:
+            rows: A list of (row number, processed row) tuples.
+            result: The import result whose counters are updated.
+        """
+        if self.engine == "orm":
+            self._save_rows_orm(rows, result)
+            return
+
+        statistics, imported_rows = self._build_statistics(rows, result["error_rows"])
+        result["imported_rows"] += imported_rows
+
+        if self.shadow_table is not None:
+            # Everything goes to the shadow table, which starts out empty
+            if statistics:
+                if self.effective_engine == "copy":
+                    self._upsert_copy(statistics, self.shadow_table.name)
+                else:
+                    self._upsert_sql(statistics, self.shadow_table.name)
+            return
+
+        changed = self._detect_changes(statistics, result)
+        if changed:
+            if self.effective_engine == "copy":
+                self._upsert_copy(changed)
+            else:
+                self._upsert_bulk(changed)
+            # Bulk writes bypass the model, so the rollups are refreshed here
+            StatisticRollup.refresh(changed)
+
+    def _detect_changes(
+        self, statistics: Dict[Tuple[int, int, int, int], int], result: Dict[str, Any]
+    ) -> Dict[Tuple[int, int, int, int], int]:
+        """
+        Compare statistics with the stored data and keep the ones to write.
+
+        A row's fingerprint is its natural key (year, age_group, sex, hd_index)
+        plus its value. The stored fingerprints of the chunk are fetched with a
+        single query and compared in memory.
+
+        Args:
+            statistics: A (year, age_group_id, sex_id, hd_index_id) -> value mapping.
+            result: The import result whose inserted, updated and unchanged
+                counters are updated.
+
+        Returns:
+            The subset of statistics that is new or has a different value.
+        """
+        if not statistics:
+            return {}
+
+        years, age_group_ids, sex_ids, hd_index_ids = map(set, zip(*statistics))
+        stored = {
+            (year, age_group_id, sex_id, hd_index_id): value
+            for year, age_group_id, sex_id, hd_index_id, value in (
+                DemographicStatistic.objects.filter(
+                    year__in=years,
+                    age_group_id__in=age_group_ids,
+                    sex_id__in=sex_ids,
+                    hd_index_id__in=hd_index_ids,
+                ).values_list("year", "age_group_id", "sex_id", "hd_index_id", "value")
+            )
+        }
+
+        changed = {}
+        for key, value in statistics.items():
+            stored_value = stored.get(key)
+            if stored_value is None:
+                result["inserted_rows"] += 1
+                changed[key] = value
+            elif stored_value != value:
+                result["updated_rows"] += 1
+                changed[key] = value
+            else:
+                result["unchanged_rows"] += 1
+        return changed
+
+    def _save_rows_orm(
+        self, rows: List[Tuple[int, Dict[str, Any]]], result: Dict[str, Any]
+    ) -> None:
+        """
+        Save processed rows one by one through the ORM.
+
+        Args:
+            rows: A list of (row number, processed row) tuples.
+            result: The import result whose counters are updated.
+        """
+        for row_num, processed in rows:
+            try:
+                # Resolve the dimensions from the cache, creating missing ones
+                dimension_ids = self.dimension_cache.resolve([processed])
 
                 # Create demographic statistic
-                DemographicStatistic.objects.update_or_create(
+                _, created = DemographicStatistic.objects.update_or_create(
                     year=processed["year"],
-                    age_group=age_group,
-                    sex=sex,
-                    hd_index=hd_index,
+                    age_group_id=dimension_ids["age_group"][processed["age_group"]],
+                    sex_id=dimension_ids["sex"][processed["sex"]],
+                    hd_index_id=dimension_ids["hd_index"][processed["hd_index"]],
                     defaults={"value": processed["value"]},
                 )
 
-                imported_rows += 1
+                result["imported_rows"] += 1
+                result["inserted_rows" if created else "updated_rows"] += 1
 
             except Exception as e:
                 logger.exception(f"Error saving row {row_num}: {e}")
+                result["error_rows"].append(row_num)
+
+    def _build_statistics(
+        self, rows: List[Tuple[int, Dict[str, Any]]], error_rows: List[int]
+    ) -> Tuple[Dict[Tuple[int, int, int, int], int], int]:
+        """
+        Validate processed rows and map them to statistic keys.
+
+        Rows are validated in memory and dimensions are resolved from the
+        dimension cache. When the same key appears more than once, the last row
+        wins, as it would with update_or_create.
+
+        Args:
+            rows: A list of (row number, processed row) tuples.
+            error_rows: A list collecting the numbers of rows that failed.
+
+        Returns:
+            A tuple of a (year, age_group_id, sex_id, hd_index_id) -> value
+            mapping and the number of valid rows.
+        """
+        valid_rows = []
+        for row_num, processed in rows:
+            if self.validate_row(processed):
+                valid_rows.append(processed)
+            else:
                 error_rows.append(row_num)
 
-        return {
-            "success": True,
-            "total_rows": total_rows,
-            "skipped_rows": skipped_rows,
-            "imported_rows": imported_rows,
-            "error_rows": error_rows,
-        }
+        if not valid_rows:
+            return {}, 0
+
+        dimension_ids = self.dimension_cache.resolve(valid_rows)
+
+        statistics = {}
+        for processed in valid_rows:
+            key = (
+                processed["year"],
+                dimension_ids["age_group"][processed["age_group"]],
+                dimension_ids["sex"][processed["sex"]],
+                dimension_ids["hd_index"][processed["hd_index"]],
+            )
+            statistics[key] = processed["value"]
+
+        return statistics, len(valid_rows)
+
+    def _upsert_bulk(self, statistics: Dict[Tuple[int, int, int, int], int]) -> None:
+        """
+        Upsert statistics in batches keyed on the unique_demographic_statistic constraint.
+
+        Args:
+            statistics: A (year, age_group_id, sex_id, hd_index_id) -> value mapping.
+        """
+        DemographicStatistic.objects.bulk_create(
+            [
+                DemographicStatistic(
+                    year=key[0],
+                    age_group_id=key[1],
+                    sex_id=key[2],
+                    hd_index_id=key[3],
+                    value=value,
+                )
+                for key, value in statistics.items()
+            ],
+            batch_size=self.batch_size,
+            update_conflicts=True,
+            unique_fields=self.UNIQUE_FIELDS,
+            update_fields=["value"],
+        )
+
+    def _upsert_sql(
+        self, statistics: Dict[Tuple[int, int, int, int], int], table: str
+    ) -> None:
+        """
+        Upsert statistics into a table with an INSERT ... ON CONFLICT statement.
+
+        Used to load shadow tables, which have no model to bulk_create into.
+
+        Args:
+            statistics: A (year, age_group_id, sex_id, hd_index_id) -> value mapping.
+            table: The name of the table to write to.
+        """
+        quote = connection.ops.quote_name
+        columns = self._statistic_columns()
+        column_list = ", ".join(quote(column) for column in columns)
+        key_list = ", ".join(quote(column) for column in columns[:-1])
+        placeholders = ", ".join(["%s"] * len(columns))
+
+        items = [(*key, value) for key, value in statistics.items()]
+        with connection.cursor() as cursor:
+            for start in range(0, len(items), self.batch_size):
+                cursor.executemany(
+                    f"INSERT INTO {quote(table)} ({column_list}) "
+                    f"VALUES ({placeholders}) "
+                    f"ON CONFLICT ({key_list}) "
+                    f"DO UPDATE SET {quote(columns[4])} = EXCLUDED.{quote(columns[4])}",
+                    items[start : start + self.batch_size],
+                )
+
+    def _upsert_copy(
+        self,
+        statistics: Dict[Tuple[int, int, int, int], int],
+        table: Optional[str] = None,
+    ) -> None:
+        """
+        Upsert statistics with PostgreSQL COPY and a single merge statement.
+
+        The rows are copied into an unlogged staging table and merged into the
+        statistics table with one INSERT ... ON CONFLICT statement.
+
+        Args:
+            statistics: A (year, age_group_id, sex_id, hd_index_id) -> value mapping.
+            table: The name of the table to merge into, the statistics table
+                by default.
+        """
+        quote = connection.ops.quote_name
+        staging_table = quote(self.STAGING_TABLE)
+        target_table = quote(table or DemographicStatistic._meta.db_table)
+        columns = self._statistic_columns()
+        column_list = ", ".join(quote(column) for column in columns)
+        key_list = ", ".join(quote(column) for column in columns[:-1])
+
+        buffer = io.StringIO()
+        for key, value in statistics.items():
+            buffer.write("\t".join(map(str, (*key, value))))
+            buffer.write("\n")
+        buffer.seek(0)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE UNLOGGED TABLE IF NOT EXISTS {staging_table} ("
+                f"{quote(columns[0])} integer NOT NULL, "
+                f"{quote(columns[1])} bigint NOT NULL, "
+                f"{quote(columns[2])} bigint NOT NULL, "
+                f"{quote(columns[3])} bigint NOT NULL, "
+                f"{quote(columns[4])} integer NOT NULL)"
+            )
+            # TRUNCATE locks the staging table, serializing concurrent imports
+            cursor.execute(f"TRUNCATE {staging_table}")
+            cursor.copy_expert(
+                f"COPY {staging_table} ({column_list}) FROM STDIN", buffer
+            )
+            cursor.execute(
+                f"INSERT INTO {target_table} ({column_list}) "
+                f"SELECT {column_list} FROM {staging_table} "
+                f"ON CONFLICT ({key_list}) "
+                f"DO UPDATE SET {quote(columns[4])} = EXCLUDED.{quote(columns[4])}"
+            )
+
+    @staticmethod
+    def _write_cube_snapshot() -> None:
+        """
+        Write the statistics cube snapshot shared by the web processes.
+
+        The snapshot is a cache, so failures are logged and do not fail the
+        import; processes then build the cube from the database.
+        """
+        try:
+            write_cube_snapshot()
+        except Exception as e:
+            logger.exception(f"Error writing the statistics cube snapshot: {e}")
+
+    def _statistic_columns(self) -> List[str]:
+        """Return the key columns of the statistics table followed by the value column."""
+        return [
+            DemographicStatistic._meta.get_field(field).column
+            for field in self.UNIQUE_FIELDS + ["value"]
+        ]
+
+    def _swap_shadow_table(self, result: Dict[str, Any]) -> None:
+        """
+        Validate the loaded shadow table and swap it in for the live table.
+
+        The swap is refused, leaving the live table untouched, when the shadow
+        table is empty or has fewer than ``min_replace_ratio`` times the live
+        row count.
+
+        Args:
+            result: The import result, updated with the replaced row counts
+                or marked as failed.
+        """
+        self.shadow_table.finalize()
+        new_rows = self.shadow_table.count()
+        previous_rows = DemographicStatistic.objects.count()
+        result["previous_rows"] = previous_rows
+        result["inserted_rows"] = new_rows
+
+        if new_rows == 0 or new_rows < previous_rows * self.min_replace_ratio:
+            result["success"] = False
+            result["error"] = (
+                f"Refusing to replace {previous_rows} statistics with {new_rows}; "
+                f"the minimum replace ratio is {self.min_replace_ratio}"
+            )
+            logger.warning(result["error"])
+            return
+
+        # The rollups are computed from the shadow table before the swap, so
+        # the lock on the live table is only held while it is swapped
+        rollups = StatisticRollup.compute_all(self.shadow_table)
+        with transaction.atomic():
+            self.shadow_table.swap()
+            StatisticRollup.replace_all(rollups)
+            DatasetVersion.bump()
+        result["replaced"] = True
 
     def import_from_file(self, file_path: Union[str, Path]) -> Dict[str, Any]:
         """
@@ -226,52 +970,167 @@ class DemographicsCSVImporter:
             if not file_path.exists():
                 return {"success": False, "error": f"File not found: {file_path}"}
 
-            # Read the file directly with Python's CSV reader
-            with open(file_path, "r") as f:
-                reader = csv.DictReader(f)
-                data = list(reader)
+            if self.workers > 1 and self.parallel_parsing_supported():
+                return self._import_processed(
+                    lambda result: self._iter_processed_rows_parallel(file_path, result)
+                )
 
-            # Import the data
-            return self.import_data(data)
+            # Stream the rows straight from Python's CSV reader
+            with open(file_path, "r", encoding="utf-8-sig", newline="") as f:
+                return self.import_data(csv.DictReader(f))
         except Exception as e:
             logger.exception(f"Error importing from file: {e}")
             return {"success": False, "error": str(e)}
 
-    def import_from_url(self, url: str) -> Dict[str, Any]:
+    def import_from_url(self, url: str, force: bool = False) -> Dict[str, Any]:
         """
         Import data from a URL pointing to a CSV file.
 
+        The request is conditional on the ETag and Last-Modified values stored
+        for the URL by the previous import, and a 304 response skips both the
+        download and the database work. If the server answers 200, the body's
+        checksum is compared with the stored one before any rows are written.
+
+        The response body is streamed and decoded incrementally into the CSV
+        row pipeline and hashed on the way, so memory use stays bounded by the
+        read chunk size. A body identical to the stored checksum is still
+        parsed, but the change detection writes no rows and a replace keeps
+        the live table.
+
         Args:
             url: The URL of the CSV file.
+            force: Import even if the source has not changed.
 
         Returns:
-            A dictionary with import statistics.
+            A dictionary with import statistics, including download throughput.
         """
         try:
-            # Get the CSV content from the URL
-            response = httpx.get(url)
+            start_time = time.perf_counter()
+            source = None if force else ImportSource.objects.filter(url=url).first()
+            headers = source.conditional_headers() if source else {}
 
-            # Check if the request was successful
-            if response.status_code != 200:
-                return {
-                    "success": False,
-                    "error": f"Failed to fetch CSV from URL: HTTP {response.status_code}",
-                }
+            # Stream the CSV content from the URL
+            with httpx.stream(
+                "GET",
+                url,
+                headers=headers,
+                timeout=self.timeout,
+                follow_redirects=True,
+            ) as response:
+                if response.status_code == 304:
+                    return self._unchanged_result(url, response, start_time)
 
-            # Write response content to a temporary file
-            with tempfile.NamedTemporaryFile(
-                mode="w+", delete=False, suffix=".csv"
-            ) as temp_file:
-                temp_file.write(response.text)
-                temp_path = temp_file.name
+                # Check if the request was successful
+                if response.status_code != 200:
+                    return {
+                        "success": False,
+                        "error": f"Failed to fetch CSV from URL: HTTP {response.status_code}",
+                    }
 
-            # Import from the temporary file
-            result = self.import_from_file(temp_path)
-
-            # Clean up
-            os.unlink(temp_path)
+                stored_checksum = source.checksum if source else ""
+                checksum = hashlib.sha256()
+                chunks = self._iter_hashed(
+                    response.iter_bytes(chunk_size=self.read_chunk_size), checksum
+                )
+                lines = iter_text_lines(chunks, response.encoding or "utf-8")
+                result = self.import_data(
+                    csv.DictReader(lines),
+                    unchanged=lambda: checksum.hexdigest() == stored_checksum,
+                )
+                bytes_downloaded = response.num_bytes_downloaded
+                if result.get("unchanged"):
+                    self._touch_source(url, response)
+                    result["not_modified"] = False
+                    result["check_duration"] = time.perf_counter() - start_time
+                # A failed or refused import must be retried on the next run
+                elif result.get("success"):
+                    self._save_source(url, response, checksum.hexdigest())
 
+            duration = time.perf_counter() - start_time
+            result["bytes_downloaded"] = bytes_downloaded
+            result["bytes_per_second"] = (
+                bytes_downloaded / duration if duration > 0 else 0.0
+            )
             return result
         except Exception as e:
             logger.exception(f"Error importing from URL: {e}")
             return {"success": False, "error": str(e)}
+
+    @staticmethod
+    def _iter_hashed(chunks: Iterable[bytes], checksum: Any) -> Iterator[bytes]:
+        """
+        Pass byte chunks through while feeding them to a hash object.
+
+        Args:
+            chunks: An iterable of raw byte chunks.
+            checksum: A hashlib hash object.
+
+        Yields:
+            The unchanged byte chunks.
+        """
+        for chunk in chunks:
+            checksum.update(chunk)
+            yield chunk
+
+    @staticmethod
+    def _save_source(url: str, response: httpx.Response, checksum: str) -> None:
+        """
+        Store the validators and checksum of a successfully fetched source.
+
+        Args:
+            url: The URL of the source.
+            response: The HTTP response of the source.
+            checksum: The SHA-256 hex digest of the response body.
+        """
+        ImportSource.objects.update_or_create(
+            url=url,
+            defaults={
+                "etag": response.headers.get("ETag", ""),
+                "last_modified": response.headers.get("Last-Modified", ""),
+                "checksum": checksum,
+            },
+        )
+
+    @staticmethod
+    def _touch_source(url: str, response: httpx.Response) -> None:
+        """
+        Record a check of an unchanged source, so checked_at reflects it.
+
+        Args:
+            url: The URL of the source.
+            response: The HTTP response of the source.
+        """
+        source = ImportSource.objects.get(url=url)
+        source.etag = response.headers.get("ETag", source.etag)
+        source.last_modified = response.headers.get(
+            "Last-Modified", source.last_modified
+        )
+        source.save()
+
+    @staticmethod
+    def _unchanged_result(
+        url: str, response: httpx.Response, start_time: float
+    ) -> Dict[str, Any]:
+        """
+        Build the result of an import skipped with 304 Not Modified.
+
+        Args:
+            url: The URL of the source.
+            response: The HTTP response of the source.
+            start_time: The perf_counter value when the check started.
+
+        Returns:
+            A dictionary with import statistics.
+        """
+        DemographicsCSVImporter._touch_source(url, response)
+
+        return {
+            "success": True,
+            "unchanged": True,
+            "not_modified": True,
+            "total_rows": 0,
+            "skipped_rows": 0,
+            "imported_rows": 0,
+            "error_rows": [],
+            "check_duration": time.perf_counter() - start_time,
+        }
@@ -0,0 +1,157 @@
+"""
+Background import jobs for demographic statistics.
+
+This module queues imports as ImportJob rows and runs them outside the
+request/response cycle. Jobs are executed by the ``run_import_worker``
+management command, which polls the database, so no external broker is needed.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from demographics.importers import DemographicsCSVImporter
+from demographics.models import ImportJob
+
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def enqueue_file_import(chunks: Iterable[bytes], name: str) -> ImportJob:
+    """
+    Store an uploaded CSV file and queue a job importing it.
+
+    The file is written to IMPORT_UPLOAD_DIR so the worker process can read it.
+
+    Args:
+        chunks: The byte chunks of the uploaded file.
+        name: The original file name, used for display.
+
+    Returns:
+        The queued job.
+    """
+    upload_dir = Path(settings.IMPORT_UPLOAD_DIR)
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    file_path = upload_dir / f"{uuid.uuid4().hex}.csv"
+    with open(file_path, "wb") as f:
+        f.writelines(chunks)
+
+    return ImportJob.objects.create(
+        source_type=ImportJob.SourceType.FILE, source=str(file_path), name=name
+    )
+
+
+def enqueue_url_import(url: str) -> ImportJob:
+    """
+    Queue a job importing a CSV file from a URL.
+
+    Args:
+        url: The URL of the CSV file.
+
+    Returns:
+        The queued job.
+    """
+    return ImportJob.objects.create(
+        source_type=ImportJob.SourceType.URL, source=url, name=url
+    )
+
+
+def run_import_job(job: ImportJob) -> ImportJob:
+    """
+    Run a claimed import job and record its progress and outcome.
+
+    Args:
+        job: A job in the running state.
+
+    Returns:
+        The finished job.
+    """
+    start_time = time.perf_counter()
+
+    def report_progress(result: Dict[str, Any]) -> None:
+        elapsed = time.perf_counter() - start_time
+        ImportJob.objects.filter(pk=job.pk).update(
+            phase="importing",
+            rows_processed=result["total_rows"],
+            rows_per_second=result["total_rows"] / elapsed if elapsed > 0 else 0.0,
+            heartbeat_at=timezone.now(),
+        )
+
+    importer = DemographicsCSVImporter(progress_callback=report_progress)
+    try:
+        ImportJob.objects.filter(pk=job.pk).update(
+            phase="downloading"
+            if job.source_type == ImportJob.SourceType.URL
+            else "reading",
+            heartbeat_at=timezone.now(),
+        )
+        with _heartbeat(job):
+            if job.source_type == ImportJob.SourceType.URL:
+                result = importer.import_from_url(job.source)
+            else:
+                result = importer.import_from_file(job.source)
+    except Exception as e:
+        logger.exception(f"Error running import job {job.pk}: {e}")
+        result = {"success": False, "error": str(e)}
+    finally:
+        if job.source_type == ImportJob.SourceType.FILE:
+            Path(job.source).unlink(missing_ok=True)
+
+    job.refresh_from_db()
+    job.status = (
+        ImportJob.Status.SUCCEEDED if result.get("success") else ImportJob.Status.FAILED
+    )
+    job.phase = "finished"
+    job.result = result
+    job.error = result.get("error", "")
+    job.rows_processed = result.get("total_rows", job.rows_processed)
+    job.rows_per_second = result.get("rows_per_second", job.rows_per_second)
+    job.finished_at = timezone.now()
+    job.save()
+    return job
+
+
+@contextmanager
+def _heartbeat(job: ImportJob) -> Iterator[None]:
+    """
+    Touch a job's heartbeat every IMPORT_JOB_HEARTBEAT_SECONDS while it runs.
+
+    The heartbeat is sent from a thread, so phases that report no progress
+    (downloads, index builds, table swaps) keep the job from being failed by
+    ``ImportJob.fail_stale``.
+
+    Args:
+        job: The running job.
+    """
+    interval = getattr(settings, "IMPORT_JOB_HEARTBEAT_SECONDS", 30)
+    stop = threading.Event()
+
+    def beat() -> None:
+        try:
+            while not stop.wait(interval):
+                ImportJob.objects.filter(
+                    pk=job.pk, status=ImportJob.Status.RUNNING
+                ).update(heartbeat_at=timezone.now())
+        finally:
+            connection.close()
+
+    thread = threading.Thread(
+        target=beat, name=f"import-job-{job.pk}-heartbeat", daemon=True
+    )
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
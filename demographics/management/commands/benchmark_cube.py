@@ -0,0 +1,99 @@
+"""
+Management command to benchmark the statistics cube against the ORM.
+
+Usage:
+    python manage.py benchmark_cube
+    python manage.py benchmark_cube --iterations=5000
+"""
+
+import itertools
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from demographics.cube import StatisticsCube
+from demographics.models import DemographicStatistic
+
+
+class Command(BaseCommand):
+    """
+    Django management command comparing the cube with the ORM aggregation methods.
+
+    Every aggregation classmethod of DemographicStatistic is called for the
+    same keys through the ORM and through the in-memory cube, and the
+    average time per call and any differing results are reported.
+    """
+
+    help = "Benchmark the in-memory statistics cube against the ORM aggregation methods"
+
+    # Aggregation methods and the dimensions of their keys besides year
+    METHODS = (
+        ("get_aggregated_by_both_sexes", "age_group", "hd_index"),
+        ("get_aggregated_by_all_ages", "sex", "hd_index"),
+        ("get_aggregated_by_all_hdi", "age_group", "sex"),
+        ("get_breakdown_by_sex", "age_group", "hd_index"),
+    )
+
+    def add_arguments(self, parser):
+        """Add command line arguments."""
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=1000,
+            help="Number of calls per method and engine (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution."""
+        iterations = options["iterations"]
+        if iterations < 1:
+            raise CommandError("Iterations must be a positive integer")
+
+        start_time = time.perf_counter()
+        cube = StatisticsCube.load()
+        load_duration = time.perf_counter() - start_time
+        self.stdout.write(
+            f"Loaded cube with shape {cube.shape} in {load_duration:.3f} seconds"
+        )
+        if not cube.present.any():
+            raise CommandError("There are no statistics to benchmark")
+
+        years = cube.dimension("year").keys.tolist()
+        for method, first, second in self.METHODS:
+            keys = list(
+                itertools.islice(
+                    itertools.cycle(
+                        itertools.product(
+                            years,
+                            cube.dimension(first).keys.tolist(),
+                            cube.dimension(second).keys.tolist(),
+                        )
+                    ),
+                    iterations,
+                )
+            )
+
+            orm_method = getattr(DemographicStatistic, method)
+            start_time = time.perf_counter()
+            orm_results = [orm_method(*key) for key in keys]
+            orm_duration = time.perf_counter() - start_time
+
+            cube_method = getattr(cube, method)
+            start_time = time.perf_counter()
+            cube_results = [cube_method(*key) for key in keys]
+            cube_duration = time.perf_counter() - start_time
+
+            mismatches = sum(
+                orm_result != cube_result
+                for orm_result, cube_result in zip(orm_results, cube_results)
+            )
+            speedup = orm_duration / cube_duration if cube_duration > 0 else 0.0
+            self.stdout.write(
+                f"{method}: orm {orm_duration / iterations * 1e6:.1f} us/call, "
+                f"cube {cube_duration / iterations * 1e6:.1f} us/call "
+                f"({speedup:.1f}x)"
+            )
+            if mismatches:
+                self.stdout.write(
+                    self.style.ERROR(f"  {mismatches} results differ from the ORM")
+                )
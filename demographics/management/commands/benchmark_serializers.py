@@ -0,0 +1,116 @@
+"""
+Management command to benchmark the list serialization paths.
+
+Usage:
+    python manage.py benchmark_serializers
+    python manage.py benchmark_serializers --rows 10000 100000
+"""
+
+import gc
+import itertools
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from demographics.models import AgeGroup, DemographicStatistic, HDIndex, Sex
+from demographics.serializers import (
+    DemographicStatisticSerializer,
+    serialize_statistic_rows,
+)
+
+
+class Command(BaseCommand):
+    """
+    Django management command comparing DemographicStatisticSerializer with
+    the values_list fast path used by the list endpoint.
+
+    Rows are generated in memory, so no database is needed and the timings
+    cover serialization only: model instances with their related categories
+    for the serializer, and ``STATISTIC_ROW_FIELDS`` tuples for the fast
+    path. Both paths get the same precomputed both-sexes totals, like the
+    list endpoint, and their outputs are compared.
+    """
+
+    help = "Benchmark DemographicStatisticSerializer against the values_list fast path"
+
+    def add_arguments(self, parser):
+        """Add command line arguments."""
+        parser.add_argument(
+            "--rows",
+            type=int,
+            nargs="+",
+            default=[10_000, 100_000, 1_000_000],
+            help="Numbers of rows to serialize (default: 10000 100000 1000000)",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution."""
+        sizes = options["rows"]
+        if any(size < 1 for size in sizes):
+            raise CommandError("Row counts must be positive integers")
+
+        age_groups = [
+            AgeGroup(id=i, name=f"{i * 5} - {i * 5 + 4} years", is_aggregate=False)
+            for i in range(1, 21)
+        ]
+        sexes = [
+            Sex(id=1, name="Male", is_aggregate=False),
+            Sex(id=2, name="Female", is_aggregate=False),
+        ]
+        hd_indices = [
+            HDIndex(id=i, name=f"HDI rating {i}", is_aggregate=False)
+            for i in range(1, 5)
+        ]
+        keys = list(itertools.product(age_groups, sexes, hd_indices))
+
+        for size in sizes:
+            instances = []
+            rows = []
+            totals = {}
+            for i in range(size):
+                age_group, sex, hd_index = keys[i % len(keys)]
+                year = 1950 + i // len(keys)
+                statistic = DemographicStatistic(
+                    id=i + 1,
+                    year=year,
+                    age_group=age_group,
+                    sex=sex,
+                    hd_index=hd_index,
+                    value=i,
+                )
+                instances.append(statistic)
+                rows.append(
+                    (
+                        year,
+                        age_group.name,
+                        sex.name,
+                        hd_index.name,
+                        i,
+                        age_group.id,
+                        hd_index.id,
+                        i + 1,
+                    )
+                )
+                key = (year, age_group.id, hd_index.id)
+                totals[key] = totals.get(key, 0) + i
+
+            gc.collect()
+            start_time = time.perf_counter()
+            serializer_data = DemographicStatisticSerializer(
+                instances, many=True, context={"total_both_sexes": totals}
+            ).data
+            serializer_duration = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            fast_data = serialize_statistic_rows(rows, totals)
+            fast_duration = time.perf_counter() - start_time
+
+            speedup = serializer_duration / fast_duration if fast_duration > 0 else 0.0
+            self.stdout.write(
+                f"{size} rows: serializer {serializer_duration:.3f} s, "
+                f"values_list {fast_duration:.3f} s ({speedup:.1f}x)"
+            )
+            if [dict(item) for item in serializer_data] != fast_data:
+                self.stdout.write(self.style.ERROR("  outputs differ"))
+
+            del instances, rows, totals, serializer_data, fast_data
@@ -4,6 +4,8 @@ Management command to import demographic data from CSV.
 Usage:
     python manage.py import_demographics --file=/path/to/file.csv
     python manage.py import_demographics --url=https://example.com/data.csv
+    python manage.py import_demographics --file=/path/to/file.csv --engine=copy
+    python manage.py import_demographics --url=https://example.com/data.csv --replace
 """
 
 from django.core.management.base import BaseCommand, CommandError
@@ -26,22 +28,102 @@ class Command(BaseCommand):
         group = parser.add_mutually_exclusive_group(required=True)
         group.add_argument("--file", type=str, help="Path to the CSV file to import")
         group.add_argument("--url", type=str, help="URL of the CSV file to import")
+        parser.add_argument(
+            "--engine",
+            choices=DemographicsCSVImporter.ENGINES,
+            default="bulk",
+            help=(
+                "Write engine to use (default: bulk). The copy engine uses "
+                "PostgreSQL COPY and falls back to bulk on other databases"
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of statistics written per bulk statement (default: 1000)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Number of rows written per transaction (default: 5000)",
+        )
+        parser.add_argument(
+            "--read-chunk-size",
+            type=int,
+            default=64 * 1024,
+            help="Number of bytes read per chunk when importing from a URL (default: 65536)",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=30.0,
+            help="Timeout in seconds for URL requests (default: 30)",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Import from the URL even if it has not changed since the last import",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of processes parsing a local file in parallel (default: 1)",
+        )
+        parser.add_argument(
+            "--replace",
+            action="store_true",
+            help=(
+                "Replace the whole dataset: load a shadow table and swap it in "
+                "atomically once it is complete"
+            ),
+        )
+        parser.add_argument(
+            "--min-replace-ratio",
+            type=float,
+            default=0.5,
+            help=(
+                "Refuse to replace the dataset when the new one has fewer rows "
+                "than this fraction of the current one (default: 0.5)"
+            ),
+        )
 
     def handle(self, *args, **options):
         """Handle the command execution."""
         start_time = timezone.now()
-        importer = DemographicsCSVImporter()
+        try:
+            importer = DemographicsCSVImporter(
+                engine=options["engine"],
+                batch_size=options["batch_size"],
+                chunk_size=options["chunk_size"],
+                read_chunk_size=options["read_chunk_size"],
+                timeout=options["timeout"],
+                workers=options["workers"],
+                replace=options["replace"],
+                min_replace_ratio=options["min_replace_ratio"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
 
         if options["file"]:
             self.stdout.write(f"Importing data from file: {options['file']}")
             result = importer.import_from_file(options["file"])
         elif options["url"]:
             self.stdout.write(f"Importing data from URL: {options['url']}")
-            result = importer.import_from_url(options["url"])
+            result = importer.import_from_url(options["url"], force=options["force"])
         else:
             raise CommandError("Either --file or --url must be provided")
 
-        if result["success"]:
+        if result.get("unchanged"):
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Source unchanged, skipped "
+                    f"(checked in {result['check_duration']:.2f} seconds)"
+                )
+            )
+        elif result["success"]:
             self.stdout.write(
                 self.style.SUCCESS(
                     f"Successfully imported demographic data:\n"
@@ -52,6 +134,38 @@ class Command(BaseCommand):
                 )
             )
 
+            if result.get("replaced"):
+                self.stdout.write(
+                    f"- Replaced {result['previous_rows']} statistics "
+                    f"with {result['inserted_rows']}"
+                )
+            elif "unchanged_rows" in result:
+                self.stdout.write(
+                    f"- Inserted: {result['inserted_rows']}, "
+                    f"updated: {result['updated_rows']}, "
+                    f"unchanged: {result['unchanged_rows']}"
+                )
+
+            if "rows_per_second" in result:
+                if result["engine"] != options["engine"]:
+                    self.stdout.write(
+                        self.style.WARNING(
+                            f"Engine '{options['engine']}' is not supported by this "
+                            f"database, used '{result['engine']}' instead"
+                        )
+                    )
+                self.stdout.write(
+                    f"Engine '{result['engine']}' processed "
+                    f"{result['rows_per_second']:.0f} rows/sec "
+                    f"(database writes took {result['write_duration']:.2f} seconds)"
+                )
+
+            if "bytes_per_second" in result:
+                self.stdout.write(
+                    f"Downloaded {result['bytes_downloaded']} bytes "
+                    f"at {result['bytes_per_second']:.0f} bytes/sec"
+                )
+
             if result.get("error_rows"):
                 self.stdout.write(
                     self.style.WARNING(
@@ -0,0 +1,55 @@
+"""
+Management command to rebuild the statistic rollup table.
+
+Usage:
+    python manage.py rebuild_rollups
+    python manage.py rebuild_rollups --check
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from demographics.models import StatisticRollup
+
+
+class Command(BaseCommand):
+    """
+    Django management command for rebuilding the statistic rollups.
+
+    The rollups are rebuilt from scratch and then checked against totals
+    computed from the live statistics. With --check they are only checked.
+    """
+
+    help = "Rebuild the statistic rollups and check them against live sums"
+
+    def add_arguments(self, parser):
+        """Add command line arguments."""
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only check the rollups against live sums, without rebuilding them",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution."""
+        start_time = timezone.now()
+
+        if not options["check"]:
+            count = StatisticRollup.rebuild()
+            self.stdout.write(f"Rebuilt {count} rollups")
+
+        mismatches = StatisticRollup.check_totals()
+        duration = (timezone.now() - start_time).total_seconds()
+        if mismatches:
+            for key, stored, live in mismatches:
+                self.stdout.write(
+                    self.style.ERROR(f"- {key}: stored {stored}, live {live}")
+                )
+            raise CommandError(f"{len(mismatches)} rollups do not match the live sums")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"All {StatisticRollup.objects.count()} rollups match the live sums "
+                f"(checked in {duration:.2f} seconds)"
+            )
+        )
@@ -0,0 +1,64 @@
+"""
+Management command that runs queued background import jobs.
+
+Usage:
+    python manage.py run_import_worker
+    python manage.py run_import_worker --once
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from demographics.jobs import run_import_job
+from demographics.models import ImportJob
+
+
+class Command(BaseCommand):
+    """
+    Django management command running import jobs queued by the dashboard.
+
+    The worker polls the database for queued jobs and runs them one at a time.
+    Several workers can run side by side.
+    """
+
+    help = "Run queued demographic data import jobs"
+
+    def add_arguments(self, parser):
+        """Add command line arguments."""
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the jobs that are currently queued and exit",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between checks for new jobs (default: 2)",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command execution."""
+        self.stdout.write("Import worker started")
+        while True:
+            job = ImportJob.claim_next()
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(f"Running import job {job.pk}: {job.name or job.source}")
+            job = run_import_job(job)
+            style = (
+                self.style.SUCCESS
+                if job.status == ImportJob.Status.SUCCEEDED
+                else self.style.ERROR
+            )
+            self.stdout.write(
+                style(
+                    f"Import job {job.pk} {job.status}: "
+                    f"{job.rows_processed} rows at {job.rows_per_second:.0f} rows/sec"
+                )
+            )
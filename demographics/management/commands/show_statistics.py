@@ -64,16 +64,25 @@ class Command(BaseCommand):
         self.stdout.write(f"\nSample Data (limited to {limit} records):")
         self.stdout.write("-" * 50)
         self.stdout.write(
-            f"{'Year':<6} {'Age Group':<15} {'Sex':<8} {'HDI Category':<30} {'Value':<10}"
+            f"{'Year':<6} {'Age Group':<15} {'Sex':<8} {'HDI Category':<30} "
+            f"{'Value':<10} {'Both Sexes':<10}"
         )
         self.stdout.write("-" * 50)
 
-        for stat in stats_query.select_related("age_group", "sex", "hd_index").order_by(
-            "year", "age_group__name"
-        )[:limit]:
+        sample = list(
+            stats_query.select_related("age_group", "sex", "hd_index").order_by(
+                "year", "age_group__name"
+            )[:limit]
+        )
+        # Read the totals of every sample record with a single query
+        totals = DemographicStatistic.get_aggregated_by_both_sexes_many(
+            (stat.year, stat.age_group_id, stat.hd_index_id) for stat in sample
+        )
+        for stat in sample:
+            total = totals[(stat.year, stat.age_group_id, stat.hd_index_id)]
             self.stdout.write(
                 f"{stat.year:<6} {stat.age_group.name:<15} {stat.sex.name:<8} "
-                f"{stat.hd_index.name:<30} {stat.value:<10}"
+                f"{stat.hd_index.name:<30} {stat.value:<10} {total:<10}"
             )
 
         # Display some aggregated statistics
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("demographics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportSource",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("url", models.URLField(max_length=500, unique=True)),
+                ("etag", models.CharField(blank=True, max_length=255)),
+                ("last_modified", models.CharField(blank=True, max_length=64)),
+                ("checksum", models.CharField(blank=True, max_length=64)),
+                ("checked_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Import Source",
+                "verbose_name_plural": "Import Sources",
+            },
+        ),
+    ]
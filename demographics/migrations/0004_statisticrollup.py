@@ -0,0 +1,98 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def build_rollups(apps, schema_editor):
+    """Compute the rollups of the existing statistics."""
+    DemographicStatistic = apps.get_model("demographics", "DemographicStatistic")
+    StatisticRollup = apps.get_model("demographics", "StatisticRollup")
+    dimensions = ("age_group", "sex", "hd_index")
+
+    rollups = []
+    for kind in dimensions:
+        group_fields = [
+            f"{dimension}_id" for dimension in dimensions if dimension != kind
+        ]
+        rows = (
+            DemographicStatistic.objects.filter(**{f"{kind}__is_aggregate": False})
+            .order_by()
+            .values("year", *group_fields)
+            .annotate(total=Sum("value"))
+        )
+        for row in rows:
+            ids = [
+                "*" if dimension == kind else str(row.get(f"{dimension}_id"))
+                for dimension in dimensions
+            ]
+            rollups.append(
+                StatisticRollup(
+                    key=":".join([kind, str(row["year"]), *ids]), kind=kind, **row
+                )
+            )
+    StatisticRollup.objects.bulk_create(rollups, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("demographics", "0003_importjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatisticRollup",
+            fields=[
+                (
+                    "key",
+                    models.CharField(max_length=100, primary_key=True, serialize=False),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("sex", "Both sexes"),
+                            ("age_group", "All ages"),
+                            ("hd_index", "All HDI ratings"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("year", models.PositiveIntegerField()),
+                ("total", models.PositiveBigIntegerField(default=0)),
+                (
+                    "age_group",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="demographics.agegroup",
+                    ),
+                ),
+                (
+                    "hd_index",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="demographics.hdindex",
+                    ),
+                ),
+                (
+                    "sex",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="demographics.sex",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Statistic Rollup",
+                "verbose_name_plural": "Statistic Rollups",
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
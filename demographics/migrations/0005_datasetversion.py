@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:29
+
+from django.db import migrations, models
+
+
+def create_version(apps, schema_editor):
+    """Create the single dataset version row, so writers only increment it."""
+    DatasetVersion = apps.get_model("demographics", "DatasetVersion")
+    DatasetVersion.objects.get_or_create(pk=1, defaults={"version": 1})
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("demographics", "0004_statisticrollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DatasetVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.PositiveBigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Dataset Version",
+                "verbose_name_plural": "Dataset Versions",
+            },
+        ),
+        migrations.RunPython(create_version, migrations.RunPython.noop),
+    ]
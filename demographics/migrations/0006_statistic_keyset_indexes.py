@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("demographics", "0005_datasetversion"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="demographicstatistic",
+            index=models.Index(
+                fields=["year", "id"], name="demographic_year_b8ecba_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="demographicstatistic",
+            index=models.Index(
+                fields=["value", "id"], name="demographic_value_7e6d68_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("demographics", "0006_statistic_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="datasetversion",
+            name="summary",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="datasetversion",
+            name="summary_version",
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+    ]
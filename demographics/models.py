@@ -1,9 +1,63 @@
 from __future__ import annotations
-from typing import Dict, Optional, Any, Union
+import logging
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Any, Sequence, Set, Tuple, Union
 
+from django.conf import settings
 from django.core.validators import MinValueValidator
-from django.db import models
-from django.db.models import Sum, QuerySet
+from django.db import models, transaction
+from django.db.models import Avg, Count, F, Max, Min, Sum, QuerySet, Subquery
+from django.utils import timezone
+
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class CategoryQuerySet(QuerySet):
+    """
+    QuerySet keeping the rollups and dataset version in sync with bulk
+    updates and deletes of categories.
+
+    Deleting categories cascades to their statistics through the collector,
+    bypassing ``BaseCategory.delete`` and ``DemographicStatisticQuerySet``,
+    as the admin "delete selected" action does.
+    """
+
+    def update(self, **kwargs: Any) -> int:
+        """
+        Update the matching categories, rebuilding the rollups if flags change.
+
+        Args:
+            **kwargs: The fields to update.
+
+        Returns:
+            The number of updated rows.
+        """
+        with transaction.atomic():
+            updated = super().update(**kwargs)
+            if "is_aggregate" in kwargs:
+                StatisticRollup.rebuild()
+            DatasetVersion.bump()
+        return updated
+
+    def delete(self) -> Tuple[int, Dict[str, int]]:
+        """
+        Delete the matching categories and their statistics, then rebuild the rollups.
+
+        Returns:
+            The number of deleted objects and a count per model.
+        """
+        with transaction.atomic():
+            result = super().delete()
+            StatisticRollup.rebuild()
+            DatasetVersion.bump()
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+    update.alters_data = True
 
 
 class BaseCategory(models.Model):
@@ -17,12 +71,58 @@ class BaseCategory(models.Model):
     name = models.CharField(max_length=255, unique=True)
     is_aggregate = models.BooleanField(default=False)
 
+    objects = CategoryQuerySet.as_manager()
+
     class Meta:
         abstract = True
 
     def __str__(self) -> str:
         return self.name
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """
+        Save the category, rebuilding the rollups if its aggregate flag changed.
+
+        The dataset version is bumped when the category is created, renamed
+        or its flag changes, so caches of the categories are reloaded.
+
+        Args:
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments.
+        """
+        previous = (
+            type(self)
+            .objects.filter(pk=self.pk)
+            .values_list("name", "is_aggregate")
+            .first()
+            if self.pk is not None
+            else None
+        )
+        flag_changed = previous is not None and previous[1] != self.is_aggregate
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if flag_changed:
+                StatisticRollup.rebuild()
+            if previous != (self.name, self.is_aggregate):
+                DatasetVersion.bump()
+
+    def delete(self, *args: Any, **kwargs: Any) -> Tuple[int, Dict[str, int]]:
+        """
+        Delete the category and its statistics, then rebuild the rollups.
+
+        Args:
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            The number of deleted objects and a count per model.
+        """
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            StatisticRollup.rebuild()
+            DatasetVersion.bump()
+        return result
+
 
 class AgeGroup(BaseCategory):
     """
@@ -60,10 +160,107 @@ class HDIndex(BaseCategory):
         verbose_name_plural = "Human Development Indices"
 
 
+# (year, age_group_id, sex_id, hd_index_id) natural key of a statistic
+StatisticKey = Tuple[int, int, int, int]
+
+# (year, category, category) key of an aggregate; categories may be ids
+AggregateKey = Tuple[int, Any, Any]
+
+
+class DemographicStatisticQuerySet(QuerySet):
+    """
+    QuerySet keeping the statistic rollups in sync with bulk updates and deletes.
+    """
+
+    KEY_FIELDS = ("year", "age_group_id", "sex_id", "hd_index_id")
+    # Aggregate functions of the value, by metric name
+    METRICS = {"sum": Sum, "avg": Avg, "min": Min, "max": Max, "count": Count}
+
+    def grouped(self, by: Sequence[str], metric: str = "sum") -> List[Dict[str, Any]]:
+        """
+        Aggregate the value of the statistics per group with a single GROUP BY.
+
+        Categories flagged as aggregates are not excluded here; filter them
+        out first where they would be counted twice.
+
+        Args:
+            by: The dimensions to group by: "year", "age_group", "sex" or
+                "hd_index".
+            metric: The name of the aggregate function, see ``METRICS``.
+
+        Returns:
+            A dictionary per group with the year and category ids of the
+            group ("year", "age_group_id", ...) and the aggregated "value",
+            ordered by the grouping fields. Grouping by no dimension gives a
+            single group, or none if no statistic matches.
+        """
+        fields = [name if name == "year" else f"{name}_id" for name in by]
+        value = self.METRICS[metric]("id" if metric == "count" else "value")
+        if not fields:
+            result = self.aggregate(value=value, rows=Count("id"))
+            return [{"value": result["value"]}] if result["rows"] else []
+        return list(
+            self.order_by().values(*fields).annotate(value=value).order_by(*fields)
+        )
+
+    def update(self, **kwargs: Any) -> int:
+        """
+        Update the matching statistics and refresh their rollups.
+
+        Updates that move statistics to another year or category rebuild
+        every rollup, since the new groups are not known up front.
+
+        Args:
+            **kwargs: The fields to update.
+
+        Returns:
+            The number of updated rows.
+        """
+        key_fields = set(self.KEY_FIELDS) | {field[:-3] for field in self.KEY_FIELDS}
+        with transaction.atomic():
+            if key_fields & kwargs.keys():
+                updated = super().update(**kwargs)
+                StatisticRollup.rebuild()
+            else:
+                keys = set(self.values_list(*self.KEY_FIELDS))
+                updated = super().update(**kwargs)
+                StatisticRollup.refresh(keys)
+            DatasetVersion.bump()
+        return updated
+
+    def delete(self) -> Tuple[int, Dict[str, int]]:
+        """
+        Delete the matching statistics and refresh their rollups.
+
+        Returns:
+            The number of deleted objects and a count per model.
+        """
+        with transaction.atomic():
+            if not self.query.where:
+                # Deleting every statistic empties the rollups as well
+                StatisticRollup.objects.all().delete()
+                result = super().delete()
+            else:
+                keys = set(self.values_list(*self.KEY_FIELDS))
+                result = super().delete()
+                StatisticRollup.refresh(keys)
+            DatasetVersion.bump()
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+    update.alters_data = True
+
+
 class DemographicStatistic(models.Model):
     """
     Model representing demographic statistics for a specific combination of
     year, age group, sex, and human development index.
+
+    Saving or deleting statistics, through instances or querysets, refreshes
+    the affected StatisticRollup rows and bumps the DatasetVersion. Bulk
+    writes that bypass the ORM, like the CSV importer's, must call
+    ``StatisticRollup.refresh`` and ``DatasetVersion.bump`` themselves.
     """
 
     year = models.PositiveIntegerField()
@@ -72,6 +269,8 @@ class DemographicStatistic(models.Model):
     hd_index = models.ForeignKey(HDIndex, on_delete=models.CASCADE)
     value = models.PositiveIntegerField(validators=[MinValueValidator(0)])
 
+    objects = DemographicStatisticQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Demographic Statistic"
         verbose_name_plural = "Demographic Statistics"
@@ -85,6 +284,9 @@ class DemographicStatistic(models.Model):
         # Add index for common queries
         indexes = [
             models.Index(fields=["year"]),
+            # Keyset pagination by year or value, with the id as tiebreaker
+            models.Index(fields=["year", "id"]),
+            models.Index(fields=["value", "id"]),
             models.Index(fields=["year", "age_group"]),
             models.Index(fields=["year", "sex"]),
             models.Index(fields=["year", "hd_index"]),
@@ -116,7 +318,41 @@ class DemographicStatistic(models.Model):
             ValueError: If value is negative.
         """
         self.full_clean()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            keys = {self.key}
+            if self.pk is not None:
+                # The statistic may move out of its previous rollup groups
+                keys.update(
+                    type(self)
+                    .objects.filter(pk=self.pk)
+                    .values_list(*DemographicStatisticQuerySet.KEY_FIELDS)
+                )
+            super().save(*args, **kwargs)
+            StatisticRollup.refresh(keys)
+            DatasetVersion.bump()
+
+    def delete(self, *args: Any, **kwargs: Any) -> Tuple[int, Dict[str, int]]:
+        """
+        Delete the model instance and refresh its rollups.
+
+        Args:
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            The number of deleted objects and a count per model.
+        """
+        with transaction.atomic():
+            key = self.key
+            result = super().delete(*args, **kwargs)
+            StatisticRollup.refresh([key])
+            DatasetVersion.bump()
+        return result
+
+    @property
+    def key(self) -> StatisticKey:
+        """The (year, age_group_id, sex_id, hd_index_id) natural key of the statistic."""
+        return (self.year, self.age_group_id, self.sex_id, self.hd_index_id)
 
     @classmethod
     def get_aggregated_by_both_sexes(
@@ -125,6 +361,8 @@ class DemographicStatistic(models.Model):
         """
         Get the total value aggregated for both sexes for a given year, age group, and HDI category.
 
+        The total is read from the precomputed StatisticRollup table.
+
         Args:
             year: The year to filter by.
             age_group: The age group to filter by.
@@ -133,20 +371,20 @@ class DemographicStatistic(models.Model):
         Returns:
             The aggregated value for both sexes.
         """
-        result = cls.objects.filter(
-            year=year,
+        return StatisticRollup.get_total(
+            StatisticRollup.Kind.BOTH_SEXES,
+            year,
             age_group=age_group,
             hd_index=hd_index,
-            sex__is_aggregate=False,  # Exclude 'Both sexes' to avoid double counting
-        ).aggregate(total=Sum("value"))
-
-        return result["total"] or 0
+        )
 
     @classmethod
     def get_aggregated_by_all_ages(cls, year: int, sex: Sex, hd_index: HDIndex) -> int:
         """
         Get the total value aggregated for all age groups for a given year, sex, and HDI category.
 
+        The total is read from the precomputed StatisticRollup table.
+
         Args:
             year: The year to filter by.
             sex: The sex category to filter by.
@@ -155,20 +393,17 @@ class DemographicStatistic(models.Model):
         Returns:
             The aggregated value for all age groups.
         """
-        result = cls.objects.filter(
-            year=year,
-            sex=sex,
-            hd_index=hd_index,
-            age_group__is_aggregate=False,  # Exclude 'All ages' to avoid double counting
-        ).aggregate(total=Sum("value"))
-
-        return result["total"] or 0
+        return StatisticRollup.get_total(
+            StatisticRollup.Kind.ALL_AGES, year, sex=sex, hd_index=hd_index
+        )
 
     @classmethod
     def get_aggregated_by_all_hdi(cls, year: int, age_group: AgeGroup, sex: Sex) -> int:
         """
         Get the total value aggregated for all HDI categories for a given year, age group, and sex.
 
+        The total is read from the precomputed StatisticRollup table.
+
         Args:
             year: The year to filter by.
             age_group: The age group to filter by.
@@ -177,14 +412,9 @@ class DemographicStatistic(models.Model):
         Returns:
             The aggregated value for all HDI categories.
         """
-        result = cls.objects.filter(
-            year=year,
-            age_group=age_group,
-            sex=sex,
-            hd_index__is_aggregate=False,  # Exclude 'All ratings' to avoid double counting
-        ).aggregate(total=Sum("value"))
-
-        return result["total"] or 0
+        return StatisticRollup.get_total(
+            StatisticRollup.Kind.ALL_HDI, year, age_group=age_group, sex=sex
+        )
 
     @classmethod
     def get_breakdown_by_sex(
@@ -210,6 +440,127 @@ class DemographicStatistic(models.Model):
 
         return {stat.sex.name: stat.value for stat in stats}
 
+    @classmethod
+    def get_aggregated_by_both_sexes_many(
+        cls, keys: Union[Iterable[AggregateKey], QuerySet]
+    ) -> Dict[Tuple[int, int, int], int]:
+        """
+        Get the totals for both sexes of many (year, age group, HDI category) keys.
+
+        Args:
+            keys: (year, age_group, hd_index) tuples, where the categories are
+                objects or ids, or a queryset of statistics.
+
+        Returns:
+            A dictionary mapping (year, age_group_id, hd_index_id) to the
+            aggregated value for both sexes.
+        """
+        return StatisticRollup.get_totals(
+            StatisticRollup.Kind.BOTH_SEXES,
+            cls._aggregate_keys(keys, "age_group_id", "hd_index_id"),
+        )
+
+    @classmethod
+    def get_aggregated_by_all_ages_many(
+        cls, keys: Union[Iterable[AggregateKey], QuerySet]
+    ) -> Dict[Tuple[int, int, int], int]:
+        """
+        Get the totals for all age groups of many (year, sex, HDI category) keys.
+
+        Args:
+            keys: (year, sex, hd_index) tuples, where the categories are
+                objects or ids, or a queryset of statistics.
+
+        Returns:
+            A dictionary mapping (year, sex_id, hd_index_id) to the aggregated
+            value for all age groups.
+        """
+        return StatisticRollup.get_totals(
+            StatisticRollup.Kind.ALL_AGES,
+            cls._aggregate_keys(keys, "sex_id", "hd_index_id"),
+        )
+
+    @classmethod
+    def get_aggregated_by_all_hdi_many(
+        cls, keys: Union[Iterable[AggregateKey], QuerySet]
+    ) -> Dict[Tuple[int, int, int], int]:
+        """
+        Get the totals for all HDI categories of many (year, age group, sex) keys.
+
+        Args:
+            keys: (year, age_group, sex) tuples, where the categories are
+                objects or ids, or a queryset of statistics.
+
+        Returns:
+            A dictionary mapping (year, age_group_id, sex_id) to the aggregated
+            value for all HDI categories.
+        """
+        return StatisticRollup.get_totals(
+            StatisticRollup.Kind.ALL_HDI,
+            cls._aggregate_keys(keys, "age_group_id", "sex_id"),
+        )
+
+    @classmethod
+    def get_breakdown_by_sex_many(
+        cls, keys: Union[Iterable[AggregateKey], QuerySet]
+    ) -> Dict[Tuple[int, int, int], Dict[str, int]]:
+        """
+        Get breakdowns of values by sex for many (year, age group, HDI category) keys.
+
+        All breakdowns are read with a single query.
+
+        Args:
+            keys: (year, age_group, hd_index) tuples, where the categories are
+                objects or ids, or a queryset of statistics.
+
+        Returns:
+            A dictionary mapping (year, age_group_id, hd_index_id) to a
+            dictionary of sex names and their respective values.
+        """
+        keys = cls._aggregate_keys(keys, "age_group_id", "hd_index_id")
+        breakdowns: Dict[Tuple[int, int, int], Dict[str, int]] = {
+            key: {} for key in keys
+        }
+        if not keys:
+            return breakdowns
+
+        years, age_group_ids, hd_index_ids = map(set, zip(*keys))
+        stats = cls.objects.filter(
+            year__in=years,
+            age_group_id__in=age_group_ids,
+            hd_index_id__in=hd_index_ids,
+            sex__is_aggregate=False,  # Exclude 'Both sexes' to get individual breakdowns
+        ).values_list("year", "age_group_id", "hd_index_id", "sex__name", "value")
+
+        for year, age_group_id, hd_index_id, sex_name, value in stats:
+            breakdown = breakdowns.get((year, age_group_id, hd_index_id))
+            if breakdown is not None:
+                breakdown[sex_name] = value
+        return breakdowns
+
+    @staticmethod
+    def _aggregate_keys(
+        keys: Union[Iterable[AggregateKey], QuerySet], *fields: str
+    ) -> Set[Tuple[int, int, int]]:
+        """
+        Normalize the keys passed to the batched aggregation methods.
+
+        Args:
+            keys: (year, category, category) tuples, where the categories are
+                objects or ids, or a queryset of statistics.
+            *fields: The id fields of the two categories, used to read the
+                keys of a queryset.
+
+        Returns:
+            A set of (year, id, id) tuples.
+        """
+        if isinstance(keys, QuerySet):
+            return set(keys.order_by().values_list("year", *fields).distinct())
+        return {
+            (year, getattr(first, "pk", first), getattr(second, "pk", second))
+            for year, first, second in keys
+        }
+
     @classmethod
     def filter_statistics(
         cls,
@@ -256,3 +607,597 @@ class DemographicStatistic(models.Model):
                 filters["hd_index"] = hd_index
 
         return cls.objects.filter(**filters)
+
+
+class StatisticRollup(models.Model):
+    """
+    Model holding a precomputed marginal total of demographic statistics.
+
+    Each row sums the statistics of one year over one dimension (the kind),
+    for a fixed value of the two other dimensions. Statistics whose category
+    of the summed dimension is an aggregate are excluded, so totals are not
+    double counted. The summed dimension's foreign key is empty.
+
+    Rows are keyed by a string built from the kind, the year and the dimension
+    ids, so a total is read with a single primary-key lookup.
+    """
+
+    class Kind(models.TextChoices):
+        BOTH_SEXES = "sex", "Both sexes"
+        ALL_AGES = "age_group", "All ages"
+        ALL_HDI = "hd_index", "All HDI ratings"
+
+    # Dimensions of a statistic key, in key order
+    DIMENSIONS = ("age_group", "sex", "hd_index")
+
+    key = models.CharField(max_length=100, primary_key=True)
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    year = models.PositiveIntegerField()
+    age_group = models.ForeignKey(
+        AgeGroup, null=True, blank=True, on_delete=models.CASCADE
+    )
+    sex = models.ForeignKey(Sex, null=True, blank=True, on_delete=models.CASCADE)
+    hd_index = models.ForeignKey(
+        HDIndex, null=True, blank=True, on_delete=models.CASCADE
+    )
+    total = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Statistic Rollup"
+        verbose_name_plural = "Statistic Rollups"
+
+    def __str__(self) -> str:
+        return f"{self.key}: {self.total}"
+
+    @staticmethod
+    def make_key(
+        kind: str,
+        year: int,
+        age_group: Any = None,
+        sex: Any = None,
+        hd_index: Any = None,
+    ) -> str:
+        """
+        Build the primary key of a rollup.
+
+        Args:
+            kind: The dimension summed over, one of Kind.
+            year: The year of the rollup.
+            age_group: The age group or its id, unless summed over.
+            sex: The sex category or its id, unless summed over.
+            hd_index: The HDI category or its id, unless summed over.
+
+        Returns:
+            A key like "sex:2023:4:*:7".
+        """
+        ids = [
+            "*" if dimension == kind else str(getattr(value, "pk", value))
+            for dimension, value in zip(
+                StatisticRollup.DIMENSIONS, (age_group, sex, hd_index)
+            )
+        ]
+        return ":".join([kind, str(year), *ids])
+
+    @classmethod
+    def get_total(cls, kind: str, year: int, **dimensions: Any) -> int:
+        """
+        Read a precomputed total.
+
+        Args:
+            kind: The dimension summed over, one of Kind.
+            year: The year of the rollup.
+            **dimensions: The two other dimensions, as categories or ids.
+
+        Returns:
+            The total, or 0 if no statistics match.
+        """
+        total = (
+            cls.objects.filter(pk=cls.make_key(kind, year, **dimensions))
+            .values_list("total", flat=True)
+            .first()
+        )
+        return total or 0
+
+    @classmethod
+    def get_totals(
+        cls, kind: str, keys: Iterable[Tuple[int, int, int]]
+    ) -> Dict[Tuple[int, int, int], int]:
+        """
+        Read many precomputed totals of one kind with a single query.
+
+        Args:
+            kind: The dimension summed over, one of Kind.
+            keys: (year, first id, second id) tuples, where the ids are those
+                of the two dimensions not summed over, in DIMENSIONS order.
+
+        Returns:
+            A mapping of each key to its total, 0 if no statistics match.
+        """
+        other_dimensions = [
+            dimension for dimension in cls.DIMENSIONS if dimension != kind
+        ]
+        rollup_keys = {
+            cls.make_key(kind, year, **dict(zip(other_dimensions, ids))): (year, *ids)
+            for year, *ids in set(keys)
+        }
+        totals = dict.fromkeys(rollup_keys.values(), 0)
+        if rollup_keys:
+            for key, total in cls.objects.filter(pk__in=rollup_keys).values_list(
+                "key", "total"
+            ):
+                totals[rollup_keys[key]] = total
+        return totals
+
+    @classmethod
+    def compute(
+        cls,
+        kind: str,
+        statistics: Optional[QuerySet] = None,
+        shadow_table: Optional[Any] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Compute rollups of one kind from the live statistics.
+
+        Args:
+            kind: The dimension summed over, one of Kind.
+            statistics: The statistics to group, all of them by default.
+            shadow_table: A ``ShadowTable`` of the statistics to read the
+                statistics from instead of the live table.
+
+        Returns:
+            A mapping of rollup keys to rollup field values.
+        """
+        if statistics is None:
+            statistics = DemographicStatistic.objects.all()
+        group_fields = [
+            f"{dimension}_id" for dimension in cls.DIMENSIONS if dimension != kind
+        ]
+        rows = (
+            statistics.filter(**{f"{kind}__is_aggregate": False})
+            .order_by()
+            .values("year", *group_fields)
+            .annotate(total=Sum("value"))
+        )
+        if shadow_table is not None:
+            rows = shadow_table.values(rows)
+
+        rollups = {}
+        for row in rows:
+            dimensions = {field[:-3]: row[field] for field in group_fields}
+            rollups[cls.make_key(kind, row["year"], **dimensions)] = {
+                "kind": kind,
+                **row,
+            }
+        return rollups
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """
+        Rebuild every rollup from the live statistics.
+
+        Returns:
+            The number of rollups written.
+        """
+        with transaction.atomic():
+            return cls.replace_all(cls.compute_all())
+
+    @classmethod
+    def compute_all(
+        cls, shadow_table: Optional[Any] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Compute the rollups of every kind.
+
+        Args:
+            shadow_table: A ``ShadowTable`` of the statistics to read the
+                statistics from instead of the live table.
+
+        Returns:
+            A mapping of rollup keys to rollup field values.
+        """
+        rollups = {}
+        for kind in cls.Kind.values:
+            rollups.update(cls.compute(kind, shadow_table=shadow_table))
+        return rollups
+
+    @classmethod
+    def replace_all(cls, rollups: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Replace every stored rollup with precomputed ones.
+
+        Args:
+            rollups: A mapping of rollup keys to rollup field values, as
+                returned by ``compute_all``.
+
+        Returns:
+            The number of rollups written.
+        """
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls._write(rollups)
+        return len(rollups)
+
+    @classmethod
+    def refresh(cls, keys: Iterable[StatisticKey]) -> None:
+        """
+        Recompute the rollups that contain the given statistics.
+
+        Rollups whose statistics no longer exist are removed.
+
+        Args:
+            keys: (year, age_group_id, sex_id, hd_index_id) keys of statistics
+                that were written or deleted.
+        """
+        keys = set(keys)
+        if not keys:
+            return
+
+        years, age_group_ids, sex_ids, hd_index_ids = map(set, zip(*keys))
+        ids = dict(zip(cls.DIMENSIONS, (age_group_ids, sex_ids, hd_index_ids)))
+        affected: Set[str] = set()
+        rollups = {}
+        with transaction.atomic():
+            for kind in cls.Kind.values:
+                for year, age_group_id, sex_id, hd_index_id in keys:
+                    affected.add(
+                        cls.make_key(kind, year, age_group_id, sex_id, hd_index_id)
+                    )
+                filters = {
+                    f"{dimension}_id__in": ids[dimension]
+                    for dimension in cls.DIMENSIONS
+                    if dimension != kind
+                }
+                statistics = DemographicStatistic.objects.filter(
+                    year__in=years, **filters
+                )
+                rollups.update(
+                    {
+                        key: rollup
+                        for key, rollup in cls.compute(kind, statistics).items()
+                        if key in affected
+                    }
+                )
+
+            cls._write(rollups)
+            stale = list(affected - rollups.keys())
+            for start in range(0, len(stale), 500):
+                cls.objects.filter(pk__in=stale[start : start + 500]).delete()
+
+    @classmethod
+    def check_totals(cls) -> List[Tuple[str, Optional[int], Optional[int]]]:
+        """
+        Compare the stored rollups with totals computed from the live statistics.
+
+        Returns:
+            A list of (key, stored total, live total) tuples for every rollup
+            that is missing, stale or should not exist.
+        """
+        live = {}
+        for kind in cls.Kind.values:
+            live.update(
+                {key: rollup["total"] for key, rollup in cls.compute(kind).items()}
+            )
+        stored = dict(cls.objects.values_list("key", "total"))
+
+        return sorted(
+            (key, stored.get(key), live.get(key))
+            for key in stored.keys() | live.keys()
+            if stored.get(key) != live.get(key)
+        )
+
+    @classmethod
+    def _write(cls, rollups: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Upsert rollups.
+
+        Args:
+            rollups: A mapping of rollup keys to rollup field values.
+        """
+        cls.objects.bulk_create(
+            [cls(key=key, **rollup) for key, rollup in rollups.items()],
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["key"],
+            update_fields=["total"],
+        )
+
+
+class DatasetVersion(models.Model):
+    """
+    Model holding a counter that is incremented whenever the statistics change.
+
+    There is a single row, created by the migration. Caches of data derived
+    from the statistics store the version they were built from and are rebuilt
+    when it changes. The row also caches a summary of the statistics, see
+    ``get_summary``.
+    """
+
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Summary of the statistics and the version it was computed at
+    summary = models.JSONField(null=True, blank=True)
+    summary_version = models.PositiveBigIntegerField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Dataset Version"
+        verbose_name_plural = "Dataset Versions"
+
+    def __str__(self) -> str:
+        return f"Version {self.version}"
+
+    @classmethod
+    def current(cls) -> int:
+        """
+        Get the current version of the dataset.
+
+        Returns:
+            The version, 0 if the row is missing.
+        """
+        return cls.objects.filter(pk=1).values_list("version", flat=True).first() or 0
+
+    @classmethod
+    def state(cls, with_active_job: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Get the version, the time of the last change and the cached summary
+        with a single query.
+
+        Args:
+            with_active_job: Whether to also get the id of the most recent
+                active import job (see ``ImportJob.active``), as "active_job".
+
+        Returns:
+            A dictionary with "version", "updated_at", "summary" and
+            "summary_version" (and "active_job"), or None if the row is
+            missing.
+        """
+        queryset = cls.objects.filter(pk=1)
+        fields = ["version", "updated_at", "summary", "summary_version"]
+        if with_active_job:
+            queryset = queryset.annotate(
+                active_job=Subquery(
+                    ImportJob.active().order_by("-created_at").values("pk")[:1]
+                )
+            )
+            fields.append("active_job")
+        return queryset.values(*fields).first()
+
+    @classmethod
+    def get_summary(cls, state: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Get the number of statistics, their years and the categories they use.
+
+        The summary is computed with full scans of the statistics once per
+        version and cached in the row, so that other calls and processes
+        read it with the version.
+
+        Args:
+            state: The ``state()`` of the dataset, looked up if not given.
+
+        Returns:
+            A dictionary with the "total" number of statistics, the sorted
+            "years", and the sorted ids of the "age_group", "sex" and
+            "hd_index" categories used by the statistics.
+        """
+        if state is None:
+            state = cls.state()
+        if state and state["summary_version"] == state["version"]:
+            return state["summary"]
+
+        statistics = DemographicStatistic.objects.order_by()
+        summary = {"total": statistics.count()}
+        for key, field in (
+            ("years", "year"),
+            ("age_group", "age_group_id"),
+            ("sex", "sex_id"),
+            ("hd_index", "hd_index_id"),
+        ):
+            summary[key] = sorted(statistics.values_list(field, flat=True).distinct())
+        if state:
+            # Only tag the summary if no change was committed meanwhile
+            cls.objects.filter(pk=1, version=state["version"]).update(
+                summary=summary, summary_version=state["version"]
+            )
+        return summary
+
+    @classmethod
+    def bump(cls) -> None:
+        """
+        Increment the version, inside the caller's transaction if any.
+
+        The row is updated in place, so concurrent writers are serialized by
+        its row lock and no increment is lost.
+        """
+        cls.objects.filter(pk=1).update(
+            version=F("version") + 1, updated_at=timezone.now()
+        )
+
+
+class ImportSource(models.Model):
+    """
+    Model storing the HTTP validators and body checksum of the last import
+    from a URL, so that unchanged sources can be skipped on the next run.
+    """
+
+    url = models.URLField(max_length=500, unique=True)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    checksum = models.CharField(max_length=64, blank=True)
+    checked_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Import Source"
+        verbose_name_plural = "Import Sources"
+
+    def __str__(self) -> str:
+        return self.url
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """
+        Build the conditional request headers for the next fetch of this source.
+
+        Returns:
+            A dictionary with If-None-Match and/or If-Modified-Since headers.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ImportJob(models.Model):
+    """
+    Model representing a demographic data import that runs in a background worker.
+
+    Jobs are queued by the dashboard and picked up by the
+    ``run_import_worker`` management command, which records their progress
+    so that the dashboard can poll it.
+    """
+
+    class SourceType(models.TextChoices):
+        FILE = "file", "File"
+        URL = "url", "URL"
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        SUCCEEDED = "succeeded", "Succeeded"
+        FAILED = "failed", "Failed"
+
+    source_type = models.CharField(max_length=10, choices=SourceType.choices)
+    source = models.CharField(max_length=500)
+    name = models.CharField(max_length=255, blank=True)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.QUEUED
+    )
+    phase = models.CharField(max_length=50, default="queued")
+    rows_processed = models.PositiveIntegerField(default=0)
+    rows_per_second = models.FloatField(default=0)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Touched periodically by the worker running the job
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Import Job"
+        verbose_name_plural = "Import Jobs"
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self) -> str:
+        return f"Import job {self.pk} ({self.status}): {self.name or self.source}"
+
+    @classmethod
+    def stale_after(cls) -> timedelta:
+        """Return how long a running job may go without a heartbeat."""
+        return timedelta(seconds=getattr(settings, "IMPORT_JOB_STALE_SECONDS", 300))
+
+    @classmethod
+    def active(cls) -> QuerySet:
+        """
+        Get the jobs that are queued, or running with a recent heartbeat.
+
+        Returns:
+            A queryset of the active jobs.
+        """
+        return cls.objects.filter(
+            models.Q(status=cls.Status.QUEUED)
+            | models.Q(
+                status=cls.Status.RUNNING,
+                heartbeat_at__gte=timezone.now() - cls.stale_after(),
+            )
+        )
+
+    @property
+    def is_stale(self) -> bool:
+        """Whether the job is running but its worker stopped sending heartbeats."""
+        return self.status == self.Status.RUNNING and not (
+            self.heartbeat_at
+            and self.heartbeat_at >= timezone.now() - self.stale_after()
+        )
+
+    @classmethod
+    def fail_stale(cls) -> int:
+        """
+        Mark running jobs whose worker stopped sending heartbeats as failed.
+
+        A worker that crashes or is killed leaves its job running; such jobs
+        would otherwise be shown as active forever. Their uploaded files are
+        removed, as a finished job's are.
+
+        Returns:
+            The number of jobs marked as failed.
+        """
+        stale = cls.objects.filter(
+            status=cls.Status.RUNNING,
+            heartbeat_at__lt=timezone.now() - cls.stale_after(),
+        )
+        failed = 0
+        for job in stale:
+            if cls.objects.filter(pk=job.pk, heartbeat_at=job.heartbeat_at).update(
+                status=cls.Status.FAILED,
+                phase="finished",
+                error="The import worker stopped responding",
+                finished_at=timezone.now(),
+            ):
+                failed += 1
+                logger.warning(f"Import job {job.pk} failed: no heartbeat")
+                if job.source_type == cls.SourceType.FILE:
+                    Path(job.source).unlink(missing_ok=True)
+        return failed
+
+    @classmethod
+    def claim_next(cls) -> Optional[ImportJob]:
+        """
+        Claim the oldest queued job for the calling worker.
+
+        The claim is a conditional update, so two workers can never run the
+        same job. Stale running jobs are marked as failed first.
+
+        Returns:
+            The claimed job, or None if no job is queued.
+        """
+        cls.fail_stale()
+        for job in cls.objects.filter(status=cls.Status.QUEUED).order_by(
+            "created_at", "pk"
+        )[:10]:
+            now = timezone.now()
+            claimed = cls.objects.filter(pk=job.pk, status=cls.Status.QUEUED).update(
+                status=cls.Status.RUNNING,
+                phase="starting",
+                started_at=now,
+                heartbeat_at=now,
+            )
+            if claimed:
+                job.refresh_from_db()
+                return job
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serialize the job status for the polling endpoint.
+
+        A running job without a recent heartbeat is reported as "stale"; it is
+        only marked as failed by the next worker claim.
+
+        Returns:
+            A JSON-serializable dictionary describing the job.
+        """
+        return {
+            "id": self.pk,
+            "source_type": self.source_type,
+            "name": self.name or self.source,
+            "status": self.status,
+            "stale": self.is_stale,
+            "phase": self.phase,
+            "rows_processed": self.rows_processed,
+            "rows_per_second": round(self.rows_per_second, 1),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
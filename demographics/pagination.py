@@ -0,0 +1,200 @@
+"""
+Pagination classes for the demographics API.
+
+This module contains a keyset (cursor) pagination class whose cost per page
+does not depend on how deep the page is.
+"""
+
+import json
+from typing import Any, List, Optional, Sequence
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination on the full sort key of each row.
+
+    DRF's ``CursorPagination`` positions the cursor on the first ordering field
+    only, and skips the rows that share its value with an offset, so pages deep
+    inside a year get slower. Here the cursor holds the value of every ordering
+    field plus the primary key, and the next page is selected with a row
+    comparison that the (year, id) and (value, id) indexes answer directly.
+    No count query is run.
+
+    The ordering comes from the view's ``OrderingFilter``, so the cursor
+    follows ``?ordering=`` within the view's ``ordering_fields``.
+    """
+
+    ordering = ("year", "id")
+    # Appended to the ordering so that every row has a unique position
+    tiebreaker = "id"
+
+    def paginate_queryset(
+        self, queryset: Any, request: Any, view: Any = None
+    ) -> Optional[List[Any]]:
+        """
+        Return the page of rows after (or before) the cursor position.
+
+        Args:
+            queryset: The filtered queryset to paginate.
+            request: The current request.
+            view: The view being paginated.
+
+        Returns:
+            The rows of the page, or None if pagination is disabled.
+
+        Raises:
+            NotFound: If the cursor cannot be decoded or does not match the
+                requested ordering.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        reverse = bool(self.cursor and self.cursor.reverse)
+        ordering = (
+            [self._invert(field) for field in self.ordering]
+            if reverse
+            else list(self.ordering)
+        )
+        queryset = queryset.order_by(*ordering)
+        if self.cursor and self.cursor.position is not None:
+            queryset = queryset.filter(
+                self._after(self._decode_position(self.cursor.position), ordering)
+            )
+
+        # Fetch one extra row to find out whether there is another page
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = self.cursor.position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = bool(self.cursor and self.cursor.position)
+
+        self.display_page_controls = self.has_next or self.has_previous
+        return self.page
+
+    def get_ordering(self, request: Any, queryset: Any, view: Any) -> tuple:
+        """
+        Return the requested ordering with the primary key as a tiebreaker.
+
+        Args:
+            request: The current request.
+            queryset: The queryset being paginated.
+            view: The view being paginated.
+
+        Returns:
+            A tuple of field names usable in ``order_by``.
+        """
+        ordering = list(super().get_ordering(request, queryset, view))
+        if not any(field.lstrip("-") in ("id", "pk") for field in ordering):
+            descending = ordering[-1].startswith("-")
+            ordering.append(f"-{self.tiebreaker}" if descending else self.tiebreaker)
+        return tuple(ordering)
+
+    def get_next_link(self) -> Optional[str]:
+        """Return the link to the page after the last row of this page."""
+        if not self.has_next:
+            return None
+        if not self.page:
+            # An empty page reached backwards; continue from the same position
+            position = self.cursor.position
+        else:
+            position = self._encode_position(self.page[-1])
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self) -> Optional[str]:
+        """Return the link to the page before the first row of this page."""
+        if not self.has_previous:
+            return None
+        if not self.page:
+            position = self.cursor.position
+        else:
+            position = self._encode_position(self.page[0])
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def _encode_position(self, instance: Any) -> str:
+        """
+        Encode the ordering values of a row as a cursor position.
+
+        Args:
+            instance: A row of the page.
+
+        Returns:
+            The JSON-encoded list of the row's ordering values.
+        """
+        return json.dumps(
+            [getattr(instance, field.lstrip("-")) for field in self.ordering],
+            separators=(",", ":"),
+        )
+
+    def _decode_position(self, position: str) -> List[Any]:
+        """
+        Decode a cursor position and check it against the current ordering.
+
+        Args:
+            position: The JSON-encoded position from the cursor.
+
+        Returns:
+            The ordering values of the row the cursor points at.
+
+        Raises:
+            NotFound: If the position is malformed or was made for another
+                ordering.
+        """
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if (
+            not isinstance(values, list)
+            or len(values) != len(self.ordering)
+            or not all(isinstance(value, (int, float)) for value in values)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    @staticmethod
+    def _after(position: Sequence[Any], ordering: Sequence[str]) -> Q:
+        """
+        Build the condition selecting the rows after a position.
+
+        For an ordering (a, b, c) this is ``a > x OR (a = x AND b > y) OR
+        (a = x AND b = y AND c > z)``, with ``<`` for descending fields. The
+        bound on the first field is repeated on its own so that the database
+        can start an index range scan at the position.
+
+        Args:
+            position: The ordering values of the cursor row.
+            ordering: The ordering of the page, in query direction.
+
+        Returns:
+            The filter condition.
+        """
+        fields = [field.lstrip("-") for field in ordering]
+        lookups = ["lt" if field.startswith("-") else "gt" for field in ordering]
+
+        condition = Q()
+        for i, (field, lookup) in enumerate(zip(fields, lookups)):
+            equal = {fields[j]: position[j] for j in range(i)}
+            condition |= Q(**equal, **{f"{field}__{lookup}": position[i]})
+
+        return Q(**{f"{fields[0]}__{lookups[0]}e": position[0]}) & condition
+
+    @staticmethod
+    def _invert(field: str) -> str:
+        """Return the ordering field with its direction reversed."""
+        return field[1:] if field.startswith("-") else f"-{field}"
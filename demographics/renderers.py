@@ -0,0 +1,91 @@
+"""
+Renderers for the demographics export endpoints.
+
+The export endpoints stream their rows themselves, rendering one chunk at a
+time with these renderers. DRF uses them for content negotiation and to
+render error responses in the requested format.
+"""
+
+import csv
+import io
+import json
+from typing import Any, Dict, List, Mapping, Optional, Union
+
+from rest_framework.renderers import BaseRenderer
+
+
+def _rows(data: Union[List[Dict[str, Any]], Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Return the rows to render: the data itself, or a single object as a row."""
+    return data if isinstance(data, list) else [data]
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Renders a list of objects as newline-delimited JSON, one object per line."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[Mapping[str, Any]] = None,
+    ) -> bytes:
+        """
+        Render the data as NDJSON lines.
+
+        Args:
+            data: A list of objects, or a single object.
+            accepted_media_type: The negotiated media type.
+            renderer_context: Unused.
+
+        Returns:
+            The encoded lines.
+        """
+        if data is None:
+            return b""
+        return "".join(
+            json.dumps(row, separators=(",", ":")) + "\n" for row in _rows(data)
+        ).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    """Renders a list of objects as CSV rows, with their keys as header."""
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[Mapping[str, Any]] = None,
+    ) -> bytes:
+        """
+        Render the data as CSV rows.
+
+        Args:
+            data: A list of objects, or a single object.
+            accepted_media_type: The negotiated media type.
+            renderer_context: May hold the "fields" to write, which default
+                to the keys of the first object. If its "header" item is
+                false, the header row is left out, so that chunks of a stream
+                can be rendered separately.
+
+        Returns:
+            The encoded rows.
+        """
+        renderer_context = renderer_context or {}
+        rows = _rows(data) if data is not None else []
+        fields = renderer_context.get("fields") or (list(rows[0]) if rows else None)
+        if not fields:
+            return b""
+
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=fields)
+        if renderer_context.get("header", True):
+            writer.writeheader()
+        writer.writerows(rows)
+        return output.getvalue().encode(self.charset)
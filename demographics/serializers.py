@@ -5,6 +5,8 @@ This module contains serializers for the demographics app models,
 including DemographicStatistic and related models.
 """
 
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+
 from rest_framework import serializers
 
 from demographics.models import (
@@ -64,11 +66,64 @@ class DemographicStatisticSerializer(serializers.ModelSerializer):
         Calculate the total value for both sexes for this statistic.
 
         This method is used to populate the total_both_sexes field.
-        It uses the model's class method to get the aggregated value.
+        Views can precompute the totals of every serialized statistic and pass
+        them as the "total_both_sexes" context mapping, keyed by
+        (year, age_group_id, hd_index_id). Otherwise the model's class method
+        is used to get the aggregated value.
         """
+        totals = self.context.get("total_both_sexes")
+        if totals is not None:
+            return totals.get((obj.year, obj.age_group_id, obj.hd_index_id), 0)
+
         # Only calculate if we have enough context (we need the age group and HDI)
         if hasattr(obj, "age_group") and hasattr(obj, "hd_index"):
             return DemographicStatistic.get_aggregated_by_both_sexes(
                 year=obj.year, age_group=obj.age_group, hd_index=obj.hd_index
             )
         return None
+
+
+# Columns fetched by the list fast path. The first five are response fields,
+# the category ids key the both-sexes totals and the id positions cursors.
+STATISTIC_ROW_FIELDS = (
+    "year",
+    "age_group__name",
+    "sex__name",
+    "hd_index__name",
+    "value",
+    "age_group_id",
+    "hd_index_id",
+    "id",
+)
+
+
+def serialize_statistic_rows(
+    rows: Iterable[Tuple], totals: Mapping[Tuple[int, int, int], int]
+) -> List[Dict[str, Any]]:
+    """
+    Serialize ``values_list`` rows of statistics for a list response.
+
+    This is the lean counterpart of ``DemographicStatisticSerializer(many=True)``
+    for lists: rows are plain tuples fetched with ``STATISTIC_ROW_FIELDS``, so
+    no model instances are built and no field machinery runs per row. The
+    output has exactly the same shape as the serializer's.
+
+    Args:
+        rows: Tuples with the values of ``STATISTIC_ROW_FIELDS``.
+        totals: Both-sexes totals keyed by (year, age_group_id, hd_index_id),
+            as returned by ``get_aggregated_by_both_sexes_many``.
+
+    Returns:
+        A list of serialized statistics.
+    """
+    return [
+        {
+            "year": year,
+            "age_group": age_group,
+            "sex": sex,
+            "hd_index": hd_index,
+            "value": value,
+            "total_both_sexes": totals.get((year, age_group_id, hd_index_id), 0),
+        }
+        for year, age_group, sex, hd_index, value, age_group_id, hd_index_id, _ in rows
+    ]
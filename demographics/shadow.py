@@ -0,0 +1,271 @@
+"""
+Shadow tables for replacing a whole dataset atomically.
+
+A shadow table is an empty copy of a model's table that is loaded while the
+live table keeps serving reads. Once it is loaded, its indexes and foreign keys
+are built, and it is swapped in with a single short transaction that renames
+the live table out of the way and the shadow table, its indexes and its
+constraints to the original names. Readers see either the old or the new
+dataset, never a partially loaded one.
+
+The renames need an exclusive lock on the live table. On PostgreSQL the swap
+waits up to ``ShadowTable.LOCK_TIMEOUT`` seconds for running queries to
+finish, and queries that arrive meanwhile queue behind it, so reads can stall
+for that long; the renames themselves only touch the catalog. The replaced
+table is dropped afterwards by ``drop``, outside the swap transaction.
+
+PostgreSQL and SQLite are supported.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List, Tuple
+
+from django.db import connection
+from django.db.models.sql.datastructures import BaseTable
+
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class ShadowTable:
+    """
+    An empty copy of a model's table that can replace the live table.
+
+    On PostgreSQL the table is created with ``CREATE TABLE ... (LIKE ...)``.
+    The primary key and unique constraints are added up front so rows can be
+    upserted; secondary indexes and foreign keys are copied from the catalog
+    and built by ``finalize`` once the data is loaded. Every copied object gets
+    a temporary name that ``swap`` renames back to the original one.
+
+    On SQLite the table is created from the live table's DDL, and the
+    secondary indexes are recreated under their original names while swapping.
+    SQLite locks the whole database for writes, so the live table is dropped
+    within the swap.
+    """
+
+    # Seconds a swap waits for readers of the live table before giving up;
+    # readers arriving meanwhile wait behind it
+    LOCK_TIMEOUT = 5
+
+    def __init__(self, model: Any) -> None:
+        """
+        Initialize the shadow table.
+
+        Args:
+            model: The model whose table is replaced.
+        """
+        self.model = model
+        self.table = model._meta.db_table
+        self.name = f"{self.table}_shadow"
+        # The replaced live table, dropped after the swap
+        self.old_name = f"{self.table}_old"
+        # (temporary name, original name) pairs renamed by swap
+        self.constraints: List[Tuple[str, str]] = []
+        self.indexes: List[Tuple[str, str]] = []
+        # Index DDL recreated by swap on SQLite
+        self.index_sql: List[str] = []
+
+    def create(self) -> None:
+        """Create the shadow table, dropping a leftover one from a failed run."""
+        self.constraints, self.indexes, self.index_sql = [], [], []
+        self.drop()
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                self._create_postgresql(cursor)
+            elif connection.vendor == "sqlite":
+                self._create_sqlite(cursor)
+            else:
+                raise NotImplementedError(
+                    f"Shadow tables are not supported on {connection.vendor}"
+                )
+
+    def finalize(self) -> None:
+        """Build the secondary indexes and foreign keys of the loaded table."""
+        if connection.vendor != "postgresql":
+            return
+
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = %s::regclass AND contype = 'f'",
+                [self.table],
+            )
+            for name, definition in cursor.fetchall():
+                temporary_name = f"{self.name}_c{len(self.constraints)}"
+                cursor.execute(
+                    f"ALTER TABLE {quote(self.name)} "
+                    f"ADD CONSTRAINT {quote(temporary_name)} {definition}"
+                )
+                self.constraints.append((temporary_name, name))
+
+            # Indexes that do not back a constraint
+            cursor.execute(
+                "SELECT i.relname, x.indisunique, pg_get_indexdef(x.indexrelid) "
+                "FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid "
+                "WHERE x.indrelid = %s::regclass AND NOT EXISTS ("
+                "SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)",
+                [self.table],
+            )
+            for name, unique, definition in cursor.fetchall():
+                temporary_name = f"{self.name}_i{len(self.indexes)}"
+                method = definition.split(" USING ", 1)[1]
+                cursor.execute(
+                    f"CREATE {'UNIQUE ' if unique else ''}INDEX {quote(temporary_name)} "
+                    f"ON {quote(self.name)} USING {method}"
+                )
+                self.indexes.append((temporary_name, name))
+
+            cursor.execute(f"ANALYZE {quote(self.name)}")
+
+    def count(self) -> int:
+        """Return the number of rows in the shadow table."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {connection.ops.quote_name(self.name)}"
+            )
+            return cursor.fetchone()[0]
+
+    def values(self, queryset: Any) -> List[Dict[str, Any]]:
+        """
+        Run a ``values()`` query of the model against the shadow table.
+
+        The query's base table is pointed at the shadow table under the live
+        table's alias, so columns, joins and filters resolve unchanged.
+
+        Args:
+            queryset: A ``values()`` queryset of the model, which may join
+                other tables.
+
+        Returns:
+            The rows of the query, as dictionaries keyed by field name.
+        """
+        queryset = queryset.all()
+        alias = queryset.query.get_initial_alias()
+        queryset.query.alias_map[alias] = BaseTable(self.name, alias)
+        return list(queryset)
+
+    def swap(self) -> None:
+        """
+        Replace the live table with the shadow table.
+
+        Must be called inside a transaction so readers never see the live
+        table missing. On PostgreSQL the replaced table is kept under
+        ``old_name`` until ``drop`` is called after the transaction.
+        """
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    "SELECT pg_get_serial_sequence(%s, %s)",
+                    [self.table, self.model._meta.pk.column],
+                )
+                sequence = cursor.fetchone()[0]
+
+                cursor.execute(f"SET LOCAL lock_timeout = '{self.LOCK_TIMEOUT}s'")
+                cursor.execute(
+                    f"ALTER TABLE {quote(self.table)} RENAME TO {quote(self.old_name)}"
+                )
+                # Free the original names, which are unique per schema
+                for number, (temporary_name, name) in enumerate(self.constraints):
+                    cursor.execute(
+                        f"ALTER TABLE {quote(self.old_name)} RENAME CONSTRAINT "
+                        f"{quote(name)} TO {quote(f'{self.old_name}_c{number}')}"
+                    )
+                    cursor.execute(
+                        f"ALTER TABLE {quote(self.name)} "
+                        f"RENAME CONSTRAINT {quote(temporary_name)} TO {quote(name)}"
+                    )
+                for number, (temporary_name, name) in enumerate(self.indexes):
+                    cursor.execute(
+                        f"ALTER INDEX {quote(name)} "
+                        f"RENAME TO {quote(f'{self.old_name}_i{number}')}"
+                    )
+                    cursor.execute(
+                        f"ALTER INDEX {quote(temporary_name)} RENAME TO {quote(name)}"
+                    )
+                cursor.execute(
+                    f"ALTER TABLE {quote(self.name)} RENAME TO {quote(self.table)}"
+                )
+                if sequence:
+                    sequence_name = sequence.rsplit(".", 1)[-1].strip('"')
+                    cursor.execute(
+                        f"ALTER SEQUENCE {sequence} "
+                        f"RENAME TO {quote(f'{self.old_name}_seq')}"
+                    )
+                    cursor.execute(
+                        "SELECT pg_get_serial_sequence(%s, %s)",
+                        [self.table, self.model._meta.pk.column],
+                    )
+                    cursor.execute(
+                        f"ALTER SEQUENCE {cursor.fetchone()[0]} "
+                        f"RENAME TO {quote(sequence_name)}"
+                    )
+            else:
+                cursor.execute(f"DROP TABLE {quote(self.table)}")
+                cursor.execute(
+                    f"ALTER TABLE {quote(self.name)} RENAME TO {quote(self.table)}"
+                )
+                for sql in self.index_sql:
+                    cursor.execute(sql)
+
+        logger.info(f"Swapped {self.name} in as {self.table}")
+
+    def drop(self) -> None:
+        """Drop the shadow table and the table it replaced if they exist."""
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {quote(self.name)}")
+            cursor.execute(f"DROP TABLE IF EXISTS {quote(self.old_name)}")
+
+    def _create_postgresql(self, cursor: Any) -> None:
+        """
+        Create the shadow table on PostgreSQL.
+
+        Args:
+            cursor: A database cursor.
+        """
+        quote = connection.ops.quote_name
+        cursor.execute(
+            f"CREATE TABLE {quote(self.name)} (LIKE {quote(self.table)} "
+            f"INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING CONSTRAINTS)"
+        )
+
+        # Upserts need the primary key and unique constraints while loading
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype IN ('p', 'u') ORDER BY contype",
+            [self.table],
+        )
+        for name, definition in cursor.fetchall():
+            temporary_name = f"{self.name}_c{len(self.constraints)}"
+            cursor.execute(
+                f"ALTER TABLE {quote(self.name)} "
+                f"ADD CONSTRAINT {quote(temporary_name)} {definition}"
+            )
+            self.constraints.append((temporary_name, name))
+
+    def _create_sqlite(self, cursor: Any) -> None:
+        """
+        Create the shadow table on SQLite.
+
+        The table is created from the live table's DDL, which includes the
+        primary key, unique constraints and foreign keys.
+
+        Args:
+            cursor: A database cursor.
+        """
+        quote = connection.ops.quote_name
+        cursor.execute(
+            "SELECT type, sql FROM sqlite_master "
+            "WHERE tbl_name = %s AND sql IS NOT NULL",
+            [self.table],
+        )
+        for object_type, sql in cursor.fetchall():
+            if object_type == "table":
+                cursor.execute(sql.replace(quote(self.table), quote(self.name), 1))
+            elif object_type == "index":
+                self.index_sql.append(sql)
@@ -7,7 +7,8 @@ This module contains URL patterns for the demographics app API endpoints.
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from demographics.views import DemographicStatisticViewSet
+from demographics.renderers import CSVRenderer, NDJSONRenderer
+from demographics.views import DemographicStatisticViewSet, response_cache_stats
 
 # Create a router and register our viewsets with it
 router = DefaultRouter()
@@ -15,5 +16,21 @@ router.register(r"demographics", DemographicStatisticViewSet, basename="demograp
 
 # The API URLs are determined automatically by the router
 urlpatterns = [
+    # Streaming exports of the whole filtered dataset
+    path(
+        "demographics/export.ndjson",
+        DemographicStatisticViewSet.as_view(
+            {"get": "export"}, renderer_classes=[NDJSONRenderer]
+        ),
+        name="demographics-export-ndjson",
+    ),
+    path(
+        "demographics/export.csv",
+        DemographicStatisticViewSet.as_view(
+            {"get": "export"}, renderer_classes=[CSVRenderer]
+        ),
+        name="demographics-export-csv",
+    ),
+    path("cache-stats/", response_cache_stats, name="response-cache-stats"),
     path("", include(router.urls)),
 ]
@@ -4,15 +4,37 @@ Views for the demographics app.
 This module contains API views for the demographics app models.
 """
 
+import math
+
+import numpy as np
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import require_http_methods
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
 from django_filters import rest_framework as filters
+from django_filters.utils import translate_validation
 from rest_framework.filters import OrderingFilter
 
-from demographics.models import DemographicStatistic
-from demographics.serializers import DemographicStatisticSerializer
+from demographics.caching import dataset_cache, get_dataset_state, response_cache
+from demographics.cube import DIMENSIONS, get_cube, growth_metrics
+from demographics.dimensions import get_dimensions
+from demographics.models import DemographicStatistic, DemographicStatisticQuerySet
+from demographics.pagination import KeysetPagination
+from demographics.serializers import (
+    STATISTIC_ROW_FIELDS,
+    DemographicStatisticSerializer,
+    serialize_statistic_rows,
+)
 from demographics.filters import DemographicStatisticFilter
 
 
+@method_decorator(
+    dataset_cache(proxy_cache=True, public=True, no_cache=True), name="dispatch"
+)
 class DemographicStatisticViewSet(viewsets.ReadOnlyModelViewSet):
     """
     API endpoint that allows demographic statistics to be viewed.
@@ -24,9 +46,37 @@ class DemographicStatisticViewSet(viewsets.ReadOnlyModelViewSet):
     - age_group: Filter by age group name (e.g., "0 - 4 years")
     - sex: Filter by sex name (e.g., "Male", "Female")
     - hd_index: Filter by HDI category name (e.g., "High Human Development Index (HDI)")
+    - ordering: Sort by "year" or "value", prefixed with "-" for descending
+    - pagination: "page" (default) or "cursor"
+
+    Lists are paginated by page number by default. Clients walking deep into
+    the results can pass ``pagination=cursor`` to get a keyset cursor instead:
+    the response has "next" and "previous" links (which keep the mode) but no
+    "count", and every page costs the same to fetch.
 
     The response includes the aggregated total for both sexes when filtering
-    by age group and HDI category.
+    by age group and HDI category. The totals of a whole page are read with a
+    single query, so the number of queries does not grow with the page size.
+    Lists are read as ``values_list`` rows and serialized without building
+    model instances; the detail endpoint uses the regular serializer.
+
+    The ``summary`` endpoint returns the count, total and average of every
+    statistic matching the same filters, and their totals by year, age
+    group, sex and HDI category, as used by the dashboard charts.
+
+    The ``aggregate`` endpoint aggregates the matching statistics by any
+    combination of dimensions with one ``GROUP BY`` query:
+    - group_by: Comma-separated dimensions (e.g., "year,sex")
+    - metric: "sum" (default), "avg", "min", "max" or "count"
+    - pivot: One of the group_by dimensions to spread into columns
+
+    The ``timeseries`` endpoint returns the totals of the matching statistics
+    per year, in one series per combination of the ``group_by`` categories,
+    with the year-over-year change and compound annual growth rate of each.
+
+    Responses carry an ETag and Last-Modified derived from the dataset
+    version, and conditional requests for unchanged data get 304 Not Modified
+    after a single query (see ``demographics.caching``).
     """
 
     queryset = DemographicStatistic.objects.select_related(
@@ -37,3 +87,403 @@ class DemographicStatisticViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_class = DemographicStatisticFilter
     ordering_fields = ["year", "value"]
     ordering = ["year"]
+    pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    # Rows fetched from the database cursor, and serialized, at a time by exports
+    export_chunk_size = 2000
+    pagination_modes = {
+        "cursor": KeysetPagination,
+        "page": api_settings.DEFAULT_PAGINATION_CLASS,
+    }
+    # Groupings of the summary endpoint, by response key
+    summary_groupings = {
+        "by_year": ("year",),
+        "by_age_group": ("age_group",),
+        "by_sex": ("sex",),
+        "by_hd_index": ("hd_index",),
+        "by_hd_index_and_sex": ("hd_index", "sex"),
+    }
+
+    @property
+    def paginator(self):
+        """
+        Return the paginator for the pagination mode requested by the client.
+
+        Raises:
+            ValidationError: If the requested pagination mode is unknown.
+        """
+        if not hasattr(self, "_paginator"):
+            params = self.request.query_params
+            mode = params.get("pagination", "cursor" if "cursor" in params else "page")
+            if mode not in self.pagination_modes:
+                raise ValidationError(
+                    {
+                        "error": f"Invalid pagination parameter: '{mode}' is not "
+                        f"supported. Please use one of: {', '.join(self.pagination_modes)}."
+                    }
+                )
+            self._paginator = self.pagination_modes[mode]()
+        return self._paginator
+
+    def list(self, request, *args, **kwargs):
+        """
+        List statistics through the response cache and the ``values_list`` fast path.
+
+        Cached data is returned for requests with the same parameters and
+        dataset version; the X-Response-Cache header tells which tier served
+        the response. Otherwise the rows are read and serialized; the
+        response has the same shape as ``DemographicStatisticSerializer``
+        output, see ``serialize_statistic_rows``.
+        """
+        data, tier = response_cache.get(request._request)
+        if data is not None:
+            return Response(data, headers={"X-Response-Cache": tier})
+
+        response = self._list(request)
+        response_cache.set(request._request, response.data)
+        response["X-Response-Cache"] = "miss"
+        return response
+
+    def _list(self, request):
+        """Read and serialize a list response."""
+        queryset = self.filter_queryset(self.get_queryset()).values_list(
+            *STATISTIC_ROW_FIELDS, named=True
+        )
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+        data = serialize_statistic_rows(
+            rows,
+            DemographicStatistic.get_aggregated_by_both_sexes_many(
+                (row.year, row.age_group_id, row.hd_index_id) for row in rows
+            ),
+        )
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    @action(detail=False, pagination_class=None)
+    def summary(self, request, *args, **kwargs):
+        """
+        Summarize every statistic matching the filters.
+
+        The totals are read from the in-memory statistics cube, so the
+        request costs the dataset version lookup of the conditional request
+        handling and no query on the statistics. Categories flagged as
+        aggregates are excluded from every grouping, unless selected by a
+        filter, so no statistic is counted twice.
+        """
+        selected = self._selected_dimensions(self._filterset(request))
+        state = get_dataset_state(request._request)
+        cube = get_cube(state["version"], state["updated_at"]) if state else get_cube()
+
+        overall = cube.group((), **selected)
+        count = overall[0]["count"] if overall else 0
+        total = overall[0]["total"] if overall else 0
+        data = {
+            "count": count,
+            "total": total,
+            "average": total / count if count else None,
+        }
+        for key, by in self.summary_groupings.items():
+            data[key] = cube.group(by, **selected)
+        return Response(data)
+
+    @action(detail=False, pagination_class=None)
+    def aggregate(self, request, *args, **kwargs):
+        """
+        Aggregate the statistics matching the filters by some dimensions.
+
+        The groups are computed by a single ``GROUP BY`` query and their
+        category ids are named with the dimension registry. Categories
+        flagged as aggregates are excluded from every dimension not selected
+        by a filter, like the ``get_aggregated_by_*`` methods, so no
+        statistic is counted twice.
+
+        The response lists the groups under "results", or, with ``pivot``,
+        one row per group of the other dimensions with the values of each
+        "columns" entry of the pivot dimension (null where there is no data).
+        """
+        params = request.query_params
+        group_by = self._group_by(request, DIMENSIONS)
+        metric = params.get("metric", "sum")
+        pivot = params.get("pivot") or None
+        if metric not in DemographicStatisticQuerySet.METRICS:
+            self._invalid_aggregate_parameter(
+                "metric", metric, DemographicStatisticQuerySet.METRICS
+            )
+        if pivot is not None and pivot not in group_by:
+            self._invalid_aggregate_parameter("pivot", pivot, group_by)
+
+        filterset = self._filterset(request)
+        selected = self._selected_dimensions(filterset)
+        registry = get_dimensions(request)
+        queryset = filterset.qs
+        for name in DIMENSIONS[1:]:
+            aggregates = [
+                pk for pk, _, is_aggregate in registry.categories(name) if is_aggregate
+            ]
+            if name not in selected and aggregates:
+                queryset = queryset.exclude(**{f"{name}_id__in": aggregates})
+
+        rows = queryset.grouped(group_by, metric)
+        fields = {
+            name: "year" if name == "year" else f"{name}_id" for name in DIMENSIONS
+        }
+
+        def label(name, key):
+            return key if name == "year" else registry.name(name, key)
+
+        data = {"group_by": group_by, "metric": metric}
+        if pivot is None:
+            data["results"] = [
+                {
+                    **{name: label(name, row[fields[name]]) for name in group_by},
+                    "value": row["value"],
+                }
+                for row in rows
+            ]
+            return Response(data)
+
+        # Columns and rows follow the order of the years and category ids
+        column_keys = sorted({row[fields[pivot]] for row in rows})
+        positions = {key: i for i, key in enumerate(column_keys)}
+        others = [name for name in group_by if name != pivot]
+        matrix = {}
+        for row in rows:
+            key = tuple(row[fields[name]] for name in others)
+            if key not in matrix:
+                matrix[key] = {
+                    **{name: label(name, row[fields[name]]) for name in others},
+                    "values": [None] * len(column_keys),
+                }
+            matrix[key]["values"][positions[row[fields[pivot]]]] = row["value"]
+
+        data["pivot"] = pivot
+        data["columns"] = [label(pivot, key) for key in column_keys]
+        data["rows"] = [matrix[key] for key in sorted(matrix)]
+        return Response(data)
+
+    @action(detail=False, pagination_class=None)
+    def timeseries(self, request, *args, **kwargs):
+        """
+        Return the series of totals over the years with their growth.
+
+        The statistics matching the filters are summed into one series per
+        combination of the ``group_by`` categories (e.g., "age_group,hd_index";
+        a single series without it), with aggregate categories handled as by
+        ``summary``. For each series the response has its "values" per year
+        of "years", the absolute "change" and "percent_change" from the
+        previous year, and the compound annual growth rate "cagr" in percent,
+        null where undefined.
+
+        The series are read from the in-memory statistics cube and the growth
+        of all of them is computed with vectorized NumPy operations, so the
+        request runs no query on the statistics.
+        """
+        group_by = self._group_by(request, DIMENSIONS[1:])
+        selected = self._selected_dimensions(self._filterset(request))
+        state = get_dataset_state(request._request)
+        cube = get_cube(state["version"], state["updated_at"]) if state else get_cube()
+
+        years, keys, totals, present = cube.timeseries(group_by, **selected)
+        metrics = growth_metrics(years, totals, present)
+        values = np.where(present, totals, np.nan)
+        cagr = self._nullable(metrics["cagr"])
+        series = [
+            {
+                **key,
+                "values": self._nullable(values[i]),
+                "change": self._nullable(metrics["change"][i]),
+                "percent_change": self._nullable(metrics["percent_change"][i]),
+                "cagr": cagr[i],
+            }
+            for i, key in enumerate(keys)
+        ]
+        return Response({"group_by": group_by, "years": years, "series": series})
+
+    @staticmethod
+    def _nullable(array):
+        """Convert an array of numbers to a list, with None for NaN."""
+        return [
+            None if math.isnan(value) else int(value) if value.is_integer() else value
+            for value in array.tolist()
+        ]
+
+    def _group_by(self, request, choices):
+        """
+        Parse the comma-separated ``group_by`` parameter.
+
+        Args:
+            request: The current request.
+            choices: The dimensions that can be grouped by.
+
+        Returns:
+            The dimensions to group by, in the requested order.
+
+        Raises:
+            ValidationError: If a dimension is not one of the choices or is
+                repeated.
+        """
+        group_by = [
+            name.strip()
+            for name in request.query_params.get("group_by", "").split(",")
+            if name.strip()
+        ]
+        for name in group_by:
+            if name not in choices:
+                self._invalid_aggregate_parameter("group_by", name, choices)
+        if len(set(group_by)) != len(group_by):
+            raise ValidationError(
+                {"error": "Invalid group_by parameter: a dimension is repeated."}
+            )
+        return group_by
+
+    @staticmethod
+    def _invalid_aggregate_parameter(name, value, choices):
+        """
+        Reject an aggregation parameter with the API's error format.
+
+        Raises:
+            ValidationError: Always.
+        """
+        raise ValidationError(
+            {
+                "error": f"Invalid {name} parameter: '{value}' is not supported. "
+                f"Please use one of: {', '.join(choices)}."
+            }
+        )
+
+    def _filterset(self, request):
+        """
+        Build the filterset of a request and validate its parameters.
+
+        Args:
+            request: The current request.
+
+        Returns:
+            The validated ``DemographicStatisticFilter``.
+
+        Raises:
+            ValidationError: If a parameter is malformed or names an unknown
+                category, with the same errors as the list endpoint.
+        """
+        filterset = filters.DjangoFilterBackend().get_filterset(
+            request, self.get_queryset(), self
+        )
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        # Building the (unevaluated) queryset runs the filter methods, which
+        # reject unknown category names; is_valid only checks the field types
+        _ = filterset.qs
+        return filterset
+
+    @staticmethod
+    def _selected_dimensions(filterset):
+        """Return the year and category names filtered by, keyed by dimension."""
+        return {
+            name: value
+            for name, value in filterset.form.cleaned_data.items()
+            if value not in (None, "")
+        }
+
+    def export(self, request, *args, **kwargs):
+        """
+        Stream every statistic matching the filters in the negotiated format.
+
+        Mounted at ``export.ndjson`` and ``export.csv`` with the matching
+        renderer. The rows are read from a server-side cursor and serialized
+        ``export_chunk_size`` at a time, with one query for the both-sexes
+        totals of each chunk, so memory use does not grow with the result
+        and the first rows are sent before the rest are read.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        # Order ties by id, so exports are repeatable and follow the (year, id) index
+        queryset = queryset.order_by(*queryset.query.order_by, "id").values_list(
+            *STATISTIC_ROW_FIELDS, named=True
+        )
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            self._export_chunks(queryset, renderer),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="demographics.{renderer.format}"'
+        )
+        return response
+
+    def _export_chunks(self, queryset, renderer):
+        """
+        Yield the rendered chunks of an export.
+
+        Args:
+            queryset: A values_list queryset of ``STATISTIC_ROW_FIELDS``.
+            renderer: The renderer encoding each chunk.
+
+        Yields:
+            The encoded rows of each chunk.
+        """
+        chunk = []
+        header = True
+        for row in queryset.iterator(chunk_size=self.export_chunk_size):
+            chunk.append(row)
+            if len(chunk) == self.export_chunk_size:
+                yield self._render_chunk(chunk, renderer, header)
+                chunk = []
+                header = False
+        if chunk or header:
+            yield self._render_chunk(chunk, renderer, header)
+
+    @staticmethod
+    def _render_chunk(chunk, renderer, header):
+        """
+        Serialize and render one chunk of export rows.
+
+        Args:
+            chunk: Rows with the values of ``STATISTIC_ROW_FIELDS``.
+            renderer: The renderer encoding the rows.
+            header: Whether this is the first chunk, which carries the header
+                in formats that have one.
+
+        Returns:
+            The encoded rows.
+        """
+        data = serialize_statistic_rows(
+            chunk,
+            DemographicStatistic.get_aggregated_by_both_sexes_many(
+                (row.year, row.age_group_id, row.hd_index_id) for row in chunk
+            ),
+        )
+        return renderer.render(
+            data,
+            renderer_context={
+                "header": header,
+                "fields": DemographicStatisticSerializer.Meta.fields,
+            },
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        """
+        Return a serializer with the both-sexes totals of its statistics precomputed.
+
+        The totals of the statistics (many) or the object (retrieve) being
+        serialized are passed to the serializer in the "total_both_sexes" context mapping.
+        """
+        if args and not kwargs.get("data"):
+            statistics = args[0] if kwargs.get("many") else [args[0]]
+            kwargs["context"] = {
+                **self.get_serializer_context(),
+                "total_both_sexes": DemographicStatistic.get_aggregated_by_both_sexes_many(
+                    (statistic.year, statistic.age_group_id, statistic.hd_index_id)
+                    for statistic in statistics
+                ),
+            }
+        return super().get_serializer(*args, **kwargs)
+
+
+@require_http_methods(["GET"])
+def response_cache_stats(request):
+    """
+    Return the hit and miss statistics of this process's response cache.
+
+    The statistics are per process, so each web worker reports its own.
+    """
+    return JsonResponse(response_cache.stats())
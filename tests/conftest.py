@@ -1,5 +1,13 @@
+from pathlib import Path
+
 import pytest
 
+from demographics.caching import response_cache
+from demographics.cube import clear_cube
+from demographics.dimensions import clear_dimensions
+from demographics.importers import DemographicsCSVImporter
+from demographics.models import AgeGroup, HDIndex, Sex
+
 
 @pytest.fixture(scope="session")
 def django_db_setup(django_db_setup, django_db_blocker):
@@ -12,6 +20,23 @@ def django_db_setup(django_db_setup, django_db_blocker):
         pass
 
 
+@pytest.fixture(autouse=True)
+def clear_statistics_cube(settings, tmp_path):
+    """
+    Drop the cached statistics cube and dimension registry around each test.
+
+    Rolled-back test transactions reset the dataset version, so a cube cached
+    by one test could otherwise match the version of another test's data. The
+    cube snapshot is written to a per-test directory for the same reason.
+    """
+    settings.CUBE_SNAPSHOT_PATH = tmp_path / "cube.snapshot"
+    clear_cube()
+    clear_dimensions()
+    yield
+    clear_cube()
+    clear_dimensions()
+
+
 @pytest.fixture
 def age_group_data():
     """
@@ -49,3 +74,50 @@ def hd_index_data():
         {"name": "Low Human Development Index (HDI)", "is_aggregate": False},
         {"name": "Very High Human Development Index (HDI)", "is_aggregate": False},
     ]
+
+
+@pytest.fixture
+def categories(db, age_group_data, sex_data, hd_index_data):
+    """
+    Fixture creating the sample categories, returned by name.
+    """
+    categories = {}
+    for model, data in (
+        (AgeGroup, age_group_data),
+        (Sex, sex_data),
+        (HDIndex, hd_index_data),
+    ):
+        for item in data:
+            categories[item["name"]] = model.objects.create(
+                name=item["name"], is_aggregate=item["is_aggregate"]
+            )
+    return categories
+
+
+@pytest.fixture
+def sample_csv_path():
+    """
+    Fixture providing the path to the sample CSV file.
+    """
+    return Path(__file__).parent / "fixtures" / "sample_demographics.csv"
+
+
+@pytest.fixture
+def sample_import(db, sample_csv_path):
+    """
+    Fixture importing the sample CSV file and returning the import result.
+    """
+    return DemographicsCSVImporter().import_from_file(sample_csv_path)
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    """
+    Empty the API response cache around each test.
+
+    Like the cube, cached responses are keyed by the dataset version, which
+    rolled-back test transactions reset.
+    """
+    response_cache.clear()
+    yield
+    response_cache.clear()
@@ -5,12 +5,24 @@ This module contains tests for the Demographics API endpoints, including
 filtering by various parameters and aggregation of statistics.
 """
 
+import base64
+import csv
+import json
+from io import StringIO
+
 import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from demographics.caching import response_cache
 from demographics.models import AgeGroup, Sex, HDIndex, DemographicStatistic
+from demographics.pagination import KeysetPagination
+from demographics.serializers import DemographicStatisticSerializer
+from demographics.views import DemographicStatisticViewSet
 
 
 @pytest.mark.django_db
@@ -232,3 +244,594 @@ class TestDemographicsAPI:
         assert "error" in response.data
         assert "age_group" in response.data["error"]
         assert "Non-existent Age Group" in response.data["error"]
+
+    def test_list_query_count_is_constant(self, api_client, setup_data):
+        """Test that the number of queries does not grow with the page size."""
+        url = reverse("demographics-list")
+
+        with CaptureQueriesContext(connection) as small_page:
+            response = api_client.get(url)
+        assert len(response.data["results"]) == 16
+
+        # Add another year of statistics to fill a larger page
+        for statistic in DemographicStatistic.objects.filter(year=2023):
+            DemographicStatistic.objects.create(
+                year=2024,
+                age_group=statistic.age_group,
+                sex=statistic.sex,
+                hd_index=statistic.hd_index,
+                value=statistic.value + 1,
+            )
+
+        with CaptureQueriesContext(connection) as large_page:
+            response = api_client.get(url)
+        assert len(response.data["results"]) == 24
+
+        assert len(large_page.captured_queries) == len(small_page.captured_queries)
+        for item in response.data["results"]:
+            assert item["total_both_sexes"] == sum(
+                other["value"]
+                for other in response.data["results"]
+                if (other["year"], other["age_group"], other["hd_index"])
+                == (item["year"], item["age_group"], item["hd_index"])
+            )
+
+    def test_retrieve_total_both_sexes(self, api_client, setup_data):
+        """Test that the detail endpoint includes the total for both sexes."""
+        statistic = DemographicStatistic.objects.get(
+            year=2022,
+            age_group=setup_data["age_groups"]["age_group_1"],
+            sex=setup_data["sexes"]["male"],
+            hd_index=setup_data["hd_indices"]["high_hdi"],
+        )
+        url = reverse("demographics-detail", args=[statistic.pk])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["total_both_sexes"] == 190
+        # Dataset version, statistic and rollup
+        assert len(queries.captured_queries) == 3
+
+    @staticmethod
+    def _key(item):
+        """Return the natural key of a serialized or model statistic."""
+        if isinstance(item, DemographicStatistic):
+            return (
+                item.year,
+                item.age_group.name,
+                item.sex.name,
+                item.hd_index.name,
+            )
+        return (item["year"], item["age_group"], item["sex"], item["hd_index"])
+
+    def _walk(self, api_client, params, page_size, monkeypatch):
+        """Follow the cursor next links from the first page and return every page."""
+        monkeypatch.setattr(KeysetPagination, "page_size", page_size)
+        pages = []
+        response = api_client.get(
+            reverse("demographics-list"), {**params, "pagination": "cursor"}
+        )
+        while True:
+            assert response.status_code == status.HTTP_200_OK
+            pages.append(response.data)
+            if not response.data["next"]:
+                return pages
+            response = api_client.get(response.data["next"])
+
+    def test_cursor_pagination_on_request(self, api_client, setup_data):
+        """Test that cursor pages are read without a count query."""
+        url = reverse("demographics-list")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(url, {"pagination": "cursor"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert "count" not in response.data
+        assert response.data["next"] is None
+        assert response.data["previous"] is None
+        assert len(response.data["results"]) == 16
+        assert not any("COUNT(" in query["sql"] for query in queries.captured_queries)
+
+    def test_cursor_pagination_walks_every_row(
+        self, api_client, setup_data, monkeypatch
+    ):
+        """Test that following next links returns each row once, in order."""
+        pages = self._walk(api_client, {}, 5, monkeypatch)
+
+        assert [len(page["results"]) for page in pages] == [5, 5, 5, 1]
+        rows = [self._key(item) for page in pages for item in page["results"]]
+        assert rows == [
+            self._key(statistic)
+            for statistic in DemographicStatistic.objects.order_by("year", "id")
+        ]
+
+    def test_cursor_pagination_follows_ordering(
+        self, api_client, setup_data, monkeypatch
+    ):
+        """Test that the cursor follows the requested ordering and filters."""
+        pages = self._walk(
+            api_client, {"ordering": "-value", "year": 2023}, 3, monkeypatch
+        )
+
+        rows = [self._key(item) for page in pages for item in page["results"]]
+        assert rows == [
+            self._key(statistic)
+            for statistic in DemographicStatistic.objects.filter(year=2023).order_by(
+                "-value", "-id"
+            )
+        ]
+
+    def test_cursor_pagination_previous_link(self, api_client, setup_data, monkeypatch):
+        """Test that previous links return the preceding pages."""
+        pages = self._walk(api_client, {}, 5, monkeypatch)
+
+        response = api_client.get(pages[-1]["previous"])
+        assert response.data["results"] == pages[-2]["results"]
+        response = api_client.get(response.data["previous"])
+        assert response.data["results"] == pages[-3]["results"]
+        response = api_client.get(response.data["previous"])
+        assert response.data["results"] == pages[0]["results"]
+        assert response.data["previous"] is None
+        assert response.data["next"] == pages[0]["next"]
+
+    def test_invalid_cursor_returns_not_found(self, api_client, setup_data):
+        """Test that a malformed or mismatched cursor is rejected."""
+        url = reverse("demographics-list")
+
+        response = api_client.get(url, {"cursor": "not-a-cursor"})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+        # The position must hold a value for each of year and id
+        encoded = base64.b64encode(b"p=%5B2022%5D").decode("ascii")
+        response = api_client.get(url, {"cursor": encoded})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_page_number_pagination_is_default(self, api_client, setup_data):
+        """Test that existing clients keep the page-number format."""
+        url = reverse("demographics-list")
+
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == 16
+        assert response.data["next"] is None
+        assert len(response.data["results"]) == 16
+
+        # A cursor from a next link selects cursor pagination on its own
+        response = api_client.get(url, {"cursor": "not-a-cursor"})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+        response = api_client.get(url, {"pagination": "offset"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "pagination" in response.data["error"]
+
+    def test_list_fast_path_matches_serializer(self, api_client, setup_data):
+        """Test that list rows have exactly the serializer's JSON shape."""
+        response = api_client.get(reverse("demographics-list"), {"ordering": "value"})
+
+        expected = DemographicStatisticSerializer(
+            DemographicStatistic.objects.order_by("value", "id"), many=True
+        ).data
+        assert response.json()["results"] == [dict(item) for item in expected]
+
+    def test_benchmark_serializers_command(self):
+        """Test that the serializer benchmark reports matching outputs."""
+        out = StringIO()
+        call_command("benchmark_serializers", rows=[10, 200], stdout=out)
+        output = out.getvalue()
+
+        assert "10 rows: serializer" in output
+        assert "200 rows: serializer" in output
+        assert "differ" not in output
+
+    def test_export_ndjson(self, api_client, setup_data):
+        """Test that the NDJSON export streams the filtered list rows."""
+        response = api_client.get(reverse("demographics-export-ndjson"), {"year": 2023})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        assert response["Content-Type"].startswith("application/x-ndjson")
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).decode().splitlines()
+        ]
+        expected = api_client.get(
+            reverse("demographics-list"), {"year": 2023, "ordering": "year"}
+        ).json()["results"]
+        assert rows == expected
+
+    def test_export_csv(self, api_client, setup_data):
+        """Test that the CSV export has a header and one line per statistic."""
+        response = api_client.get(reverse("demographics-export-csv"), {"sex": "Male"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"].startswith("text/csv")
+        assert 'filename="demographics.csv"' in response["Content-Disposition"]
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(StringIO(content)))
+        assert content.splitlines()[0] == (
+            "year,age_group,sex,hd_index,value,total_both_sexes"
+        )
+        assert len(rows) == 8
+        assert {row["sex"] for row in rows} == {"Male"}
+
+        response = api_client.get(reverse("demographics-export-csv"), {"year": 1900})
+        assert b"".join(response.streaming_content).decode().splitlines() == [
+            "year,age_group,sex,hd_index,value,total_both_sexes"
+        ]
+
+    def test_export_queries_per_chunk(self, api_client, setup_data, monkeypatch):
+        """Test that exports read in chunks with one totals query per chunk."""
+        monkeypatch.setattr(DemographicStatisticViewSet, "export_chunk_size", 5)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(reverse("demographics-export-ndjson"))
+            content = b"".join(response.streaming_content)
+
+        assert len(content.splitlines()) == 16
+        # The dataset version, one statistics query and one rollup query for
+        # each of the 4 chunks
+        assert len(queries.captured_queries) == 6
+
+    def test_export_invalid_filter(self, api_client, setup_data):
+        """Test that exports reject invalid filters like the list endpoint."""
+        response = api_client.get(
+            reverse("demographics-export-ndjson"), {"sex": "Unknown"}
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "sex" in json.loads(response.content)["error"]
+
+    def test_conditional_requests(self, api_client, setup_data):
+        """Test that unchanged data is answered with 304 after one query."""
+        url = reverse("demographics-list")
+        response = api_client.get(url, HTTP_ACCEPT="application/json")
+
+        assert response.status_code == status.HTTP_200_OK
+        etag = response["ETag"]
+        assert etag.startswith('"') and not etag.startswith("W/")
+        assert response["Last-Modified"]
+        assert "public" in response["Cache-Control"]
+        assert "no-cache" in response["Cache-Control"]
+        assert response["X-Accel-Expires"] == "30"
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(
+                url, HTTP_ACCEPT="application/json", HTTP_IF_NONE_MATCH=etag
+            )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert len(queries.captured_queries) == 1
+
+        # Another representation of the same data has another tag
+        response = api_client.get(url, HTTP_ACCEPT="text/html")
+        assert response["ETag"] != etag
+
+        statistic = DemographicStatistic.objects.first()
+        statistic.value += 1
+        statistic.save()
+        response = api_client.get(
+            url, HTTP_ACCEPT="application/json", HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+
+    def test_conditional_export(self, api_client, setup_data):
+        """Test that exports are validated by the dataset version too."""
+        url = reverse("demographics-export-csv")
+        etag = api_client.get(url)["ETag"]
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_response_cache(self, api_client, setup_data):
+        """Test that repeated list requests are served from the local tier."""
+        url = reverse("demographics-list")
+        response = api_client.get(url, {"year": 2023, "sex": "Male"})
+        assert response["X-Response-Cache"] == "miss"
+
+        # The same parameters in another order hit the cache
+        with CaptureQueriesContext(connection) as queries:
+            cached = api_client.get(url, {"sex": "Male", "year": 2023})
+        assert cached["X-Response-Cache"] == "local"
+        assert cached.json() == response.json()
+        # Only the dataset version is read
+        assert len(queries.captured_queries) == 1
+
+        stats = api_client.get(reverse("response-cache-stats")).json()
+        assert stats["local_hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == stats["miss_ratio"] == 0.5
+
+    def test_response_cache_invalidated_by_changes(self, api_client, setup_data):
+        """Test that a change of the statistics invalidates cached responses."""
+        url = reverse("demographics-list")
+        api_client.get(url, {"year": 2022})
+
+        DemographicStatistic.objects.filter(year=2022).update(value=7)
+
+        response = api_client.get(url, {"year": 2022})
+        assert response["X-Response-Cache"] == "miss"
+        assert {item["value"] for item in response.json()["results"]} == {7}
+
+    def test_response_cache_limits(self, api_client, setup_data, settings):
+        """Test that the local tier evicts the least recently used entries."""
+        settings.RESPONSE_CACHE_MAX_ENTRIES = 2
+        url = reverse("demographics-list")
+        for year in (2022, 2023, 2024):
+            api_client.get(url, {"year": year})
+
+        assert api_client.get(url, {"year": 2022})["X-Response-Cache"] == "miss"
+        assert api_client.get(url, {"year": 2024})["X-Response-Cache"] == "local"
+        assert response_cache.stats()["entries"] == 2
+
+        settings.RESPONSE_CACHE_MAX_BYTES = 10
+        response_cache.clear()
+        api_client.get(url, {"year": 2023})
+        assert response_cache.stats()["entries"] == 0
+
+    def test_response_cache_shared_tier(self, api_client, setup_data, settings):
+        """Test that responses are shared through the configured Django cache."""
+        # The local memory cache stands in for a file or database cache
+        settings.RESPONSE_CACHE_SHARED_ALIAS = "default"
+        url = reverse("demographics-list")
+        response = api_client.get(url, {"year": 2023})
+
+        # Another process starts with an empty local tier
+        response_cache.clear()
+        cached = api_client.get(url, {"year": 2023})
+        assert cached["X-Response-Cache"] == "shared"
+        assert cached.json() == response.json()
+        assert api_client.get(url, {"year": 2023})["X-Response-Cache"] == "local"
+
+    def test_summary(self, api_client, setup_data):
+        """Test that the summary covers every matching statistic."""
+        # Aggregate categories are not counted again in the groupings
+        DemographicStatistic.objects.create(
+            year=2023,
+            age_group=setup_data["age_groups"]["age_group_1"],
+            sex=Sex.objects.create(name="Both sexes", is_aggregate=True),
+            hd_index=setup_data["hd_indices"]["high_hdi"],
+            value=210,
+        )
+        url = reverse("demographics-summary")
+        response = api_client.get(url, {"year": 2023})
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["count"] == 8
+        assert data["total"] == 560
+        assert data["average"] == 70
+        assert data["by_year"] == [{"year": 2023, "total": 560, "count": 8}]
+        assert data["by_sex"] == [
+            {"sex": "Male", "total": 300, "count": 4},
+            {"sex": "Female", "total": 260, "count": 4},
+        ]
+        assert data["by_age_group"] == [
+            {"age_group": "0 - 4 years", "total": 320, "count": 4},
+            {"age_group": "5 - 9 years", "total": 240, "count": 4},
+        ]
+        assert [group["hd_index"] for group in data["by_hd_index"]] == [
+            "High Human Development Index (HDI)",
+            "Medium Human Development Index (HDI)",
+        ]
+        assert data["by_hd_index_and_sex"][0] == {
+            "hd_index": "High Human Development Index (HDI)",
+            "sex": "Male",
+            "total": 200,
+            "count": 2,
+        }
+
+        # An aggregate category selected by a filter is used as given
+        data = api_client.get(url, {"sex": "Both sexes"}).json()
+        assert data["count"] == 1
+        assert data["total"] == 210
+
+    def test_summary_filters(self, api_client, setup_data):
+        """Test that the summary applies the list endpoint's filters."""
+        url = reverse("demographics-summary")
+        params = {"age_group": "5 - 9 years", "sex": "Female"}
+        data = api_client.get(url, params).json()
+        values = [
+            item["value"]
+            for item in api_client.get(reverse("demographics-list"), params).json()[
+                "results"
+            ]
+        ]
+
+        assert data["count"] == len(values) == 4
+        assert data["total"] == sum(values)
+        assert [group["year"] for group in data["by_year"]] == [2022, 2023]
+
+        empty = api_client.get(url, {"year": 2030}).json()
+        assert empty["count"] == 0
+        assert empty["average"] is None
+        assert empty["by_sex"] == []
+
+    def test_summary_invalid_filter(self, api_client, setup_data):
+        """Test that the summary rejects invalid filters like the list endpoint."""
+        url = reverse("demographics-summary")
+        response = api_client.get(url, {"hd_index": "Unknown"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "hd_index" in response.json()["error"]
+
+        response = api_client.get(url, {"year": "recent"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_summary_reads_no_statistics(
+        self, api_client, setup_data, django_assert_num_queries
+    ):
+        """Test that the summary is answered from the cube and validated by ETag."""
+        url = reverse("demographics-summary")
+        # Loads the cube and the dimension registry
+        etag = api_client.get(url, {"sex": "Female"})["ETag"]
+
+        with django_assert_num_queries(1):
+            response = api_client.get(url, {"sex": "Male"})
+        assert response.status_code == status.HTTP_200_OK
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_aggregate(self, api_client, setup_data):
+        """Test grouping by several dimensions without aggregate categories."""
+        DemographicStatistic.objects.create(
+            year=2023,
+            age_group=AgeGroup.objects.create(name="All ages", is_aggregate=True),
+            sex=setup_data["sexes"]["male"],
+            hd_index=setup_data["hd_indices"]["high_hdi"],
+            value=200,
+        )
+        url = reverse("demographics-aggregate")
+        response = api_client.get(url, {"group_by": "year,sex"})
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["group_by"] == ["year", "sex"]
+        assert data["metric"] == "sum"
+        assert data["results"] == [
+            {"year": 2022, "sex": "Male", "value": 260},
+            {"year": 2022, "sex": "Female", "value": 220},
+            {"year": 2023, "sex": "Male", "value": 300},
+            {"year": 2023, "sex": "Female", "value": 260},
+        ]
+
+        # Filters are applied, and a selected aggregate category is kept
+        response = api_client.get(
+            url, {"group_by": "sex", "metric": "count", "age_group": "All ages"}
+        )
+        assert response.json()["results"] == [{"sex": "Male", "value": 1}]
+
+        # Without grouping, a single total
+        response = api_client.get(url, {"metric": "max", "year": 2022})
+        assert response.json()["results"] == [{"value": 100}]
+        response = api_client.get(url, {"year": 2030})
+        assert response.json()["results"] == []
+
+    def test_aggregate_pivot(self, api_client, setup_data):
+        """Test that groups can be spread into a matrix."""
+        response = api_client.get(
+            reverse("demographics-aggregate"),
+            {"group_by": "sex,age_group", "metric": "avg", "pivot": "sex"},
+        )
+
+        data = response.json()
+        assert data["pivot"] == "sex"
+        assert data["columns"] == ["Male", "Female"]
+        assert data["rows"] == [
+            {"age_group": "0 - 4 years", "values": [80, 70]},
+            {"age_group": "5 - 9 years", "values": [60, 50]},
+        ]
+
+        # Missing cells are null
+        DemographicStatistic.objects.filter(
+            year=2023, sex=setup_data["sexes"]["female"]
+        ).delete()
+        data = api_client.get(
+            reverse("demographics-aggregate"),
+            {"group_by": "year,sex", "pivot": "sex"},
+        ).json()
+        assert data["rows"][1] == {"year": 2023, "values": [300, None]}
+
+    def test_aggregate_single_query(
+        self, api_client, setup_data, django_assert_num_queries
+    ):
+        """Test that an aggregation runs one GROUP BY after the version lookup."""
+        url = reverse("demographics-aggregate")
+        api_client.get(url, {"group_by": "year", "sex": "Female"})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(
+                url, {"group_by": "hd_index,age_group", "sex": "Male"}
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()["results"]) == 4
+        assert len(queries.captured_queries) == 2
+        assert "GROUP BY" in queries.captured_queries[1]["sql"]
+
+    @pytest.mark.parametrize(
+        "params, parameter",
+        [
+            ({"group_by": "region"}, "group_by"),
+            ({"group_by": "sex,sex"}, "group_by"),
+            ({"metric": "median"}, "metric"),
+            ({"group_by": "year", "pivot": "sex"}, "pivot"),
+            ({"sex": "Unknown"}, "sex"),
+        ],
+    )
+    def test_aggregate_invalid_parameters(
+        self, api_client, setup_data, params, parameter
+    ):
+        """Test that invalid aggregation parameters are rejected."""
+        response = api_client.get(reverse("demographics-aggregate"), params)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert parameter in response.json()["error"]
+
+    def test_timeseries(self, api_client, setup_data):
+        """Test the series per category combination and their growth."""
+        response = api_client.get(
+            reverse("demographics-timeseries"),
+            {"group_by": "age_group,hd_index", "sex": "Male"},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["group_by"] == ["age_group", "hd_index"]
+        assert data["years"] == [2022, 2023]
+        assert len(data["series"]) == 4
+        assert data["series"][0] == {
+            "age_group": "0 - 4 years",
+            "hd_index": "High Human Development Index (HDI)",
+            "values": [100, 110],
+            "change": [None, 10],
+            "percent_change": [None, 10],
+            "cagr": pytest.approx(10),
+        }
+
+        # Without grouping, a single series of the totals
+        data = api_client.get(reverse("demographics-timeseries")).json()
+        assert data["series"] == [
+            {
+                "values": [480, 560],
+                "change": [None, 80],
+                "percent_change": [None, pytest.approx(100 / 6)],
+                "cagr": pytest.approx(100 / 6),
+            }
+        ]
+
+    def test_timeseries_missing_years(
+        self, api_client, setup_data, django_assert_num_queries
+    ):
+        """Test that missing years are null and no statistics are queried."""
+        DemographicStatistic.objects.create(
+            year=2021,
+            age_group=setup_data["age_groups"]["age_group_1"],
+            sex=setup_data["sexes"]["male"],
+            hd_index=setup_data["hd_indices"]["high_hdi"],
+            value=50,
+        )
+        url = reverse("demographics-timeseries")
+        api_client.get(url, {"sex": "Female"})
+
+        with django_assert_num_queries(1):
+            response = api_client.get(url, {"group_by": "age_group", "sex": "Male"})
+
+        data = response.json()
+        assert data["years"] == [2021, 2022, 2023]
+        series = data["series"][1]
+        assert series["age_group"] == "5 - 9 years"
+        assert series["values"] == [None, 110, 130]
+        assert series["change"] == [None, None, 20]
+        assert series["cagr"] == pytest.approx(100 * (130 / 110 - 1))
+
+        data = api_client.get(url, {"year": 2030}).json()
+        assert data == {"group_by": [], "years": [], "series": []}
+
+    def test_timeseries_invalid_parameters(self, api_client, setup_data):
+        """Test that series cannot be grouped by year or unknown dimensions."""
+        url = reverse("demographics-timeseries")
+        for params in ({"group_by": "year"}, {"hd_index": "Unknown"}):
+            response = api_client.get(url, params)
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
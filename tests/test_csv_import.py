@@ -1,12 +1,29 @@
+import httpx
 import pytest
 from unittest.mock import patch, MagicMock
-from pathlib import Path
 
 from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
 from io import StringIO
 
-from demographics.models import AgeGroup, Sex, HDIndex, DemographicStatistic
-from demographics.importers import DemographicsCSVImporter
+from demographics.models import (
+    AgeGroup,
+    Sex,
+    HDIndex,
+    DatasetVersion,
+    DemographicStatistic,
+    ImportSource,
+    StatisticRollup,
+)
+from demographics import importers
+from demographics.importers import (
+    DemographicsCSVImporter,
+    detach_inherited_connections,
+    iter_text_lines,
+)
+from demographics.shadow import ShadowTable
 
 
 # Mark all tests as requiring database access
@@ -16,11 +33,6 @@ pytestmark = pytest.mark.django_db
 class TestDemographicsCSVImporter:
     """Tests for the DemographicsCSVImporter class."""
 
-    @pytest.fixture
-    def sample_csv_path(self):
-        """Returns the path to the sample CSV file."""
-        return Path(__file__).parent / "fixtures" / "sample_demographics.csv"
-
     @pytest.fixture
     def importer(self):
         """Returns an instance of DemographicsCSVImporter."""
@@ -113,8 +125,20 @@ class TestDemographicsCSVImporter:
         assert Sex.objects.count() > 0
         assert HDIndex.objects.count() > 0
 
-    @patch("httpx.get")
-    def test_import_from_url(self, mock_get, importer, sample_csv_path):
+    @staticmethod
+    def mock_stream_response(mock_stream, status_code=200, chunks=(), headers=None):
+        """Configure a mocked httpx.stream context manager."""
+        mock_response = MagicMock()
+        mock_response.status_code = status_code
+        mock_response.headers = httpx.Headers(headers or {})
+        mock_response.encoding = "utf-8"
+        mock_response.iter_bytes.return_value = iter(chunks)
+        mock_response.num_bytes_downloaded = sum(len(chunk) for chunk in chunks)
+        mock_stream.return_value.__enter__.return_value = mock_response
+        return mock_response
+
+    @patch("httpx.stream")
+    def test_import_from_url(self, mock_stream, importer, sample_csv_path):
         """Test importing data from a URL."""
         # Clear out any existing data
         DemographicStatistic.objects.all().delete()
@@ -122,12 +146,10 @@ class TestDemographicsCSVImporter:
         Sex.objects.all().delete()
         HDIndex.objects.all().delete()
 
-        # Mock the HTTP response
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        with open(sample_csv_path, "r") as f:
-            mock_response.text = f.read()
-        mock_get.return_value = mock_response
+        # Mock the streamed HTTP response with small, unaligned chunks
+        content = sample_csv_path.read_bytes()
+        chunks = [content[i : i + 97] for i in range(0, len(content), 97)]
+        self.mock_stream_response(mock_stream, chunks=chunks)
 
         # Import the data
         result = importer.import_from_url("https://example.com/demographics.csv")
@@ -137,17 +159,22 @@ class TestDemographicsCSVImporter:
         assert result["total_rows"] > 0
         assert result["imported_rows"] > 0
         assert result["skipped_rows"] >= 0
+        assert result["bytes_downloaded"] == len(content)
+        assert result["bytes_per_second"] > 0
 
         # Check that the data was imported into the database
         assert DemographicStatistic.objects.count() > 0
 
-    @patch("httpx.get")
-    def test_import_from_url_failure(self, mock_get, importer):
+        # The file import must produce exactly the same statistics
+        file_result = importer.import_from_file(sample_csv_path)
+        assert file_result["total_rows"] == result["total_rows"]
+        assert file_result["imported_rows"] == result["imported_rows"]
+
+    @patch("httpx.stream")
+    def test_import_from_url_failure(self, mock_stream, importer):
         """Test handling of URL import failure."""
         # Mock a failed HTTP response
-        mock_response = MagicMock()
-        mock_response.status_code = 404
-        mock_get.return_value = mock_response
+        self.mock_stream_response(mock_stream, status_code=404)
 
         # Import should fail
         result = importer.import_from_url("https://example.com/non-existent.csv")
@@ -155,6 +182,115 @@ class TestDemographicsCSVImporter:
         # Check for the error message (use partial match since exact wording may change)
         assert "HTTP 404" in result["error"]
 
+    @patch("httpx.stream")
+    def test_import_from_url_not_modified(self, mock_stream, importer, sample_csv_path):
+        """Test that a 304 response skips the download and the database work."""
+        content = sample_csv_path.read_bytes()
+        url = "https://example.com/demographics.csv"
+        self.mock_stream_response(
+            mock_stream, chunks=[content], headers={"ETag": '"v1"'}
+        )
+        assert importer.import_from_url(url)["imported_rows"] > 0
+        assert ImportSource.objects.get(url=url).etag == '"v1"'
+
+        response = self.mock_stream_response(mock_stream, status_code=304)
+        result = importer.import_from_url(url)
+
+        assert mock_stream.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+        assert result["success"] is True
+        assert result["unchanged"] is True
+        assert result["not_modified"] is True
+        assert result["check_duration"] >= 0
+        response.iter_bytes.assert_not_called()
+
+    @patch("httpx.stream")
+    def test_import_from_url_checksum(self, mock_stream, importer, sample_csv_path):
+        """Test that an identical body is detected by its checksum."""
+        content = sample_csv_path.read_bytes()
+        url = "https://example.com/demographics.csv"
+        self.mock_stream_response(mock_stream, chunks=[content])
+        first = importer.import_from_url(url)
+        assert first["imported_rows"] > 0
+
+        # Same body without validators: streamed through without any writes
+        version = DatasetVersion.current()
+        self.mock_stream_response(mock_stream, chunks=[content])
+        with patch.object(importer, "_upsert_bulk") as mock_upsert:
+            result = importer.import_from_url(url)
+        assert result["unchanged"] is True
+        assert result["not_modified"] is False
+        assert result["unchanged_rows"] == first["imported_rows"]
+        assert result["bytes_downloaded"] == len(content)
+        mock_upsert.assert_not_called()
+        assert DatasetVersion.current() == version
+
+        # A changed body is imported
+        self.mock_stream_response(
+            mock_stream, chunks=[content.replace(b"2887", b"2888")]
+        )
+        result = importer.import_from_url(url)
+        assert "unchanged" not in result
+        assert result["updated_rows"] == 1
+
+        # Forcing an import skips the conditional checks
+        self.mock_stream_response(mock_stream, chunks=[content])
+        result = importer.import_from_url(url, force=True)
+        assert mock_stream.call_args.kwargs["headers"] == {}
+        assert result["updated_rows"] == 1
+
+    @patch("httpx.stream")
+    def test_import_from_url_checksum_replace(self, mock_stream, sample_csv_path):
+        """Test that a replace with an identical body keeps the live table."""
+        content = sample_csv_path.read_bytes()
+        url = "https://example.com/demographics.csv"
+        importer = DemographicsCSVImporter(replace=True)
+        self.mock_stream_response(mock_stream, chunks=[content])
+        assert importer.import_from_url(url)["replaced"] is True
+        version = DatasetVersion.current()
+
+        self.mock_stream_response(mock_stream, chunks=[content])
+        with patch.object(importer, "_swap_shadow_table") as mock_swap:
+            result = importer.import_from_url(url)
+
+        assert result["unchanged"] is True
+        mock_swap.assert_not_called()
+        assert DatasetVersion.current() == version
+
+    @patch("httpx.stream")
+    def test_import_from_url_failure_not_recorded(
+        self, mock_stream, importer, sample_csv_path
+    ):
+        """Test that a failed import does not mark the source as unchanged."""
+        content = sample_csv_path.read_bytes()
+        url = "https://example.com/demographics.csv"
+        self.mock_stream_response(
+            mock_stream, chunks=[content], headers={"ETag": '"v1"'}
+        )
+        with patch.object(
+            importer, "import_data", return_value={"success": False, "error": "boom"}
+        ):
+            assert importer.import_from_url(url)["success"] is False
+        assert not ImportSource.objects.filter(url=url).exists()
+
+        self.mock_stream_response(
+            mock_stream, chunks=[content], headers={"ETag": '"v1"'}
+        )
+        result = importer.import_from_url(url)
+        assert mock_stream.call_args.kwargs["headers"] == {}
+        assert result["imported_rows"] > 0
+
+    def test_iter_text_lines_across_chunk_boundaries(self):
+        """Test that lines and multi-byte characters split across chunks are rejoined."""
+        text = "a,b\r\nzażółć,1\r\nlast,2"
+        data = text.encode("utf-8")
+        chunks = [data[i : i + 1] for i in range(len(data))]
+
+        assert list(iter_text_lines(chunks)) == [
+            "a,b\r\n",
+            "zażółć,1\r\n",
+            "last,2",
+        ]
+
     def test_handle_invalid_data(self, importer):
         """Test handling of invalid data in CSV."""
         # Test with missing required fields
@@ -194,15 +330,326 @@ class TestDemographicsCSVImporter:
         if processed is not None:
             assert processed["sex"] == "999"  # The unknown code is passed through
 
+    def test_bulk_engine_matches_orm_engine(self, sample_csv_path):
+        """Test that the bulk and ORM engines import the same statistics."""
+        results = {}
+        for engine in DemographicsCSVImporter.ENGINES:
+            DemographicStatistic.objects.all().delete()
+            importer = DemographicsCSVImporter(engine=engine)
+            result = importer.import_from_file(sample_csv_path)
+            assert result["success"] is True
+            assert result["engine"] == importer.effective_engine
+            assert result["rows_per_second"] > 0
+            results[engine] = (
+                result["imported_rows"],
+                set(
+                    DemographicStatistic.objects.values_list(
+                        "year",
+                        "age_group__name",
+                        "sex__name",
+                        "hd_index__name",
+                        "value",
+                    )
+                ),
+            )
+
+        assert results["bulk"] == results["orm"] == results["copy"]
+
+    def test_bulk_engine_validation_and_duplicates(self, importer):
+        """Test that the bulk engine validates rows in memory and upserts duplicates."""
+        rows = [
+            {
+                "Year": "2023",
+                "Age Group": "0 - 4 years",
+                "Sex": "1",
+                "Human Development Index Rating": "20",
+                "VALUE": "1000",
+            },
+            {
+                "Year": "2023",
+                "Age Group": "0 - 4 years",
+                "Sex": "2",
+                "Human Development Index Rating": "20",
+                "VALUE": "-5",  # Negative values are rejected
+            },
+            {
+                "Year": "2023",
+                "Age Group": "0 - 4 years",
+                "Sex": "1",
+                "Human Development Index Rating": "20",
+                "VALUE": "1200",  # Same key as the first row, last one wins
+            },
+        ]
+
+        result = importer.import_data(rows)
+
+        assert result["imported_rows"] == 2
+        assert result["error_rows"] == [2]
+        assert DemographicStatistic.objects.count() == 1
+        assert DemographicStatistic.objects.get().value == 1200
+        assert AgeGroup.objects.get(name="0 - 4 years").is_aggregate is False
+
+    def test_chunked_import_matches_single_chunk(self, sample_csv_path):
+        """Test that streaming in small chunks gives the same result as one chunk."""
+        import csv
+
+        results = []
+        for chunk_size in (3, 100000):
+            DemographicStatistic.objects.all().delete()
+            importer = DemographicsCSVImporter(chunk_size=chunk_size)
+            with open(sample_csv_path, newline="") as f:
+                # Feed a generator so the importer cannot rely on len()
+                result = importer.import_data(row for row in csv.DictReader(f))
+            results.append(
+                (
+                    {
+                        key: result[key]
+                        for key in (
+                            "total_rows",
+                            "skipped_rows",
+                            "imported_rows",
+                            "error_rows",
+                        )
+                    },
+                    DemographicStatistic.objects.count(),
+                )
+            )
+
+        assert results[0] == results[1]
+        assert results[0][0]["imported_rows"] == results[0][1]
+
+    def test_dimension_cache_counters(self, sample_csv_path):
+        """Test that dimensions are resolved from memory after the first lookup."""
+        DemographicStatistic.objects.all().delete()
+        AgeGroup.objects.all().delete()
+        Sex.objects.all().delete()
+        HDIndex.objects.all().delete()
+
+        first = DemographicsCSVImporter(chunk_size=5).import_from_file(sample_csv_path)
+        dimension_count = (
+            AgeGroup.objects.count() + Sex.objects.count() + HDIndex.objects.count()
+        )
+        lookups = 3 * first["imported_rows"]
+        assert first["dimension_cache_misses"] == dimension_count
+        assert first["dimension_cache_hits"] == lookups - dimension_count
+
+        # A second import finds every dimension in the preloaded cache
+        second = DemographicsCSVImporter().import_from_file(sample_csv_path)
+        assert second["dimension_cache_misses"] == 0
+        assert second["dimension_cache_hits"] == lookups
+
+    def test_parallel_parsing_matches_sequential(self, sample_csv_path, tmp_path):
+        """Test that parsing in a process pool keeps results and row numbers."""
+        # Add invalid rows so that the error row numbers can be compared
+        lines = sample_csv_path.read_text().splitlines()
+        lines.insert(
+            7,
+            '"PEA27C01","x","2023","2023","-","0 - 4 years","1","Male",'
+            '"20","High","Number","not-a-number"',
+        )
+        lines.append(
+            '"PEA27C01","x","2024","2024","-","0 - 4 years","1","Male",'
+            '"20","High","Number",""'
+        )
+        csv_path = tmp_path / "demographics.csv"
+        csv_path.write_text("\n".join(lines) + "\n")
+
+        keys = ("total_rows", "skipped_rows", "imported_rows", "error_rows")
+        sequential = DemographicsCSVImporter().import_from_file(csv_path)
+        parallel_importer = DemographicsCSVImporter(workers=2, chunk_size=7)
+        parallel_importer.PARSE_CHUNK_BYTES = 256  # Force many byte ranges
+        parallel = parallel_importer.import_from_file(csv_path)
+
+        assert parallel["success"] is True
+        assert {key: parallel[key] for key in keys} == {
+            key: sequential[key] for key in keys
+        }
+        assert sequential["error_rows"] == [7, len(lines) - 1]
+
+        # Platforms that cannot fork fall back to sequential parsing
+        with (
+            patch("multiprocessing.get_all_start_methods", return_value=["spawn"]),
+            patch.object(
+                DemographicsCSVImporter, "_iter_processed_rows_parallel"
+            ) as mock_parallel,
+        ):
+            fallback = DemographicsCSVImporter(workers=2).import_from_file(csv_path)
+        mock_parallel.assert_not_called()
+        assert {key: fallback[key] for key in keys} == {
+            key: sequential[key] for key in keys
+        }
+
+    def test_parse_workers_detach_inherited_connections(self):
+        """Test that parse workers set the parent's connections aside unclosed."""
+        connection.ensure_connection()
+        inherited = connection.connection
+        try:
+            detach_inherited_connections()
+            assert connection.connection is None
+            assert inherited in importers._inherited_connections
+            # The shared connection is still open
+            inherited.cursor().execute("SELECT 1")
+        finally:
+            connection.connection = inherited
+            importers._inherited_connections.clear()
+
+    def test_incremental_import_change_detection(self, sample_csv_path, tmp_path):
+        """Test that re-imports only write inserted or changed rows."""
+        DemographicStatistic.objects.all().delete()
+
+        first = DemographicsCSVImporter().import_from_file(sample_csv_path)
+        assert first["inserted_rows"] == first["imported_rows"]
+        assert first["updated_rows"] == first["unchanged_rows"] == 0
+
+        # Re-importing the same file writes nothing
+        version = DatasetVersion.current()
+        with CaptureQueriesContext(connection) as queries:
+            second = DemographicsCSVImporter().import_from_file(sample_csv_path)
+        assert second["unchanged_rows"] == first["imported_rows"]
+        assert second["inserted_rows"] == second["updated_rows"] == 0
+        assert not [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith(("INSERT", "UPDATE"))
+        ]
+        assert DatasetVersion.current() == version
+
+        # Changing a single value updates a single row
+        lines = sample_csv_path.read_text().splitlines()
+        last = lines[-1].rsplit(",", 1)
+        lines[-1] = f'{last[0]},"999999"'
+        csv_path = tmp_path / "changed.csv"
+        csv_path.write_text("\n".join(lines))
+
+        third = DemographicsCSVImporter().import_from_file(csv_path)
+        assert third["updated_rows"] == 1
+        assert third["unchanged_rows"] == first["imported_rows"] - 1
+        assert DemographicStatistic.objects.filter(value=999999).count() == 1
+        assert DatasetVersion.current() == version + 1
+
+    def test_import_refreshes_rollups(self, sample_csv_path):
+        """Test that every engine keeps the rollups in sync with the statistics."""
+        for engine in ("bulk", "orm"):
+            DemographicStatistic.objects.all().delete()
+            DemographicsCSVImporter(engine=engine).import_from_file(sample_csv_path)
+            assert StatisticRollup.objects.exists()
+            assert StatisticRollup.check_totals() == []
+
+        # Replace imports compute the rollups from the shadow table up front
+        DemographicStatistic.objects.update(value=0)
+        with patch.object(
+            StatisticRollup, "rebuild", side_effect=AssertionError("rebuilt in swap")
+        ):
+            result = DemographicsCSVImporter(replace=True).import_from_file(
+                sample_csv_path
+            )
+        assert result["replaced"] is True
+        assert StatisticRollup.check_totals() == []
+
+    def test_replace_swaps_in_new_dataset(self, sample_csv_path):
+        """Test that a replace import swaps the whole dataset in."""
+        first = DemographicsCSVImporter().import_from_file(sample_csv_path)
+        stale = DemographicStatistic.objects.create(
+            year=1900,
+            age_group=AgeGroup.objects.first(),
+            sex=Sex.objects.first(),
+            hd_index=HDIndex.objects.first(),
+            value=1,
+        )
+        DemographicStatistic.objects.exclude(pk=stale.pk).update(value=0)
+
+        result = DemographicsCSVImporter(replace=True, chunk_size=5).import_from_file(
+            sample_csv_path
+        )
+
+        assert result["success"] is True
+        assert result["replaced"] is True
+        assert result["previous_rows"] == first["imported_rows"] + 1
+        assert result["inserted_rows"] == first["imported_rows"]
+        assert DemographicStatistic.objects.count() == first["imported_rows"]
+        assert not DemographicStatistic.objects.filter(year=1900).exists()
+        assert not DemographicStatistic.objects.filter(value=0).exists()
+
+        # The swapped-in table keeps the original indexes and constraints
+        table = DemographicStatistic._meta.db_table
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, table)
+            table_names = connection.introspection.table_names(cursor)
+        assert "unique_demographic_statistic" in constraints
+        for index in DemographicStatistic._meta.indexes:
+            assert index.name in constraints
+        assert f"{table}_shadow" not in table_names
+        assert f"{table}_old" not in table_names
+
+    def test_shadow_table_values(self, sample_csv_path):
+        """Test that queries read the shadow table, whatever their aliases."""
+        DemographicsCSVImporter().import_from_file(sample_csv_path)
+        table = DemographicStatistic._meta.db_table
+        shadow_table = ShadowTable(DemographicStatistic)
+        shadow_table.create()
+        try:
+            male = Sex.objects.get(name="Male")
+            DemographicsCSVImporter()._upsert_sql(
+                {
+                    (
+                        2030,
+                        AgeGroup.objects.first().pk,
+                        male.pk,
+                        HDIndex.objects.first().pk,
+                    ): 7
+                },
+                shadow_table.name,
+            )
+            rows = shadow_table.values(
+                DemographicStatistic.objects.filter(sex__name="Male")
+                .values("year")
+                .annotate(**{table: Sum("value")})
+            )
+        finally:
+            shadow_table.drop()
+
+        assert rows == [{"year": 2030, table: 7}]
+
+    def test_replace_refuses_shrinking_dataset(self, sample_csv_path, tmp_path):
+        """Test that a replace import keeps the live data when validation fails."""
+        first = DemographicsCSVImporter().import_from_file(sample_csv_path)
+        lines = sample_csv_path.read_text().splitlines()
+        csv_path = tmp_path / "partial.csv"
+        csv_path.write_text("\n".join([lines[0], lines[-1]]) + "\n")
+
+        result = DemographicsCSVImporter(
+            replace=True, min_replace_ratio=0.75
+        ).import_from_file(csv_path)
+
+        assert result["success"] is False
+        assert "Refusing to replace" in result["error"]
+        assert DemographicStatistic.objects.count() == first["imported_rows"]
+        with connection.cursor() as cursor:
+            table_names = connection.introspection.table_names(cursor)
+        assert f"{DemographicStatistic._meta.db_table}_shadow" not in table_names
+
+        # The default ratio allows the dataset to halve
+        result = DemographicsCSVImporter(replace=True).import_from_file(csv_path)
+        assert result["replaced"] is True
+        assert result["inserted_rows"] == 1
+        assert DemographicStatistic.objects.count() == 1
+
+    def test_replace_options_are_validated(self):
+        """Test that invalid replace options are rejected."""
+        with pytest.raises(ValueError):
+            DemographicsCSVImporter(engine="orm", replace=True)
+        with pytest.raises(ValueError):
+            DemographicsCSVImporter(replace=True, min_replace_ratio=2)
+
+    def test_unknown_engine(self):
+        """Test that an unknown engine is rejected."""
+        with pytest.raises(ValueError):
+            DemographicsCSVImporter(engine="unknown")
+
 
 class TestImportCommand:
     """Tests for the 'import_demographics' management command."""
 
-    @pytest.fixture
-    def sample_csv_path(self):
-        """Returns the path to the sample CSV file."""
-        return Path(__file__).parent / "fixtures" / "sample_demographics.csv"
-
     def test_command_file_import(self, sample_csv_path):
         """Test importing from a file using the management command."""
         # Clear out any existing data
@@ -220,6 +667,61 @@ class TestImportCommand:
         assert "Successfully imported" in output
         assert DemographicStatistic.objects.count() > 0
 
+    @patch(
+        "demographics.management.commands.import_demographics.DemographicsCSVImporter.import_from_url"
+    )
+    def test_command_url_unchanged(self, mock_import_from_url):
+        """Test that the command reports an unchanged source."""
+        mock_import_from_url.return_value = {
+            "success": True,
+            "unchanged": True,
+            "check_duration": 0.05,
+        }
+
+        out = StringIO()
+        call_command(
+            "import_demographics", url="https://example.com/data.csv", stdout=out
+        )
+
+        assert "unchanged, skipped" in out.getvalue()
+        assert "0.05 seconds" in out.getvalue()
+
+    def test_command_copy_engine(self, sample_csv_path):
+        """Test that the copy engine imports data and reports its timings."""
+        out = StringIO()
+        call_command(
+            "import_demographics",
+            file=str(sample_csv_path),
+            engine="copy",
+            stdout=out,
+        )
+        output = out.getvalue()
+
+        assert "Successfully imported" in output
+        assert "rows/sec" in output
+        assert "database writes took" in output
+        if connection.vendor != "postgresql":
+            assert "used 'bulk' instead" in output
+        assert DemographicStatistic.objects.count() > 0
+
+    def test_command_replace(self, sample_csv_path):
+        """Test replacing the dataset using the management command."""
+        call_command(
+            "import_demographics", file=str(sample_csv_path), stdout=StringIO()
+        )
+        count = DemographicStatistic.objects.count()
+
+        out = StringIO()
+        call_command(
+            "import_demographics",
+            file=str(sample_csv_path),
+            replace=True,
+            stdout=out,
+        )
+
+        assert f"Replaced {count} statistics with {count}" in out.getvalue()
+        assert DemographicStatistic.objects.count() == count
+
     @patch(
         "demographics.management.commands.import_demographics.DemographicsCSVImporter.import_from_url"
     )
@@ -0,0 +1,335 @@
+"""
+Tests for the in-memory statistics cube.
+
+This module checks that the cube answers filter, slice, marginal-sum and
+breakdown queries like the ORM, and that it is rebuilt when the data changes.
+"""
+
+from io import StringIO
+
+import numpy as np
+import pytest
+from django.core.management import call_command
+
+from demographics.cube import (
+    StatisticsCube,
+    clear_cube,
+    get_cube,
+    growth_metrics,
+    write_cube_snapshot,
+)
+from demographics.models import (
+    AgeGroup,
+    Sex,
+    HDIndex,
+    DatasetVersion,
+    DemographicStatistic,
+)
+
+
+# Mark all tests as requiring database access
+pytestmark = pytest.mark.django_db
+
+
+class TestStatisticsCube:
+    """Tests for the StatisticsCube class."""
+
+    @pytest.fixture
+    def setup_data(self, categories):
+        """Set up statistics for two years."""
+        value = 100
+        for year in (2022, 2023):
+            for age_group in ("All ages", "0 - 4 years", "5 - 9 years"):
+                for sex in ("Male", "Female", "Both sexes"):
+                    for hd_index in (
+                        "High Human Development Index (HDI)",
+                        "Low Human Development Index (HDI)",
+                    ):
+                        DemographicStatistic.objects.create(
+                            year=year,
+                            age_group=categories[age_group],
+                            sex=categories[sex],
+                            hd_index=categories[hd_index],
+                            value=value,
+                        )
+                        value += 10
+        return categories
+
+    def test_aggregates_match_orm(self, setup_data):
+        """Test that every aggregation method matches the ORM."""
+        cube = StatisticsCube.load()
+
+        for year in (2022, 2023, 2030):
+            for age_group in AgeGroup.objects.all():
+                for hd_index in HDIndex.objects.all():
+                    assert cube.get_aggregated_by_both_sexes(
+                        year, age_group, hd_index
+                    ) == DemographicStatistic.get_aggregated_by_both_sexes(
+                        year, age_group, hd_index
+                    )
+                    assert cube.get_breakdown_by_sex(
+                        year, age_group, hd_index
+                    ) == DemographicStatistic.get_breakdown_by_sex(
+                        year, age_group, hd_index
+                    )
+                for sex in Sex.objects.all():
+                    assert cube.get_aggregated_by_all_hdi(
+                        year, age_group, sex
+                    ) == DemographicStatistic.get_aggregated_by_all_hdi(
+                        year, age_group, sex
+                    )
+            for sex in Sex.objects.all():
+                for hd_index in HDIndex.objects.all():
+                    assert cube.get_aggregated_by_all_ages(
+                        year, sex, hd_index
+                    ) == DemographicStatistic.get_aggregated_by_all_ages(
+                        year, sex, hd_index
+                    )
+
+    def test_filter_and_slice(self, setup_data):
+        """Test filtering and slicing the cube by ids and names."""
+        cube = StatisticsCube.load()
+
+        rows = cube.filter(
+            year=2023,
+            sex="Male",
+            hd_index=setup_data["High Human Development Index (HDI)"],
+        )
+        expected = DemographicStatistic.filter_statistics(
+            year=2023, sex="Male", hd_index="High Human Development Index (HDI)"
+        )
+        assert sorted(row["value"] for row in rows) == sorted(
+            expected.values_list("value", flat=True)
+        )
+        assert {row["sex"] for row in rows} == {"Male"}
+        assert len(cube.filter()) == DemographicStatistic.objects.count()
+        assert cube.filter(year=1999) == []
+
+        values, present = cube.slice(year=2023, age_group="0 - 4 years")
+        assert values.shape == present.shape == cube.shape[2:]
+        assert present.sum() == 6
+
+        values, present = cube.slice(year=1999)
+        assert values.shape == cube.shape[1:]
+        assert not present.any()
+
+        with pytest.raises(ValueError):
+            cube.slice(region="North")
+
+    def test_marginal(self, setup_data):
+        """Test that marginal sums match the single-key totals."""
+        cube = StatisticsCube.load()
+        marginal = cube.marginal("sex")
+        assert marginal.shape == (
+            cube.shape[0],
+            cube.shape[1],
+            cube.shape[3],
+        )
+
+        year = cube.dimension("year").index(2023)
+        age_group = cube.dimension("age_group").index("0 - 4 years")
+        hd_index = cube.dimension("hd_index").index("Low Human Development Index (HDI)")
+        assert marginal[year, age_group, hd_index] == (
+            DemographicStatistic.get_aggregated_by_both_sexes(
+                2023,
+                setup_data["0 - 4 years"],
+                setup_data["Low Human Development Index (HDI)"],
+            )
+        )
+        assert marginal.dtype == np.int64
+
+    def test_group(self, setup_data):
+        """Test that grouped totals match the ORM without aggregate categories."""
+        cube = StatisticsCube.load()
+        groups = cube.group(["hd_index", "year"], age_group="0 - 4 years")
+
+        assert len(groups) == 4
+        for group in groups:
+            statistics = DemographicStatistic.objects.filter(
+                year=group["year"],
+                age_group__name="0 - 4 years",
+                sex__is_aggregate=False,
+                hd_index__name=group["hd_index"],
+            )
+            assert group["count"] == statistics.count() == 2
+            assert group["total"] == sum(statistics.values_list("value", flat=True))
+
+        assert cube.group([], year=1999) == []
+        with pytest.raises(ValueError):
+            cube.group(["sex", "sex"])
+
+    def test_timeseries(self, setup_data):
+        """Test that series over the years match the grouped totals."""
+        cube = StatisticsCube.load()
+        years, keys, totals, present = cube.timeseries(
+            ["sex"], hd_index="Low Human Development Index (HDI)"
+        )
+
+        assert years == [2022, 2023]
+        assert keys == [{"sex": "Male"}, {"sex": "Female"}]
+        assert present.all()
+        for key, series in zip(keys, totals.tolist()):
+            assert series == [
+                group["total"]
+                for group in cube.group(
+                    ["year"], hd_index="Low Human Development Index (HDI)", **key
+                )
+            ]
+
+        with pytest.raises(ValueError):
+            cube.timeseries(["year"])
+
+    def test_growth_metrics(self):
+        """Test year-over-year changes and CAGR with missing years and zeros."""
+        totals = np.array([[100, 110, 0, 121], [0, 50, 60, 0]])
+        present = np.array([[True, True, False, True], [True, True, True, False]])
+
+        metrics = growth_metrics([2020, 2021, 2022, 2023], totals, present)
+
+        assert np.allclose(
+            metrics["change"],
+            [[np.nan, 10, np.nan, np.nan], [np.nan, 50, 10, np.nan]],
+            equal_nan=True,
+        )
+        assert np.allclose(
+            metrics["percent_change"],
+            [[np.nan, 10, np.nan, np.nan], [np.nan, np.nan, 20, np.nan]],
+            equal_nan=True,
+        )
+        # From 2020 to 2023, skipping the missing year
+        assert metrics["cagr"][0] == pytest.approx(100 * (1.21 ** (1 / 3) - 1))
+        assert np.isnan(metrics["cagr"][1])
+
+    def test_get_cube_follows_dataset_version(
+        self, setup_data, django_assert_num_queries
+    ):
+        """Test that the cached cube is rebuilt when the data changes."""
+        cube = get_cube()
+        assert cube.version == DatasetVersion.current()
+
+        with django_assert_num_queries(1):
+            assert get_cube() is cube
+
+        statistic = DemographicStatistic.objects.filter(year=2023).first()
+        statistic.value += 1
+        statistic.save()
+
+        rebuilt = get_cube()
+        assert rebuilt is not cube
+        assert rebuilt.version == cube.version + 1
+        assert rebuilt.get_aggregated_by_both_sexes(
+            2023, statistic.age_group, statistic.hd_index
+        ) == DemographicStatistic.get_aggregated_by_both_sexes(
+            2023, statistic.age_group, statistic.hd_index
+        )
+
+    def test_empty_cube(self):
+        """Test that a cube can be built without any statistics."""
+        cube = StatisticsCube.load()
+        assert cube.values.size == 0
+        assert cube.filter() == []
+        assert cube.get_aggregated_by_both_sexes(2023, 1, 1) == 0
+
+    def test_benchmark_command(self, setup_data):
+        """Test that the benchmark compares every method without mismatches."""
+        out = StringIO()
+        call_command("benchmark_cube", iterations=20, stdout=out)
+        output = out.getvalue()
+
+        assert "Loaded cube with shape" in output
+        for method in (
+            "get_aggregated_by_both_sexes",
+            "get_aggregated_by_all_ages",
+            "get_aggregated_by_all_hdi",
+            "get_breakdown_by_sex",
+        ):
+            assert f"{method}: orm" in output
+        assert "differ" not in output
+
+
+class TestCubeSnapshot:
+    """Tests for the memory-mapped cube snapshot."""
+
+    def test_snapshot_round_trip(self, sample_import, tmp_path):
+        """Test that a snapshot maps back to the same cube, read-only."""
+        cube = StatisticsCube.load()
+        path = tmp_path / "snapshots" / "cube.snapshot"
+        cube.write_snapshot(path)
+
+        mapped = StatisticsCube.from_snapshot(path)
+
+        assert isinstance(mapped.values, np.memmap)
+        assert not mapped.values.flags.writeable
+        assert mapped.version == cube.version
+        assert np.array_equal(mapped.values, cube.values)
+        assert np.array_equal(mapped.present, cube.present)
+        for name, dimension in cube.dimensions.items():
+            assert np.array_equal(mapped.dimension(name).keys, dimension.keys)
+            assert mapped.dimension(name).labels == dimension.labels
+        assert mapped.filter() == cube.filter()
+
+    def test_empty_snapshot_round_trip(self, tmp_path):
+        """Test that a cube without statistics can be snapshotted."""
+        path = tmp_path / "cube.snapshot"
+        StatisticsCube.load().write_snapshot(path)
+        assert StatisticsCube.from_snapshot(path).filter() == []
+
+    def test_import_writes_snapshot(self, sample_import, settings):
+        """Test that an import writes a snapshot of the new version."""
+
+        mapped = StatisticsCube.from_snapshot(settings.CUBE_SNAPSHOT_PATH)
+        assert mapped.version == DatasetVersion.current()
+        assert len(mapped.filter()) == DemographicStatistic.objects.count()
+
+    def test_cold_start_maps_current_snapshot(
+        self, sample_import, django_assert_num_queries
+    ):
+        """Test that a process maps a current snapshot without loading statistics."""
+        clear_cube()
+
+        with django_assert_num_queries(1):
+            cube = get_cube()
+        assert isinstance(cube.values, np.memmap)
+
+    def test_stale_snapshot_is_rebuilt(self, sample_import, settings):
+        """Test that a snapshot of an old version is rebuilt and rewritten."""
+        DemographicStatistic.objects.update(value=1)
+        clear_cube()
+
+        cube = get_cube()
+
+        assert cube.version == DatasetVersion.current()
+        assert set(cube.values[cube.present].tolist()) == {1}
+        mapped = StatisticsCube.from_snapshot(settings.CUBE_SNAPSHOT_PATH)
+        assert mapped.version == cube.version
+
+    def test_snapshot_of_other_database_is_rebuilt(self, sample_import, settings):
+        """Test that a snapshot is not reused when the version counter started over."""
+        snapshot = StatisticsCube.from_snapshot(settings.CUBE_SNAPSHOT_PATH)
+        DemographicStatistic.objects.update(value=1)
+        # A reset or restored database can reach the same version with other data
+        DatasetVersion.objects.filter(pk=1).update(version=snapshot.version)
+        clear_cube()
+
+        cube = get_cube()
+
+        assert cube.version == snapshot.version
+        assert cube.updated_at != snapshot.updated_at
+        assert set(cube.values[cube.present].tolist()) == {1}
+        mapped = StatisticsCube.from_snapshot(settings.CUBE_SNAPSHOT_PATH)
+        assert mapped.updated_at == cube.updated_at
+
+    def test_invalid_snapshot_is_ignored(self, settings):
+        """Test that an unreadable snapshot falls back to the database."""
+        settings.CUBE_SNAPSHOT_PATH.write_bytes(b"not a snapshot")
+
+        cube = get_cube()
+        assert cube.version == DatasetVersion.current()
+        mapped = StatisticsCube.from_snapshot(settings.CUBE_SNAPSHOT_PATH)
+        assert mapped.version == cube.version
+
+    def test_snapshots_can_be_disabled(self, settings):
+        """Test that no snapshot is written when the path is not set."""
+        settings.CUBE_SNAPSHOT_PATH = None
+        assert write_cube_snapshot() is None
+        assert get_cube().version == DatasetVersion.current()
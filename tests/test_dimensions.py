@@ -0,0 +1,97 @@
+"""
+Tests for the dimension registry.
+
+This module checks that the registry maps category names to ids in memory,
+that it is reloaded when the dataset changes, and that the API filters use it
+instead of querying the category tables.
+"""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from demographics.dimensions import get_dimensions
+from demographics.importers import DemographicsCSVImporter
+from demographics.models import AgeGroup, DatasetVersion, Sex
+
+
+# Mark all tests as requiring database access
+pytestmark = pytest.mark.django_db
+
+
+class TestDimensionRegistry:
+    """Tests for the DimensionRegistry and get_dimensions."""
+
+    def test_lookups(self, sample_import):
+        """Test that names and ids are mapped both ways."""
+        registry = get_dimensions()
+
+        male = Sex.objects.get(name="Male")
+        assert registry.id("sex", "Male") == male.pk
+        assert registry.name("sex", male.pk) == "Male"
+        assert registry.id("sex", "Unknown") is None
+        assert registry.categories("age_group") == list(
+            AgeGroup.objects.order_by("pk").values_list("pk", "name", "is_aggregate")
+        )
+        assert registry.version == DatasetVersion.current()
+
+    def test_cached_until_version_changes(self, django_assert_num_queries):
+        """Test that the registry is reloaded only when the dataset changes."""
+        Sex.objects.create(name="Male", is_aggregate=False)
+        registry = get_dimensions()
+
+        with django_assert_num_queries(1):
+            assert get_dimensions() is registry
+
+        # Creating and renaming categories bumps the dataset version
+        female = Sex.objects.create(name="Female", is_aggregate=False)
+        assert get_dimensions().id("sex", "Female") == female.pk
+
+        female.name = "Women"
+        female.save()
+        registry = get_dimensions()
+        assert registry.id("sex", "Female") is None
+        assert registry.id("sex", "Women") == female.pk
+
+        # Saving an unchanged category does not
+        version = DatasetVersion.current()
+        female.save()
+        assert DatasetVersion.current() == version
+
+    def test_import_invalidates_registry(self, sample_csv_path):
+        """Test that categories created by an import are found."""
+        assert get_dimensions().id("sex", "Male") is None
+
+        DemographicsCSVImporter().import_from_file(sample_csv_path)
+
+        assert get_dimensions().id("sex", "Male") is not None
+
+    def test_filters_use_foreign_keys(self, sample_import):
+        """Test that filtered requests neither validate nor join by query."""
+        client = APIClient()
+        url = reverse("demographics-list")
+        client.get(url, {"sex": "Female"})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(
+                url,
+                {
+                    "year": 2023,
+                    "age_group": "0 - 4 years",
+                    "sex": "Male",
+                    "hd_index": "High Human Development Index (HDI)",
+                },
+            )
+
+        assert response.status_code == 200
+        assert len(response.json()["results"]) == 1
+        # Dataset version, page count, statistics and both-sexes totals
+        assert len(queries.captured_queries) == 4
+        for query in queries.captured_queries[1:3]:
+            where = query["sql"].split("WHERE", 1)[1]
+            assert '"age_group_id" =' in where
+            assert '"sex_id" =' in where
+            assert '"hd_index_id" =' in where
+        assert "name" not in where
@@ -6,14 +6,24 @@ that display charts and interactive elements for the demographic data.
 """
 
 import pytest
+from django.conf import settings
 from django.urls import reverse
 from django.test import Client
 from django.contrib.messages import get_messages
 from unittest.mock import patch
 import tempfile
+import json
 import os
 
-from demographics.models import DemographicStatistic, AgeGroup, Sex, HDIndex
+from demographics.models import (
+    DemographicStatistic,
+    DatasetVersion,
+    AgeGroup,
+    Sex,
+    HDIndex,
+    ImportJob,
+    ImportSource,
+)
 
 
 @pytest.mark.django_db
@@ -88,6 +98,62 @@ class TestFrontendViews:
         # In a real app, years and age groups would be dynamically loaded,
         # so we won't check for specific values in the HTML
 
+    def test_dashboard_metadata(self):
+        """Test that the dashboard lists the categories used by the statistics."""
+        AgeGroup.objects.create(name="Unused age group", is_aggregate=False)
+        client = Client()
+        response = client.get(reverse("dashboard"))
+
+        assert json.loads(response.context["years"]) == [2022, 2023]
+        age_groups = json.loads(response.context["age_groups"])
+        assert [option["label"] for option in age_groups] == [
+            "0 - 4 years",
+            "5 - 9 years",
+        ]
+        assert age_groups[0]["value"] == AgeGroup.objects.get(name="0 - 4 years").pk
+        assert {
+            option["label"] for option in json.loads(response.context["sexes"])
+        } == {"Male", "Female"}
+        assert len(json.loads(response.context["hdi_categories"])) == 2
+        assert response.context["total_records"] == 3
+
+    def test_dashboard_render_does_not_scan_statistics(self, django_assert_num_queries):
+        """Test that rendering the dashboard costs one query once it is warm."""
+        client = Client()
+        url = reverse("dashboard")
+        client.get(url)
+
+        with django_assert_num_queries(1):
+            response = client.get(url)
+        assert response.status_code == 200
+
+        # A change of the statistics recomputes the summary
+        DemographicStatistic.objects.create(
+            year=2024,
+            age_group=AgeGroup.objects.first(),
+            sex=Sex.objects.first(),
+            hd_index=HDIndex.objects.first(),
+            value=1,
+        )
+        response = client.get(url)
+        assert json.loads(response.context["years"]) == [2022, 2023, 2024]
+        assert response.context["total_records"] == 4
+
+    def test_dashboard_escapes_category_names(self):
+        """Test that imported category names cannot close the script element."""
+        age_group = AgeGroup.objects.create(name="</script><b>", is_aggregate=False)
+        DemographicStatistic.objects.create(
+            year=2023,
+            age_group=age_group,
+            sex=Sex.objects.first(),
+            hd_index=HDIndex.objects.first(),
+            value=1,
+        )
+        content = Client().get(reverse("dashboard")).content.decode()
+
+        assert "</script><b>" not in content
+        assert "\\u003C/script\\u003E\\u003Cb\\u003E" in content
+
     def test_dashboard_contains_filter_controls(self):
         """Test that the dashboard contains filter controls."""
         client = Client()
@@ -141,6 +207,56 @@ class TestFrontendViews:
         )
         assert "database" in content.lower() or "data" in content.lower()
 
+    def test_dashboard_conditional_requests(self, django_assert_num_queries):
+        """Test that repeat dashboard loads cost a single version lookup."""
+        client = Client()
+        url = reverse("dashboard")
+        # The first visit sets the CSRF cookie that the tag depends on
+        client.get(url)
+        response = client.get(url)
+
+        etag = response["ETag"]
+        assert response["Last-Modified"]
+        assert "private" in response["Cache-Control"]
+        assert "no-cache" in response["Cache-Control"]
+
+        with django_assert_num_queries(1):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+        # A queued import job is shown on the dashboard
+        ImportJob.objects.create(
+            source_type=ImportJob.SourceType.URL,
+            source="https://example.com/data.csv",
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    def test_dashboard_etag_follows_csrf_token(self):
+        """Test that a page is not reused after the CSRF token rotates."""
+        client = Client()
+        url = reverse("dashboard")
+        client.get(url)
+        etag = client.get(url)["ETag"]
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        client.cookies[settings.CSRF_COOKIE_NAME] = "rotated" * 4
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    def test_dashboard_with_messages_is_rendered(self):
+        """Test that pages with flash messages are not answered with 304."""
+        client = Client()
+        url = reverse("dashboard")
+        etag = client.get(url)["ETag"]
+
+        client.post(reverse("import_url"), {})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert "No URL provided." in response.content.decode()
+
     def test_import_file_view_no_file(self):
         """Test that the import file view handles missing file correctly."""
         client = Client()
@@ -156,9 +272,10 @@ class TestFrontendViews:
         assert len(messages) > 0
         assert "No file" in str(messages[0]) or "file" in str(messages[0]).lower()
 
-    @patch("visualization.views.call_command")
-    def test_import_file_view_with_file(self, mock_call_command):
-        """Test that the import file view processes file uploads."""
+    def test_import_file_view_with_file(self, settings, tmp_path):
+        """Test that the import file view queues a background import job."""
+        settings.IMPORT_UPLOAD_DIR = tmp_path
+
         # Create a temporary CSV file
         temp_csv = tempfile.NamedTemporaryFile(delete=False, suffix=".csv")
         temp_csv.write(b"Year,Age Group,Sex,Human Development Index Rating,VALUE\n")
@@ -179,6 +296,19 @@ class TestFrontendViews:
             # Check that a success or error message was set
             messages = list(get_messages(response.wsgi_request))
             assert len(messages) > 0
+
+            # The upload is stored for the worker and a job is queued
+            job = ImportJob.objects.get()
+            assert job.status == ImportJob.Status.QUEUED
+            assert job.source_type == ImportJob.SourceType.FILE
+            assert str(job.pk) in str(messages[0])
+            with open(job.source, "rb") as stored_file:
+                assert b"2023,0 - 4 years,1,20,1000" in stored_file.read()
+
+            # The dashboard polls the running job
+            assert reverse("import_job_status", args=[job.pk]) in (
+                response.content.decode()
+            )
         finally:
             # Clean up the temporary file
             os.unlink(temp_csv.name)
@@ -198,12 +328,8 @@ class TestFrontendViews:
         assert len(messages) > 0
         assert "No URL" in str(messages[0]) or "url" in str(messages[0]).lower()
 
-    @patch("visualization.views.call_command")
-    def test_import_url_view_with_url(self, mock_call_command):
-        """Test that the import URL view processes URL imports."""
-        # Mock the call_command function
-        mock_call_command.return_value = None
-
+    def test_import_url_view_with_url(self):
+        """Test that the import URL view queues a background import job."""
         client = Client()
         url = reverse("import_url")
         response = client.post(
@@ -218,13 +344,45 @@ class TestFrontendViews:
         messages = list(get_messages(response.wsgi_request))
         assert len(messages) > 0
 
-        # Check that the command was called with the URL
-        mock_call_command.assert_called_once()
+        # Check that a job was queued with the URL
+        job = ImportJob.objects.get()
+        assert job.source_type == ImportJob.SourceType.URL
+        assert job.source == "https://example.com/data.csv"
+
+    def test_import_url_view_json_response(self):
+        """Test that JSON clients get the job id right away."""
+        client = Client()
+        response = client.post(
+            reverse("import_url"),
+            {"url": "https://example.com/data.csv"},
+            HTTP_ACCEPT="application/json",
+        )
+
+        assert response.status_code == 202
+        data = response.json()
+        job = ImportJob.objects.get()
+        assert data["id"] == job.pk
+        assert data["status"] == "queued"
+        assert data["status_url"] == reverse("import_job_status", args=[job.pk])
+
+        # The status endpoint reports the job progress
+        status_response = client.get(data["status_url"])
+        assert status_response.status_code == 200
+        assert status_response.json()["phase"] == "queued"
+        assert status_response.json()["stale"] is False
+        assert (
+            client.get(reverse("import_job_status", args=[job.pk + 1])).status_code
+            == 404
+        )
 
     def test_clean_database_view(self):
         """Test that the clean database view works correctly."""
         # Ensure we have data before cleaning
         assert DemographicStatistic.objects.count() > 0
+        version = DatasetVersion.current()
+        ImportSource.objects.create(
+            url="https://example.com/data.csv", etag='"v1"', checksum="abc"
+        )
 
         client = Client()
         url = reverse("clean_database")
@@ -241,12 +399,15 @@ class TestFrontendViews:
 
         # Verify that demographic statistics were cleaned
         assert DemographicStatistic.objects.count() == 0
+        assert DatasetVersion.current() > version
+        # Sources imported before are imported again after a clean
+        assert not ImportSource.objects.exists()
 
-    @patch("visualization.views.call_command")
-    def test_import_url_view_with_exception(self, mock_call_command):
+    @patch("visualization.views.enqueue_url_import")
+    def test_import_url_view_with_exception(self, mock_enqueue_url_import):
         """Test that the import URL view handles exceptions correctly."""
-        # Mock the call_command function to raise an exception
-        mock_call_command.side_effect = Exception("Import failed")
+        # Mock the job queue to raise an exception
+        mock_enqueue_url_import.side_effect = Exception("Import failed")
 
         client = Client()
         url = reverse("import_url")
@@ -0,0 +1,118 @@
+"""
+Tests for background import jobs.
+
+This module contains tests for queueing import jobs and running them with
+the 'run_import_worker' management command.
+"""
+
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from demographics.importers import DemographicsCSVImporter
+from demographics.jobs import enqueue_file_import, run_import_job
+from demographics.models import DatasetVersion, DemographicStatistic, ImportJob
+
+
+# Mark all tests as requiring database access
+pytestmark = pytest.mark.django_db
+
+
+class TestImportJobs:
+    """Tests for the ImportJob model and the import worker."""
+
+    @pytest.fixture
+    def queued_file_job(self, settings, tmp_path, sample_csv_path):
+        """Returns a queued job importing a copy of the sample CSV file."""
+        settings.IMPORT_UPLOAD_DIR = tmp_path
+        with open(sample_csv_path, "rb") as f:
+            return enqueue_file_import(f, "sample_demographics.csv")
+
+    def test_claim_next(self, queued_file_job):
+        """Test that a queued job is claimed exactly once."""
+        job = ImportJob.claim_next()
+        assert job.pk == queued_file_job.pk
+        assert job.status == ImportJob.Status.RUNNING
+        assert job.started_at is not None
+
+        assert ImportJob.claim_next() is None
+
+    def test_worker_runs_queued_job(self, queued_file_job):
+        """Test that the worker imports the data and records the outcome."""
+        out = StringIO()
+        call_command("run_import_worker", once=True, stdout=out)
+
+        job = ImportJob.objects.get(pk=queued_file_job.pk)
+        assert job.status == ImportJob.Status.SUCCEEDED
+        assert job.phase == "finished"
+        assert job.rows_processed == job.result["total_rows"] > 0
+        assert job.rows_per_second > 0
+        assert job.finished_at is not None
+        assert DemographicStatistic.objects.count() == job.result["imported_rows"]
+        assert f"Import job {job.pk} succeeded" in out.getvalue()
+
+        # The uploaded file is removed once imported
+        assert not Path(job.source).exists()
+
+    def test_stale_running_job_is_failed(self, queued_file_job, settings):
+        """Test that a job whose worker died is failed instead of running forever."""
+        settings.IMPORT_JOB_STALE_SECONDS = 60
+        job = ImportJob.claim_next()
+        assert ImportJob.active().filter(pk=job.pk).exists()
+
+        # The worker was killed two minutes ago
+        ImportJob.objects.filter(pk=job.pk).update(
+            heartbeat_at=timezone.now() - timedelta(minutes=2)
+        )
+        assert not ImportJob.active().filter(pk=job.pk).exists()
+        assert DatasetVersion.state(with_active_job=True)["active_job"] is None
+
+        # Polling the status reports it without changing it
+        response = Client().get(reverse("import_job_status", args=[job.pk]))
+        assert response.json()["status"] == ImportJob.Status.RUNNING
+        assert response.json()["stale"] is True
+        job.refresh_from_db()
+        assert job.status == ImportJob.Status.RUNNING
+
+        # The next claim marks it as failed
+        assert ImportJob.claim_next() is None
+        job.refresh_from_db()
+        assert job.status == ImportJob.Status.FAILED
+        assert "stopped responding" in job.error
+        assert job.finished_at is not None
+        assert not Path(job.source).exists()
+
+    def test_heartbeat_while_running(self, queued_file_job, settings):
+        """Test that running jobs keep their heartbeat fresh."""
+        settings.IMPORT_JOB_STALE_SECONDS = 60
+        job = ImportJob.claim_next()
+        ImportJob.objects.filter(pk=job.pk).update(
+            heartbeat_at=timezone.now() - timedelta(minutes=2)
+        )
+
+        def check_heartbeat(*args, **kwargs):
+            # Progress reports, or the heartbeat thread, refresh the job
+            assert ImportJob.fail_stale() == 0
+            return {"success": True, "total_rows": 0}
+
+        with patch.object(
+            DemographicsCSVImporter, "import_from_file", side_effect=check_heartbeat
+        ):
+            job = run_import_job(job)
+        assert job.status == ImportJob.Status.SUCCEEDED
+
+    def test_failed_job(self, queued_file_job):
+        """Test that a failing import marks the job as failed."""
+        Path(queued_file_job.source).unlink()
+
+        job = run_import_job(ImportJob.claim_next())
+
+        assert job.status == ImportJob.Status.FAILED
+        assert "File not found" in job.error
@@ -139,3 +139,233 @@ class TestDemographicStatisticMethods:
         assert len(breakdown) == 2
         assert breakdown["Male"] == 1000
         assert breakdown["Female"] == 900
+
+    def test_batched_aggregates_match_single_lookups(
+        self, setup_data, django_assert_num_queries
+    ):
+        """Test that the batched methods match the single-key methods."""
+        from demographics.models import DemographicStatistic
+
+        age_groups = setup_data["age_groups"].values()
+        sexes = setup_data["sexes"].values()
+        hd_indices = setup_data["hd_indices"].values()
+
+        for method, first, second in (
+            ("get_aggregated_by_both_sexes", age_groups, hd_indices),
+            ("get_aggregated_by_all_ages", sexes, hd_indices),
+            ("get_aggregated_by_all_hdi", age_groups, sexes),
+        ):
+            keys = [(2023, a, b) for a in first for b in second]
+            with django_assert_num_queries(1):
+                totals = getattr(DemographicStatistic, f"{method}_many")(keys)
+
+            assert len(totals) == len(keys)
+            single = getattr(DemographicStatistic, method)
+            for year, a, b in keys:
+                expected = single(year, a, b)
+                assert totals[(year, a.pk, b.pk)] == expected
+
+    def test_batched_aggregates_accept_querysets_and_ids(self, setup_data):
+        """Test that the batched methods accept querysets and category ids."""
+        from demographics.models import DemographicStatistic
+
+        age_group = setup_data["age_groups"]["0 - 4 years"]
+        hd_index = setup_data["hd_indices"]["High Human Development Index (HDI)"]
+
+        totals = DemographicStatistic.get_aggregated_by_both_sexes_many(
+            DemographicStatistic.objects.filter(year=2023)
+        )
+        assert totals == {
+            (2023, age_group.pk, hd_index.pk): 1900,
+            (2023, setup_data["age_groups"]["5 - 9 years"].pk, hd_index.pk): 1500,
+        }
+        assert DemographicStatistic.get_aggregated_by_both_sexes_many(
+            [(2023, age_group.pk, hd_index.pk), (1999, age_group.pk, hd_index.pk)]
+        ) == {
+            (2023, age_group.pk, hd_index.pk): 1900,
+            (1999, age_group.pk, hd_index.pk): 0,
+        }
+        assert DemographicStatistic.get_aggregated_by_both_sexes_many([]) == {}
+
+    def test_get_breakdown_by_sex_many(self, setup_data, django_assert_num_queries):
+        """Test getting many breakdowns by sex with one query."""
+        from demographics.models import DemographicStatistic
+
+        hd_index = setup_data["hd_indices"]["High Human Development Index (HDI)"]
+        keys = [
+            (2023, age_group, hd_index)
+            for age_group in setup_data["age_groups"].values()
+        ]
+
+        with django_assert_num_queries(1):
+            breakdowns = DemographicStatistic.get_breakdown_by_sex_many(keys)
+
+        assert breakdowns[
+            (2023, setup_data["age_groups"]["0 - 4 years"].pk, hd_index.pk)
+        ] == {
+            "Male": 1000,
+            "Female": 900,
+        }
+        assert (
+            breakdowns[(2023, setup_data["age_groups"]["All ages"].pk, hd_index.pk)]
+            == {}
+        )
+        for year, age_group, hd_index in keys:
+            assert breakdowns[(year, age_group.pk, hd_index.pk)] == (
+                DemographicStatistic.get_breakdown_by_sex(year, age_group, hd_index)
+            )
+
+    def test_dataset_version_row_exists(self, django_assert_num_queries):
+        """Test that the migrated version row caches the summary before any write."""
+        from demographics.models import DatasetVersion
+
+        state = DatasetVersion.state()
+        assert state["version"] >= 1
+
+        summary = DatasetVersion.get_summary(state)
+        with django_assert_num_queries(1):
+            assert DatasetVersion.get_summary() == summary
+
+        DatasetVersion.bump()
+        assert DatasetVersion.current() == state["version"] + 1
+        assert DatasetVersion.objects.count() == 1
+
+
+class TestStatisticRollup:
+    """Tests for the precomputed StatisticRollup totals"""
+
+    @pytest.fixture
+    def setup_data(self, categories):
+        """Set up a few statistics."""
+        from demographics.models import DemographicStatistic
+
+        high = categories["High Human Development Index (HDI)"]
+        for age_group, sex, value in (
+            ("0 - 4 years", "Male", 1000),
+            ("0 - 4 years", "Female", 900),
+            ("5 - 9 years", "Male", 800),
+        ):
+            DemographicStatistic.objects.create(
+                year=2023,
+                age_group=categories[age_group],
+                sex=categories[sex],
+                hd_index=high,
+                value=value,
+            )
+        return categories
+
+    def test_aggregates_use_a_single_lookup(
+        self, setup_data, django_assert_num_queries
+    ):
+        """Test that the aggregation classmethods read one rollup row."""
+        from demographics.models import DemographicStatistic
+
+        with django_assert_num_queries(1):
+            total = DemographicStatistic.get_aggregated_by_all_ages(
+                year=2023,
+                sex=setup_data["Male"],
+                hd_index=setup_data["High Human Development Index (HDI)"],
+            )
+        assert total == 1800
+
+    def test_rollups_follow_writes(self, setup_data):
+        """Test that saves, updates and deletes refresh the rollups."""
+        from demographics.models import DemographicStatistic, StatisticRollup
+
+        age_group = setup_data["0 - 4 years"]
+        hd_index = setup_data["High Human Development Index (HDI)"]
+
+        def both_sexes():
+            return DemographicStatistic.get_aggregated_by_both_sexes(
+                year=2023, age_group=age_group, hd_index=hd_index
+            )
+
+        assert both_sexes() == 1900
+
+        male = DemographicStatistic.objects.get(
+            age_group=age_group, sex=setup_data["Male"]
+        )
+        male.value = 1100
+        male.save()
+        assert both_sexes() == 2000
+
+        DemographicStatistic.objects.filter(age_group=age_group).update(value=10)
+        assert both_sexes() == 20
+
+        male.refresh_from_db()
+        male.delete()
+        assert both_sexes() == 10
+
+        DemographicStatistic.objects.filter(age_group=age_group).delete()
+        assert both_sexes() == 0
+        assert StatisticRollup.check_totals() == []
+
+        DemographicStatistic.objects.all().delete()
+        assert not StatisticRollup.objects.exists()
+
+    def test_aggregate_flag_change_rebuilds(self, setup_data):
+        """Test that changing a category's aggregate flag rebuilds the rollups."""
+        from demographics.models import DemographicStatistic, StatisticRollup
+
+        female = setup_data["Female"]
+        female.is_aggregate = True
+        female.save()
+
+        assert (
+            DemographicStatistic.get_aggregated_by_both_sexes(
+                year=2023,
+                age_group=setup_data["0 - 4 years"],
+                hd_index=setup_data["High Human Development Index (HDI)"],
+            )
+            == 1000
+        )
+        assert StatisticRollup.check_totals() == []
+
+    def test_category_queryset_writes(self, setup_data):
+        """Test that bulk category deletes and updates refresh the rollups."""
+        from demographics.models import (
+            AgeGroup,
+            DatasetVersion,
+            DemographicStatistic,
+            Sex,
+            StatisticRollup,
+        )
+
+        def all_ages():
+            return DemographicStatistic.get_aggregated_by_all_ages(
+                year=2023,
+                sex=setup_data["Male"],
+                hd_index=setup_data["High Human Development Index (HDI)"],
+            )
+
+        version = DatasetVersion.current()
+        Sex.objects.filter(name="Female").update(is_aggregate=True)
+        assert DatasetVersion.current() > version
+        assert StatisticRollup.check_totals() == []
+
+        # The delete cascades to the statistics, as the admin action does
+        version = DatasetVersion.current()
+        AgeGroup.objects.filter(name="5 - 9 years").delete()
+        assert DatasetVersion.current() > version
+        assert all_ages() == 1000
+        assert StatisticRollup.check_totals() == []
+
+    def test_rebuild_rollups_command(self, setup_data):
+        """Test that the command detects and repairs stale rollups."""
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        from io import StringIO
+
+        from demographics.models import StatisticRollup
+
+        StatisticRollup.objects.filter(kind="sex").update(total=0)
+
+        out = StringIO()
+        with pytest.raises(CommandError):
+            call_command("rebuild_rollups", check=True, stdout=out)
+        assert "stored 0, live 1900" in out.getvalue()
+
+        out = StringIO()
+        call_command("rebuild_rollups", stdout=out)
+        assert "rollups match the live sums" in out.getvalue()
+        assert StatisticRollup.check_totals() == []
@@ -0,0 +1,60 @@
+"""
+Metadata shown by the dashboard.
+
+The dashboard's filter options and record count are read from the dataset
+summary cached in the DatasetVersion row and from the in-memory dimension
+registry, instead of scanning the statistics on every page load. Both are
+recomputed only when the dataset version changes, so rendering the dashboard
+costs the one query that reads the version.
+"""
+
+from typing import Any, Dict, List
+
+from demographics.caching import get_dataset_state
+from demographics.dimensions import get_dimensions
+from demographics.models import DatasetVersion, ImportJob
+
+
+def get_dashboard_metadata(request: Any) -> Dict[str, Any]:
+    """
+    Get the filter options, record count and active import job of the dashboard.
+
+    Args:
+        request: The current request. Its dataset state, looked up once per
+            request, should include the active import job (see
+            ``dataset_cache``).
+
+    Returns:
+        A dictionary with the "years", the "age_groups", "sexes" and
+        "hdi_categories" used by the statistics as {"value": id, "label": name}
+        options, the "total_records" and the id of the "active_import_job".
+    """
+    state = get_dataset_state(request)
+    summary = DatasetVersion.get_summary(state)
+    dimensions = get_dimensions(request)
+
+    def options(dimension: str) -> List[Dict[str, Any]]:
+        return [
+            {"value": pk, "label": dimensions.name(dimension, pk)}
+            for pk in summary[dimension]
+            if dimensions.name(dimension, pk) is not None
+        ]
+
+    if state is not None and "active_job" in state:
+        active_import_job = state["active_job"]
+    else:
+        active_import_job = (
+            ImportJob.active()
+            .order_by("-created_at")
+            .values_list("pk", flat=True)
+            .first()
+        )
+
+    return {
+        "years": summary["years"],
+        "age_groups": options("age_group"),
+        "sexes": options("sex"),
+        "hdi_categories": options("hd_index"),
+        "total_records": summary["total"],
+        "active_import_job": active_import_job,
+    }
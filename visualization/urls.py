@@ -12,5 +12,6 @@ urlpatterns = [
     path("", views.dashboard, name="dashboard"),
     path("import-file/", views.import_file, name="import_file"),
     path("import-url/", views.import_url, name="import_url"),
+    path("import-jobs/<int:pk>/", views.import_job_status, name="import_job_status"),
     path("clean-database/", views.clean_database, name="clean_database"),
 ]
@@ -5,124 +5,151 @@ This module contains views for the visualization frontend that displays
 charts and interactive elements for the demographic data.
 """
 
-from django.shortcuts import render, redirect
+from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib import messages
+from django.db import transaction
+from django.http import JsonResponse
+from django.urls import reverse
 from django.views.decorators.http import require_http_methods
 import json
-from demographics.models import DemographicStatistic
-from django.core.management import call_command
-import os
-import tempfile
+from demographics.caching import dataset_cache
+from demographics.jobs import enqueue_file_import, enqueue_url_import
+from demographics.models import DemographicStatistic, ImportJob, ImportSource
+from visualization.metadata import get_dashboard_metadata
 
 
 @require_http_methods(["GET"])
+@dataset_cache(with_active_job=True, with_csrf_token=True, private=True, no_cache=True)
 def dashboard(request):
     """
     View for the demographics dashboard.
 
+    The page only changes with the dataset version and the active import job,
+    so browsers revalidate it with its ETag and repeat loads cost a single
+    query.
+
     This view renders the dashboard template with the following context:
     - api_endpoint: URL for the API
+    - summary_endpoint: URL of the API summary used by the statistics and charts
     - years: List of available years
-    - age_groups: List of available age groups
-    - sexes: List of available sexes
-    - hdi_categories: List of available HDI categories
+    - age_groups: List of available age groups, as value (id) and label pairs
+    - sexes: List of available sexes, as value and label pairs
+    - hdi_categories: List of available HDI categories, as value and label pairs
+
+    The metadata comes from ``get_dashboard_metadata``, which does not scan the
+    statistics unless the dataset changed.
     """
-    # Get unique values for filters
-    years = list(
-        DemographicStatistic.objects.values_list("year", flat=True)
-        .distinct()
-        .order_by("year")
-    )
-    age_groups = list(
-        DemographicStatistic.objects.values_list("age_group", flat=True)
-        .distinct()
-        .order_by("age_group")
-    )
-    sexes = list(
-        DemographicStatistic.objects.values_list("sex", flat=True)
-        .distinct()
-        .order_by("sex")
-    )
-    hdi_categories = list(
-        DemographicStatistic.objects.values_list("hd_index", flat=True)
-        .distinct()
-        .order_by("hd_index")
-    )
+    metadata = get_dashboard_metadata(request)
 
     # API endpoint for the dashboard to use
     api_endpoint = "/api/demographics/"
 
-    # Get counts for summary stats
-    total_records = DemographicStatistic.objects.count()
-
     context = {
         "api_endpoint": api_endpoint,
-        "years": json.dumps(years),
-        "age_groups": json.dumps(age_groups),
-        "sexes": json.dumps(sexes),
-        "hdi_categories": json.dumps(hdi_categories),
-        "total_records": total_records,
+        "summary_endpoint": f"{api_endpoint}summary/",
+        "years": _script_json(metadata["years"]),
+        "age_groups": _script_json(metadata["age_groups"]),
+        "sexes": _script_json(metadata["sexes"]),
+        "hdi_categories": _script_json(metadata["hdi_categories"]),
+        "total_records": metadata["total_records"],
+        "import_job_status_url": (
+            reverse("import_job_status", args=[metadata["active_import_job"]])
+            if metadata["active_import_job"]
+            else ""
+        ),
     }
 
     return render(request, "visualization/dashboard.html", context)
 
 
+def _script_json(value):
+    """
+    Encode a value as JSON that is safe to embed in an inline script.
+
+    Category names come from imported data, so the characters that could
+    close the script element are escaped.
+    """
+    return (
+        json.dumps(value)
+        .replace("<", "\\u003C")
+        .replace(">", "\\u003E")
+        .replace("&", "\\u0026")
+    )
+
+
+def _wants_json(request):
+    """Return True if the client asked for a JSON response."""
+    return "application/json" in request.headers.get("Accept", "")
+
+
+def _job_queued_response(request, job):
+    """
+    Respond to a queued import job.
+
+    JSON clients get the job status with a 202 status code, browsers are
+    redirected to the dashboard, which polls the job.
+    """
+    if _wants_json(request):
+        data = job.to_dict()
+        data["status_url"] = reverse("import_job_status", args=[job.pk])
+        return JsonResponse(data, status=202)
+
+    messages.success(request, f"Import job {job.pk} queued: {job.name}")
+    return redirect("dashboard")
+
+
 @require_http_methods(["POST"])
 def import_file(request):
-    """Handle importing data from an uploaded file."""
+    """Handle importing data from an uploaded file in a background job."""
     if "file" not in request.FILES:
         messages.error(request, "No file provided.")
         return redirect("dashboard")
 
     uploaded_file = request.FILES["file"]
 
-    # Create a temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as temp_file:
-        for chunk in uploaded_file.chunks():
-            temp_file.write(chunk)
-        temp_file_path = temp_file.name
-
     try:
-        # Call the management command
-        call_command("import_demographics", file=temp_file_path)
-        messages.success(
-            request, f"Successfully imported data from file: {uploaded_file.name}"
-        )
+        job = enqueue_file_import(uploaded_file.chunks(), uploaded_file.name)
     except Exception as e:
-        messages.error(request, f"Failed to import data: {str(e)}")
-    finally:
-        # Clean up the temporary file
-        if os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
+        messages.error(request, f"Failed to queue import: {str(e)}")
+        return redirect("dashboard")
 
-    return redirect("dashboard")
+    return _job_queued_response(request, job)
 
 
 @require_http_methods(["POST"])
 def import_url(request):
-    """Handle importing data from a URL."""
+    """Handle importing data from a URL in a background job."""
     url = request.POST.get("url")
     if not url:
         messages.error(request, "No URL provided.")
         return redirect("dashboard")
 
     try:
-        # Call the management command
-        call_command("import_demographics", url=url)
-        messages.success(request, f"Successfully imported data from URL: {url}")
+        job = enqueue_url_import(url)
     except Exception as e:
-        messages.error(request, f"Failed to import data: {str(e)}")
+        messages.error(request, f"Failed to queue import: {str(e)}")
+        return redirect("dashboard")
 
-    return redirect("dashboard")
+    return _job_queued_response(request, job)
+
+
+@require_http_methods(["GET"])
+def import_job_status(request, pk):
+    """Return the status and progress of an import job as JSON."""
+    job = get_object_or_404(ImportJob, pk=pk)
+    return JsonResponse(job.to_dict())
 
 
 @require_http_methods(["POST"])
 def clean_database(request):
     """Handle cleaning the database."""
     try:
-        # Delete all demographic statistics
-        count = DemographicStatistic.objects.count()
-        DemographicStatistic.objects.all().delete()
+        # Delete all demographic statistics, and the recorded URL sources so
+        # that importing them again is not skipped as unchanged
+        with transaction.atomic():
+            count = DemographicStatistic.objects.count()
+            DemographicStatistic.objects.all().delete()
+            ImportSource.objects.all().delete()
         messages.success(
             request, f"Successfully cleaned the database. Removed {count} records."
         )